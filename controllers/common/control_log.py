@@ -0,0 +1,144 @@
+"""
+控制循环日志 - 无外部依赖版本
+控制线程只把结构化记录放进环形缓冲区（不做格式化和I/O），后台线程批量格式化写出；
+同一消息键按时间间隔限流，被限流的条数累计到该键下一条输出（或关闭时的汇总）里，不会静默丢失
+"""
+
+import json
+import sys
+import threading
+import time
+
+
+class ControlLogger:
+    """非阻塞、按消息键限流的日志器"""
+
+    def __init__(self, stream=None, record_file=None, capacity=256, rate_limits=None,
+                 default_interval=0.0, clock=None, flush_interval=0.05):
+        self.stream = stream or sys.stdout  # 构造时绑定，后台线程不受之后的 stdout 重定向影响
+        self.record_file = record_file      # 可选: 每条记录一行JSON
+        self.rate_limits = dict(rate_limits or {})  # {消息键: 最小间隔(秒)}
+        self.default_interval = default_interval    # 未配置的键的间隔（0=不限流）
+        self.clock = clock or time.monotonic        # 控制器可传入仿真时钟
+        self.flush_interval = flush_interval
+
+        # 环形缓冲区: 满时扩容而不是覆盖或阻塞，保证不丢记录
+        self._slots = [None] * capacity
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._last_emit = {}
+        self._suppressed = {}
+        self.pushed = 0
+        self.emitted = 0
+        self.suppressed_total = 0
+        self.high_water = 0
+        self.grow_count = 0
+
+        self._records = open(record_file, 'w', encoding='utf-8') if record_file else None
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="control-log", daemon=True)
+        self._writer.start()
+
+    def log(self, key, message, *args, level="info"):
+        """记录一条消息；message 可含 {} 占位符，args 在后台线程中格式化。返回是否被接受"""
+        now = self.clock()
+        suppressed = 0
+        if key is not None:
+            interval = self.rate_limits.get(key, self.default_interval)
+            last = self._last_emit.get(key)
+            if interval > 0 and last is not None and now - last < interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                self.suppressed_total += 1
+                return False
+            self._last_emit[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        self._push((now, level, key, message, args, suppressed))
+        return True
+
+    def info(self, key, message, *args):
+        return self.log(key, message, *args)
+
+    def warning(self, key, message, *args):
+        return self.log(key, message, *args, level="warning")
+
+    def _push(self, record):
+        with self._lock:
+            capacity = len(self._slots)
+            if self._count == capacity:
+                # 写出端太慢: 按顺序展开为两倍容量的新环
+                self._slots = [self._slots[(self._head + i) % capacity] for i in range(capacity)]
+                self._slots.extend([None] * capacity)
+                self._head = 0
+                self.grow_count += 1
+                capacity *= 2
+            self._slots[(self._head + self._count) % capacity] = record
+            self._count += 1
+            self.pushed += 1
+            if self._count > self.high_water:
+                self.high_water = self._count
+
+    def _drain(self):
+        with self._lock:
+            capacity = len(self._slots)
+            records = []
+            for i in range(self._count):
+                index = (self._head + i) % capacity
+                records.append(self._slots[index])
+                self._slots[index] = None
+            self._head = (self._head + self._count) % capacity
+            self._count = 0
+        return records
+
+    def _write(self, records):
+        lines = []
+        for timestamp, level, key, message, args, suppressed in records:
+            try:
+                text = message.format(*args) if args else message
+            except (IndexError, KeyError, ValueError):
+                text = f"{message} {args!r}"  # 格式串与参数不匹配时原样保留，不让写线程退出
+            if suppressed:
+                text += f" (期间另有{suppressed}条已限流)"
+            lines.append(text)
+            if self._records:
+                self._records.write(json.dumps({'time': round(timestamp, 3), 'level': level, 'key': key,
+                                                'message': text, 'suppressed': suppressed},
+                                               ensure_ascii=False) + "\n")
+        self.stream.write("\n".join(lines) + "\n")
+        self.stream.flush()
+        self.emitted += len(records)
+
+    def _run(self):
+        # 按固定周期批量写出，控制线程入队时不唤醒写线程
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            records = self._drain()
+            if records:
+                self._write(records)
+
+    def flush(self):
+        """等待当前缓冲区全部写出（测试和关闭时使用，不要在控制循环里调用）"""
+        while self.emitted < self.pushed and self._writer.is_alive():
+            self._wakeup.set()
+            time.sleep(0.001)
+
+    def close(self):
+        """停止后台线程，写出剩余记录和被限流条数汇总"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        records = self._drain()
+        now = self.clock()
+        for key, count in sorted(self._suppressed.items(), key=lambda item: str(item[0])):
+            records.append((now, "info", key, f"[{key}] 另有{count}条消息被限流合并", (), 0))
+        self._suppressed.clear()
+        if records:
+            self._write(records)
+        if self._records:
+            self._records.close()
+            self._records = None
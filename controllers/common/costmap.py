@@ -0,0 +1,133 @@
+"""
+膨胀代价地图 - 无外部依赖版本
+在占用栅格上维护到最近障碍物的欧氏距离场（动态 brushfire，Lau 等人的增量更新），
+障碍单元增删时只重新传播受影响的区域；每个单元的距离/代价查询为 O(1)
+"""
+
+import heapq
+import math
+from array import array
+
+INF = float('inf')
+
+
+class Costmap:
+    """距离场 + 膨胀代价层，可直接作为路径规划器的 cell_cost 使用"""
+
+    def __init__(self, grid, inscribed_radius=0.11, inflation_radius=0.35,
+                 inscribed_cost=50.0, cost_decay=10.0):
+        self.grid = grid
+        self.inscribed_radius = inscribed_radius  # 机器人外接半径，距离小于它必然碰撞
+        self.inflation_radius = inflation_radius  # 膨胀半径，超出后代价为1
+        self.inscribed_cost = inscribed_cost      # 内切圆内的高代价（有限值，起点/目标贴墙时仍可规划）
+        self.cost_decay = cost_decay              # 膨胀代价指数衰减系数（1/米）
+        self.max_distance = inflation_radius / grid.resolution  # 传播上限（栅格）
+
+        cell_count = grid.width * grid.height
+        self.distance_cells = array('d', [INF]) * cell_count  # 到最近障碍物的距离（栅格）
+        self.nearest = array('i', [-1]) * cell_count          # 最近障碍物单元索引
+        self.obstacle = bytearray(cell_count)                 # 距离场视角下的障碍物标记
+        self.to_raise = bytearray(cell_count)
+        self.open_heap = []
+
+    def _clear_cell(self, index):
+        self.distance_cells[index] = INF
+        self.nearest[index] = -1
+
+    def set_obstacle(self, index):
+        if self.obstacle[index]:
+            return
+        self.obstacle[index] = 1
+        self.distance_cells[index] = 0.0
+        self.nearest[index] = index
+        heapq.heappush(self.open_heap, (0.0, index))
+
+    def remove_obstacle(self, index):
+        if not self.obstacle[index]:
+            return
+        self.obstacle[index] = 0
+        self._clear_cell(index)
+        self.to_raise[index] = 1
+        heapq.heappush(self.open_heap, (0.0, index))
+
+    def update(self, changed):
+        """根据占用栅格中状态变化的单元更新距离场，返回距离可能发生变化的单元索引（供规划器增量修复）"""
+        occupied = self.grid.OCCUPIED
+        state = self.grid.state
+        for index in changed:
+            if state[index] == occupied:
+                self.set_obstacle(index)
+            else:
+                self.remove_obstacle(index)
+        return self._propagate()
+
+    def _propagate(self):
+        width = self.grid.width
+        height = self.grid.height
+        distance_cells = self.distance_cells
+        nearest = self.nearest
+        obstacle = self.obstacle
+        to_raise = self.to_raise
+        max_distance = self.max_distance
+        heap = self.open_heap
+        touched = set()
+
+        while heap:
+            _, s = heapq.heappop(heap)
+            touched.add(s)
+            sx = s % width
+            sy = s // width
+            neighbors = [ny * width + nx
+                         for ny in (sy - 1, sy, sy + 1) if 0 <= ny < height
+                         for nx in (sx - 1, sx, sx + 1) if 0 <= nx < width and (nx != sx or ny != sy)]
+
+            if to_raise[s]:
+                # 障碍物被移除: 清除以它为最近障碍的单元，并让边界上的有效单元重新向内传播
+                for n in neighbors:
+                    if nearest[n] != -1 and not to_raise[n]:
+                        heapq.heappush(heap, (distance_cells[n], n))
+                        if not obstacle[nearest[n]]:
+                            self._clear_cell(n)
+                            to_raise[n] = 1
+                            touched.add(n)
+                to_raise[s] = 0
+            elif nearest[s] != -1 and obstacle[nearest[s]]:
+                # 向邻居传播更近的障碍物
+                source = nearest[s]
+                ox = source % width
+                oy = source // width
+                for n in neighbors:
+                    if to_raise[n]:
+                        continue
+                    distance = math.hypot(n % width - ox, n // width - oy)
+                    if distance < distance_cells[n] and distance <= max_distance:
+                        distance_cells[n] = distance
+                        nearest[n] = source
+                        touched.add(n)
+                        heapq.heappush(heap, (distance, n))
+        return list(touched)
+
+    def distance(self, index):
+        """到最近障碍物的距离（米），膨胀半径外为无穷"""
+        return self.distance_cells[index] * self.grid.resolution
+
+    def clearance(self, x, y):
+        """世界坐标处的障碍物间隙（米），地图外返回0"""
+        cell = self.grid.world_to_cell(x, y)
+        if cell is None:
+            return 0.0
+        return self.distance(cell[1] * self.grid.width + cell[0])
+
+    def cost(self, index):
+        """单元通行代价: 障碍物为无穷，内切圆内为高代价，膨胀区指数衰减到1"""
+        if self.obstacle[index]:
+            return INF
+        distance = self.distance_cells[index] * self.grid.resolution
+        if distance >= self.inflation_radius:
+            return 1.0
+        if distance <= self.inscribed_radius:
+            return self.inscribed_cost
+        return 1.0 + (self.inscribed_cost - 1.0) * math.exp(
+            -self.cost_decay * (distance - self.inscribed_radius))
+
+    __call__ = cost
@@ -0,0 +1,50 @@
+"""
+有界 LRU 缓存 - 无外部依赖版本
+按最近使用顺序淘汰最旧条目，并统计命中/未命中次数，供定位控制器缓存期望读数等重复计算
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """容量有界的最近最少使用缓存"""
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """命中时返回值并标记为最近使用；未命中返回 None"""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                'hit_rate': self.hit_rate}
@@ -0,0 +1,200 @@
+"""
+建图日志读写 - 无外部依赖版本
+单遍流式解析 simple_map_data.txt 格式的建图日志，按块返回列式数组，
+障碍物推断对每条记录只算一次三角函数；可选体素降采样和轨迹抽稀去掉近重复点，
+供定位、合并和检查工具共用
+"""
+
+from array import array
+from itertools import chain
+import math
+
+DATA_HEADER = "步数,时间,X,Y,角度,前方,左侧,右侧,后方,最小距离"
+COLUMNS = ('step', 'time', 'x', 'y', 'angle', 'front', 'left', 'right', 'back', 'min_distance')
+
+
+class MapLog:
+    """列式建图记录: 每列一个 array('d')，列名见 COLUMNS"""
+
+    def __init__(self):
+        for name in COLUMNS:
+            setattr(self, name, array('d'))
+
+    def __len__(self):
+        return len(self.x)
+
+    def extend(self, other):
+        for name in COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+
+    def distances(self):
+        """按记录迭代 (前, 左, 右, 后)"""
+        return zip(self.front, self.left, self.right, self.back)
+
+
+def _parse_rows(rows):
+    """文本行（已切分为10个字段）批量转换为列式记录
+
+    整块字段一次性 map(float) 后按步长切片成列；块内有坏行时退回逐行解析并跳过坏行。
+    """
+    chunk = MapLog()
+    try:
+        values = list(map(float, chain.from_iterable(rows)))
+    except ValueError:
+        values = []
+        for parts in rows:
+            try:
+                values.extend([float(value) for value in parts])
+            except ValueError:
+                continue
+    width = len(COLUMNS)
+    for offset, name in enumerate(COLUMNS):
+        getattr(chunk, name).extend(values[offset::width])
+    return chunk
+
+
+def iter_log_chunks(path, chunk_rows=4096):
+    """流式读取建图日志，每次产出最多 chunk_rows 条记录的 MapLog；大日志不必整体载入内存"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if DATA_HEADER in line:
+                break
+        rows = []
+        for line in f:
+            if line.startswith("==="):
+                break  # 统计信息段
+            parts = line.split(',')
+            if len(parts) >= 10:
+                rows.append(parts[:10])
+                if len(rows) >= chunk_rows:
+                    yield _parse_rows(rows)
+                    rows = []
+        if rows:
+            yield _parse_rows(rows)
+
+
+def load_log(path, chunk_rows=4096):
+    """读取整个建图日志为一个 MapLog"""
+    log = MapLog()
+    for chunk in iter_log_chunks(path, chunk_rows):
+        log.extend(chunk)
+    return log
+
+
+def is_mapping_log(path):
+    """只接受包含扫描数据表头的文件（排除可视化等其他文本）"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for _ in range(20):
+            if DATA_HEADER in f.readline():
+                return True
+    return False
+
+
+def beam_directions(angle):
+    """四个记录方向（前、左、右、后）的单位向量，每条记录只算一次 cos/sin"""
+    c = math.cos(angle)
+    s = math.sin(angle)
+    return ((c, s), (-s, c), (s, -c), (-c, -s))
+
+
+def infer_obstacles(log, max_distance=1.0):
+    """由四方向距离推断障碍物位置（世界坐标），只保留 max_distance 以内的读数
+
+    四个方向由同一组 cos/sin 旋转得到（展开 beam_directions 以省去元组分配）。
+    """
+    obstacles = []
+    append = obstacles.append
+    for x, y, angle, front, left, right, back, min_distance in zip(
+            log.x, log.y, log.angle, log.front, log.left, log.right, log.back, log.min_distance):
+        if not min_distance < max_distance:
+            continue
+        c = math.cos(angle)
+        s = math.sin(angle)
+        if front < max_distance:
+            append((x + front * c, y + front * s))
+        if left < max_distance:
+            append((x - left * s, y + left * c))
+        if right < max_distance:
+            append((x + right * s, y - right * c))
+        if back < max_distance:
+            append((x - back * c, y - back * s))
+    return obstacles
+
+
+class VoxelGrid:
+    """二维体素聚合: 每格累计坐标和与命中次数，输出每格一个质心"""
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = {}  # (ix, iy) -> [sum_x, sum_y, 命中次数]
+
+    def add(self, points):
+        size = self.size
+        cells = self.cells
+        for x, y in points:
+            key = (math.floor(x / size), math.floor(y / size))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [x, y, 1]
+            else:
+                cell[0] += x
+                cell[1] += y
+                cell[2] += 1
+
+    def points(self):
+        """(质心列表, 命中次数列表)，按体素坐标排序"""
+        centroids = []
+        counts = []
+        for _, (sum_x, sum_y, count) in sorted(self.cells.items()):
+            centroids.append((sum_x / count, sum_y / count))
+            counts.append(count)
+        return centroids, counts
+
+
+def voxel_downsample(points, size):
+    """体素降采样: 返回 (每格质心, 每格命中次数)"""
+    grid = VoxelGrid(size)
+    grid.add(points)
+    return grid.points()
+
+
+def decimate_path(points, min_spacing, last=None):
+    """轨迹抽稀: 只保留与上一个保留点相距至少 min_spacing 的位姿（last 为跨块延续的上一个保留点）"""
+    kept = []
+    limit = min_spacing * min_spacing
+    for x, y in points:
+        if last is None or (x - last[0]) ** 2 + (y - last[1]) ** 2 >= limit:
+            kept.append((x, y))
+            last = (x, y)
+    return kept
+
+
+def load_map_points(path, max_distance=1.0, chunk_rows=4096, voxel_size=None, path_spacing=None):
+    """读取建图日志，返回 {'obstacles', 'free_space', 'records'}（逐块推断，内存只保留点集）
+
+    voxel_size: 障碍物按该尺寸体素降采样为质心，并返回每格命中次数 'obstacle_hits'；
+    path_spacing: 自由空间（机器人经过的位置）按该间距抽稀。两者都在逐块读取时进行。
+    """
+    map_points = {'obstacles': [], 'free_space': [], 'records': 0}
+    voxels = VoxelGrid(voxel_size) if voxel_size else None
+    for chunk in iter_log_chunks(path, chunk_rows):
+        obstacles = infer_obstacles(chunk, max_distance)
+        if voxels:
+            voxels.add(obstacles)
+        else:
+            map_points['obstacles'].extend(obstacles)
+        # 机器人经过的位置是自由空间
+        free_space = zip(chunk.x, chunk.y)
+        if path_spacing:
+            last = map_points['free_space'][-1] if map_points['free_space'] else None
+            free_space = decimate_path(free_space, path_spacing, last)
+        map_points['free_space'].extend(free_space)
+        map_points['records'] += len(chunk)
+    if voxels:
+        map_points['obstacles'], map_points['obstacle_hits'] = voxels.points()
+    return map_points
+
+
+def count_records(path):
+    """建图日志中有效记录的条数"""
+    return sum(len(chunk) for chunk in iter_log_chunks(path))
@@ -0,0 +1,237 @@
+"""
+内存统计与预算 - 无外部依赖版本
+控制器登记各子系统的长期数据（scan_data、localization_results、map_data 等），每隔若干步
+估算它们的内存占用并与软预算比较: 超出时打印警告，可转存的记录列表（SpillList）则把
+内存中的记录追加写到磁盘。设置 WEBOTS_MEMORY_TRACE 环境变量后同时启用 tracemalloc，
+报告中附带分配量最大的代码行及其自上次报告以来的增长。
+"""
+
+import os
+import pickle
+import sys
+import tracemalloc
+from bisect import bisect_right
+from collections import deque
+from itertools import islice
+
+ENV_TRACE = "WEBOTS_MEMORY_TRACE"      # 设置后启用 tracemalloc（值为报告间隔步数，"1" 表示使用默认间隔）
+ENV_BUDGETS = "WEBOTS_MEMORY_BUDGETS"  # 覆盖软预算，例如 "scan_data=64,localization_results=16"（MB）
+
+MB = 1024 * 1024
+
+
+class SpillList:
+    """只追加的记录列表；spill() 把内存中的记录 pickle 追加到磁盘，迭代时先读回已转存的部分
+
+    每次转存写出一个块并记下块的首条序号和文件偏移，下标访问只读回所在的一个块。
+    本列表第一次转存时覆盖 filename，上一次运行保存失败留下的同名文件不会混入本次记录。
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.memory = []
+        self.spilled = 0
+        self.chunk_starts = []   # 每个转存块首条记录的序号
+        self.chunk_offsets = []  # 每个转存块在文件中的字节偏移
+
+    def append(self, item):
+        self.memory.append(item)
+
+    def __len__(self):
+        return self.spilled + len(self.memory)
+
+    def __iter__(self):
+        if self.spilled:
+            with open(self.filename, 'rb') as f:
+                while True:
+                    try:
+                        chunk = pickle.load(f)
+                    except EOFError:
+                        break
+                    yield from chunk
+        yield from self.memory
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step < 0:
+                return list(self)[index]
+            return list(islice(self, start, stop, step))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SpillList 下标越界")
+        if index >= self.spilled:
+            return self.memory[index - self.spilled]
+        chunk = bisect_right(self.chunk_starts, index) - 1
+        with open(self.filename, 'rb') as f:
+            f.seek(self.chunk_offsets[chunk])
+            return pickle.load(f)[index - self.chunk_starts[chunk]]
+
+    def spill(self):
+        """把内存中的记录追加写到磁盘，返回转存的条数"""
+        count = len(self.memory)
+        if count:
+            with open(self.filename, 'ab' if self.spilled else 'wb') as f:
+                self.chunk_offsets.append(f.tell())
+                pickle.dump(self.memory, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.chunk_starts.append(self.spilled)
+            self.spilled += count
+            self.memory = []
+        return count
+
+    def close(self):
+        """删除转存文件（在结果写出之后调用）"""
+        if self.spilled and os.path.exists(self.filename):
+            os.remove(self.filename)
+        self.spilled = 0
+        self.chunk_starts = []
+        self.chunk_offsets = []
+
+
+def estimate_size(obj, sample=32, depth=8):
+    """对象及其内容的近似内存占用（字节）
+
+    大容器只测均匀抽取的 sample 个元素再按数量外推，嵌套层级的抽样数逐级减少，代价与容器
+    大小无关。字符串字典键视为共享的字段名不计入；普通对象按其 __dict__ 统计，
+    超过 depth 层的内容不再展开（同时防止循环引用）。
+    """
+    if isinstance(obj, SpillList):
+        obj = obj.memory
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        count = len(obj)
+        items = obj.items()
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        count = len(obj)
+        items = obj
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        return size + estimate_size(vars(obj), sample, depth - 1)
+    else:
+        return size
+    if not count:
+        return size
+
+    child = max(2, sample // 4)
+    if count <= sample:
+        picked = items
+    elif isinstance(obj, (list, tuple)):
+        picked = [obj[i * count // sample] for i in range(sample)]
+    else:
+        picked = islice(items, 0, None, count // sample)
+    measured = 0
+    total = 0
+    for item in picked:
+        if isinstance(obj, dict):
+            key, value = item
+            total += estimate_size(value, child, depth - 1)
+            if not isinstance(key, str):
+                total += estimate_size(key, child, depth - 1)
+        else:
+            total += estimate_size(item, child, depth - 1)
+        measured += 1
+        if measured == sample:
+            break
+    return size + total * count // measured
+
+
+class MemoryMonitor:
+    """按步数间隔统计登记的子系统内存，检查软预算，可选 tracemalloc 热点报告"""
+
+    def __init__(self, interval=1000, top=5, trace=False, frames=1):
+        self.interval = interval
+        self.top = top
+        self.trace = trace
+        self.entries = {}
+        self.reports = 0
+        self._snapshot = None
+        self._started_trace = False
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._started_trace = True
+
+    @classmethod
+    def from_environment(cls, interval=1000, **kwargs):
+        value = os.environ.get(ENV_TRACE)
+        trace = bool(value)
+        if value and value.isdigit() and int(value) > 1:
+            interval = int(value)
+        return cls(interval, trace=trace, **kwargs)
+
+    def track(self, name, getter, budget_mb=None, spill=False):
+        """登记子系统: getter 返回当前对象；spill=True 时超出预算调用其 spill()"""
+        budgets = os.environ.get(ENV_BUDGETS, "")
+        for item in budgets.split(','):
+            key, _, value = item.partition('=')
+            if key.strip() == name and value:
+                budget_mb = float(value)
+        self.entries[name] = {'getter': getter, 'budget': budget_mb * MB if budget_mb else None,
+                              'spill': spill, 'size': 0, 'peak': 0, 'warned': False, 'spilled': 0}
+
+    def check(self, step):
+        """每 interval 步统计一次，返回要打印的报告行（其他步返回空列表）"""
+        if self.interval <= 0 or step % self.interval:
+            return []
+        self.reports += 1
+        parts = []
+        alerts = []
+        for name, entry in self.entries.items():
+            obj = entry['getter']()
+            size = estimate_size(obj)
+            growth = size - entry['size']
+            entry['size'] = size
+            entry['peak'] = max(entry['peak'], size)
+            budget = entry['budget']
+            parts.append(f"{name} {size / MB:.1f}MB({growth / MB:+.1f})"
+                         + (f"/{budget / MB:g}MB" if budget else ""))
+            if budget is None or size <= budget:
+                entry['warned'] = False
+            elif entry['spill'] and hasattr(obj, 'spill'):
+                count = obj.spill()
+                entry['spilled'] += count
+                alerts.append(f"  {name} 超出预算，已转存 {count} 条到 {obj.filename}")
+            elif not entry['warned']:
+                entry['warned'] = True
+                alerts.append(f"  警告: {name} 占用 {size / MB:.1f}MB，超出预算 {budget / MB:g}MB")
+
+        lines = [f"内存[{step}步]: " + ", ".join(parts)]
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            lines[0] += f" | tracemalloc 当前 {current / MB:.1f}MB, 峰值 {peak / MB:.1f}MB"
+            lines.extend(self.top_allocations())
+        return lines + alerts
+
+    def top_allocations(self):
+        """分配量最大的代码行及其自上次报告以来的增长"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        if self._snapshot is None:
+            stats = snapshot.statistics('lineno')
+        else:
+            stats = sorted(snapshot.compare_to(self._snapshot, 'lineno'), key=lambda s: s.size, reverse=True)
+        self._snapshot = snapshot
+        lines = []
+        for stat in stats[:self.top]:
+            frame = stat.traceback[0]
+            growth = getattr(stat, 'size_diff', stat.size)
+            lines.append(f"  {stat.size / MB:7.2f}MB ({growth / MB:+.2f}) "
+                         f"{os.path.basename(frame.filename)}:{frame.lineno}")
+        return lines
+
+    def summary(self):
+        """各子系统的峰值占用（含当前占用）和累计转存条数"""
+        for entry in self.entries.values():
+            entry['peak'] = max(entry['peak'], estimate_size(entry['getter']()))
+        return {name: {'peak_mb': entry['peak'] / MB, 'spilled': entry['spilled']}
+                for name, entry in self.entries.items()}
+
+    def close(self):
+        if self._started_trace:
+            tracemalloc.stop()
+            self._started_trace = False
+        self._snapshot = None
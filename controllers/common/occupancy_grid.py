@@ -0,0 +1,166 @@
+"""
+占用栅格地图 - 无外部依赖版本
+基于对数几率(log-odds)的增量栅格更新，供各控制器共享使用
+"""
+
+import math
+from array import array
+
+
+def lidar_beam_angle(index, count):
+    """激光束相对机器人朝向的角度（与控制器一致: 0=后方, n/4=左侧, n/2=前方, 3n/4=右侧）"""
+    return math.pi - 2 * math.pi * index / count
+
+
+class OccupancyGrid:
+    """占用栅格地图 - 每个单元保存对数几率和离散状态"""
+
+    UNKNOWN = 0
+    FREE = 1
+    OCCUPIED = 2
+
+    def __init__(self, resolution=0.05, width_m=6.4, height_m=6.4, origin=(-3.2, -3.2)):
+        self.resolution = resolution
+        self.width = int(math.ceil(width_m / resolution))
+        self.height = int(math.ceil(height_m / resolution))
+        self.origin_x, self.origin_y = origin
+
+        # 对数几率参数
+        self.log_odds_hit = 0.85
+        self.log_odds_miss = -0.4
+        self.log_odds_min = -3.5
+        self.log_odds_max = 3.5
+        self.occupied_threshold = 0.6
+        self.free_threshold = -0.2
+
+        cell_count = self.width * self.height
+        self.log_odds = array('f', bytes(4 * cell_count))
+        self.state = bytearray(cell_count)  # UNKNOWN / FREE / OCCUPIED
+        self.known_cells = 0
+        self.occupied_cells = 0
+
+    def world_to_cell(self, x, y):
+        """世界坐标转换为栅格坐标，超出地图返回None"""
+        gx = int(math.floor((x - self.origin_x) / self.resolution))
+        gy = int(math.floor((y - self.origin_y) / self.resolution))
+        if 0 <= gx < self.width and 0 <= gy < self.height:
+            return gx, gy
+        return None
+
+    def cell_to_world(self, gx, gy):
+        """栅格坐标转换为单元中心的世界坐标"""
+        return (self.origin_x + (gx + 0.5) * self.resolution,
+                self.origin_y + (gy + 0.5) * self.resolution)
+
+    def index_to_world(self, index):
+        """线性索引转换为单元中心的世界坐标"""
+        return self.cell_to_world(index % self.width, index // self.width)
+
+    def known_area(self):
+        """已观测面积（平方米）"""
+        return self.known_cells * self.resolution * self.resolution
+
+    def neighbors4(self, index):
+        """四邻域线性索引（自动处理边界）"""
+        gx = index % self.width
+        result = []
+        if gx > 0:
+            result.append(index - 1)
+        if gx < self.width - 1:
+            result.append(index + 1)
+        if index >= self.width:
+            result.append(index - self.width)
+        if index < (self.height - 1) * self.width:
+            result.append(index + self.width)
+        return result
+
+    def _apply(self, index, delta, changed):
+        """更新单个单元的对数几率，状态变化时记录到changed"""
+        value = self.log_odds[index] + delta
+        if value > self.log_odds_max:
+            value = self.log_odds_max
+        elif value < self.log_odds_min:
+            value = self.log_odds_min
+        self.log_odds[index] = value
+
+        if value >= self.occupied_threshold:
+            new_state = self.OCCUPIED
+        elif value <= self.free_threshold:
+            new_state = self.FREE
+        else:
+            new_state = self.UNKNOWN
+
+        old_state = self.state[index]
+        if new_state != old_state:
+            self.state[index] = new_state
+            if old_state == self.UNKNOWN:
+                self.known_cells += 1
+            elif new_state == self.UNKNOWN:
+                self.known_cells -= 1
+            if old_state == self.OCCUPIED:
+                self.occupied_cells -= 1
+            elif new_state == self.OCCUPIED:
+                self.occupied_cells += 1
+            changed.append(index)
+
+    def update_scan(self, x, y, theta, ranges, max_range=3.5, beam_stride=1):
+        """用一帧完整激光扫描更新地图，返回状态发生变化的单元索引列表"""
+        changed = []
+        count = len(ranges)
+        start = self.world_to_cell(x, y)
+        if count == 0 or start is None:
+            return changed
+
+        x0, y0 = start
+        width = self.width
+        height = self.height
+        resolution = self.resolution
+        miss = self.log_odds_miss
+        log_odds = self.log_odds
+        min_value = self.log_odds_min
+        max_value = self.log_odds_max
+
+        for i in range(0, count, beam_stride):
+            distance = ranges[i]
+            if not distance > 0:  # 过滤0和NaN
+                continue
+            hit = distance < max_range
+            if not hit:
+                distance = max_range
+
+            angle = theta + lidar_beam_angle(i, count)
+            end_x = x + distance * math.cos(angle)
+            end_y = y + distance * math.sin(angle)
+            x1 = int(math.floor((end_x - self.origin_x) / resolution))
+            y1 = int(math.floor((end_y - self.origin_y) / resolution))
+
+            # Bresenham直线：沿途单元为空闲，终点单元为障碍物
+            dx = abs(x1 - x0)
+            dy = -abs(y1 - y0)
+            sx = 1 if x0 < x1 else -1
+            sy = 1 if y0 < y1 else -1
+            err = dx + dy
+            cx, cy = x0, y0
+            while True:
+                if not (0 <= cx < width and 0 <= cy < height):
+                    break
+                index = cy * width + cx
+                if cx == x1 and cy == y1:
+                    if hit:
+                        if log_odds[index] < max_value:
+                            self._apply(index, self.log_odds_hit, changed)
+                    elif log_odds[index] > min_value:
+                        self._apply(index, miss, changed)
+                    break
+                # 已饱和的自由单元再减也不变（机器人附近每束光线都会经过），跳过
+                if log_odds[index] > min_value:
+                    self._apply(index, miss, changed)
+                e2 = 2 * err
+                if e2 >= dy:
+                    err += dy
+                    cx += sx
+                if e2 <= dx:
+                    err += dx
+                    cy += sy
+
+        return changed
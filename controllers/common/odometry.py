@@ -0,0 +1,40 @@
+"""
+差分驱动轮式里程计 - 无外部依赖版本
+由轮子编码器角度（或指令轮速）计算机器人坐标系下的相对运动
+"""
+
+import math
+
+
+class WheelOdometry:
+    def __init__(self, wheel_radius=0.033, wheel_base=0.16):
+        self.wheel_radius = wheel_radius  # 轮子半径（米）
+        self.wheel_base = wheel_base      # 轮距（米）
+        self.last_left = None
+        self.last_right = None
+
+    def motion_from_wheels(self, left_delta, right_delta):
+        """左右轮转角增量（弧度）转换为相对运动 (dx, dy, dtheta)"""
+        left = left_delta * self.wheel_radius
+        right = right_delta * self.wheel_radius
+        distance = (left + right) / 2
+        dtheta = (right - left) / self.wheel_base
+        # 中点近似: 沿半个转角方向前进
+        return (distance * math.cos(dtheta / 2),
+                distance * math.sin(dtheta / 2),
+                dtheta)
+
+    def update(self, left_position, right_position):
+        """输入编码器累计角度，返回自上次调用以来的相对运动"""
+        if self.last_left is None or math.isnan(left_position) or math.isnan(right_position):
+            if not (math.isnan(left_position) or math.isnan(right_position)):
+                self.last_left, self.last_right = left_position, right_position
+            return 0.0, 0.0, 0.0
+        motion = self.motion_from_wheels(left_position - self.last_left,
+                                         right_position - self.last_right)
+        self.last_left, self.last_right = left_position, right_position
+        return motion
+
+    def from_velocities(self, left_speed, right_speed, dt):
+        """没有编码器时用指令轮速（弧度/秒）积分"""
+        return self.motion_from_wheels(left_speed * dt, right_speed * dt)
@@ -0,0 +1,194 @@
+"""
+在线统计 - 无外部依赖版本
+单遍、常数内存的统计累积器: Welford 均值/方差、包围范围、P² 分位数估计、
+可自动扩展范围的直方图和按步长抽稀的时间序列，供分析大日志的工具共用
+"""
+
+import math
+from bisect import bisect_right, insort
+
+
+class RunningStats:
+    """Welford 在线均值/方差，同时记录计数、总和、最小值和最大值"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def variance(self):
+        """样本方差（少于两个样本时为0）"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class Extent:
+    """二维点集的包围范围"""
+
+    def __init__(self):
+        self.min_x = self.min_y = math.inf
+        self.max_x = self.max_y = -math.inf
+
+    def add(self, x, y):
+        if x < self.min_x:
+            self.min_x = x
+        if x > self.max_x:
+            self.max_x = x
+        if y < self.min_y:
+            self.min_y = y
+        if y > self.max_y:
+            self.max_y = y
+
+    def union(self, other):
+        """两个范围的并集（新对象）"""
+        merged = Extent()
+        merged.min_x = min(self.min_x, other.min_x)
+        merged.max_x = max(self.max_x, other.max_x)
+        merged.min_y = min(self.min_y, other.min_y)
+        merged.max_y = max(self.max_y, other.max_y)
+        return merged
+
+
+class P2Quantile:
+    """P² 算法（Jain & Chlamtac 1985）: 只保存5个标记点的流式分位数估计"""
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        # 第 count 个样本后标记点的理想位置为 1 + (count-1)×增量，直接由计数算出
+        self._increments = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def add(self, value):
+        self.count += 1
+        q = self._heights
+        if self.count <= 5:
+            insort(q, value)
+            return
+        n = self._positions
+        if value < q[0]:
+            q[0] = value
+            start = 1
+        elif value >= q[4]:
+            q[4] = value
+            start = 4
+        else:
+            start = bisect_right(q, value, 1, 4)
+        for i in range(start, 5):
+            n[i] += 1
+
+        # 调整中间三个标记点的高度（抛物线插值，越界时退回线性插值）
+        scale = self.count - 1
+        increments = self._increments
+        for i in (1, 2, 3):
+            d = 1 + scale * increments[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    @property
+    def value(self):
+        """当前分位数估计；不足5个样本时按已排序样本线性插值"""
+        if self.count == 0:
+            return math.nan
+        if self.count <= 5:
+            rank = self.p * (self.count - 1)
+            lower = int(rank)
+            upper = min(lower + 1, self.count - 1)
+            return self._heights[lower] + (rank - lower) * (self._heights[upper] - self._heights[lower])
+        return self._heights[2]
+
+
+class StreamingHistogram:
+    """非负值的在线直方图
+
+    内部保持 resolution 个等宽细分桶覆盖 [0, 宽度×resolution)；新值超出范围时相邻桶两两合并、
+    宽度加倍，因此不必预先知道最大值。输出时再按实际最大值重新分成少量粗桶。
+    """
+
+    def __init__(self, resolution=4096):
+        self.resolution = resolution
+        self.counts = [0] * resolution
+        self.width = 0.0
+        self.count = 0
+
+    def add(self, value):
+        value = max(value, 0.0)
+        if self.width == 0.0:
+            if value == 0.0:
+                self.counts[0] += 1
+                self.count += 1
+                return
+            self.width = 2.0 * value / self.resolution  # 第一个正值落在范围中部
+        while value >= self.width * self.resolution:
+            self._merge()
+        self.counts[int(value / self.width)] += 1
+        self.count += 1
+
+    def _merge(self):
+        counts = self.counts
+        half = self.resolution // 2
+        self.counts = [counts[2 * i] + counts[2 * i + 1] for i in range(half)] + [0] * half
+        self.width *= 2.0
+
+    def bins(self, count, upper):
+        """重新分成 [0, upper] 上的 count 个等宽桶（按细分桶中心归属），返回计数列表"""
+        histogram = [0] * count
+        if upper <= 0 or self.width == 0.0:
+            histogram[0] = self.count
+            return histogram
+        bin_size = upper / count
+        for index, fine in enumerate(self.counts):
+            if fine:
+                center = (index + 0.5) * self.width
+                histogram[min(int(center / bin_size), count - 1)] += fine
+        return histogram
+
+
+class DecimatedSeries:
+    """按步长抽稀的序列: 保留第 0、stride、2×stride… 个样本，存满 capacity 时隔一丢一并把步长加倍"""
+
+    def __init__(self, capacity=1024, stride=1):
+        self.capacity = capacity
+        self.stride = stride
+        self.items = []
+        self.seen = 0
+
+    def add(self, item):
+        if self.seen % self.stride == 0:
+            self.items.append(item)
+            if len(self.items) >= self.capacity:
+                self.items = self.items[::2]
+                self.stride *= 2
+        self.seen += 1
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,43 @@
+"""
+粒子快照日志 - 无外部依赖版本
+定位控制器每隔若干步记录一次完整粒子集，以紧凑二进制格式保存，供离线渲染粒子云动画:
+每个快照 = 头部(步数 u32, 仿真时间 f32, 粒子数 u16) + 粒子数×(x, y, theta) float32
+"""
+
+import struct
+from array import array
+
+SNAPSHOT_FILE = "particle_snapshots.bin"
+_HEADER = struct.Struct('<IfH')
+
+
+def snapshot(particles):
+    """粒子集 -> 扁平 array('f') [x0, y0, theta0, x1, ...]"""
+    flat = array('f')
+    for p in particles:
+        flat.extend((p.x, p.y, p.theta))
+    return flat
+
+
+def write_snapshots(filename, snapshots):
+    """snapshots: [(步数, 时间, 扁平粒子数组), ...]"""
+    with open(filename, 'wb') as f:
+        for step, stamp, flat in snapshots:
+            f.write(_HEADER.pack(step, stamp, len(flat) // 3))
+            f.write(flat.tobytes())
+
+
+def iter_snapshots(filename):
+    """逐个读出 (步数, 时间, 扁平粒子数组)，不整体载入文件"""
+    with open(filename, 'rb') as f:
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            step, stamp, count = _HEADER.unpack(header)
+            flat = array('f')
+            data = f.read(count * 3 * flat.itemsize)
+            if len(data) < count * 3 * flat.itemsize:
+                return  # 控制器中途退出留下的不完整快照
+            flat.frombytes(data)
+            yield step, stamp, flat
@@ -0,0 +1,282 @@
+"""
+栅格路径规划 - 无外部依赖版本
+A* 用于一次性查询，D* Lite 用于地图变化时的增量重规划（只修复受影响的搜索区域）
+"""
+
+import heapq
+import math
+
+INF = float('inf')
+SQRT2 = math.sqrt(2.0)
+
+
+def octile_distance(grid, a, b):
+    """八邻域下的可采纳启发式（单位: 栅格）"""
+    dx = abs(a % grid.width - b % grid.width)
+    dy = abs(a // grid.width - b // grid.width)
+    return max(dx, dy) + (SQRT2 - 1.0) * min(dx, dy)
+
+
+def neighbors8(grid, index):
+    """八邻域 (索引, 步长) 列表（自动处理边界）"""
+    width = grid.width
+    gx = index % width
+    gy = index // width
+    result = []
+    for dy in (-1, 0, 1):
+        ny = gy + dy
+        if ny < 0 or ny >= grid.height:
+            continue
+        for dx in (-1, 0, 1):
+            nx = gx + dx
+            if (dx == 0 and dy == 0) or nx < 0 or nx >= width:
+                continue
+            result.append((ny * width + nx, SQRT2 if dx and dy else 1.0))
+    return result
+
+
+class GridCost:
+    """单元通行代价: 障碍物不可通行，未知区域可选乐观/不可通行"""
+
+    def __init__(self, grid, allow_unknown=True):
+        self.grid = grid
+        self.allow_unknown = allow_unknown
+
+    def __call__(self, index):
+        state = self.grid.state[index]
+        if state == self.grid.OCCUPIED:
+            return INF
+        if state == self.grid.UNKNOWN and not self.allow_unknown:
+            return INF
+        return 1.0
+
+
+def edge_cost(cell_cost, u, v, step):
+    """无向边代价: 步长乘两端单元代价均值（任一端不可通行则为无穷）"""
+    cost_u = cell_cost(u)
+    cost_v = cell_cost(v)
+    if cost_u == INF or cost_v == INF:
+        return INF
+    return step * (cost_u + cost_v) / 2.0
+
+
+def astar(grid, start, goal, cell_cost=None):
+    """A* 一次性规划，返回从start到goal的单元索引列表；不可达返回None"""
+    cell_cost = cell_cost or GridCost(grid)
+    if cell_cost(start) == INF or cell_cost(goal) == INF:
+        return None
+
+    g = {start: 0.0}
+    parent = {start: None}
+    open_heap = [(octile_distance(grid, start, goal), 0.0, start)]
+    closed = set()
+    while open_heap:
+        _, cost, current = heapq.heappop(open_heap)
+        if current in closed:
+            continue
+        if current == goal:
+            path = []
+            while current is not None:
+                path.append(current)
+                current = parent[current]
+            path.reverse()
+            return path
+        closed.add(current)
+        for neighbor, step in neighbors8(grid, current):
+            if neighbor in closed:
+                continue
+            new_cost = cost + edge_cost(cell_cost, current, neighbor, step)
+            if new_cost < g.get(neighbor, INF):
+                g[neighbor] = new_cost
+                parent[neighbor] = current
+                heapq.heappush(open_heap,
+                               (new_cost + octile_distance(grid, neighbor, goal), new_cost, neighbor))
+    return None
+
+
+class DStarLite:
+    """D* Lite 增量规划器（Koenig & Likhachev 优化版本）
+
+    从目标向起点反向搜索；机器人移动时只累加 km，地图单元变化时只重新展开受影响的顶点。
+    """
+
+    def __init__(self, grid, cell_cost=None):
+        self.grid = grid
+        self.cell_cost = cell_cost or GridCost(grid)
+        self.start = None
+        self.goal = None
+        self.last_start = None
+        self.km = 0.0
+        self.g = {}
+        self.rhs = {}
+        self.open_heap = []
+        self.open_keys = {}  # 顶点 -> 当前有效键（堆中的旧条目延迟删除）
+        self.costs = {}      # 搜索已使用过的单元代价，用于判断地图变化是否影响搜索
+        self.expansions = 0  # 累计展开次数，用于观察增量修复的开销
+
+    def plan(self, start, goal):
+        """设置新目标并从头规划，返回路径（不可达返回None）"""
+        self.start = start
+        self.last_start = start
+        self.goal = goal
+        self.km = 0.0
+        self.g = {}
+        self.rhs = {goal: 0.0}
+        self.open_heap = []
+        self.open_keys = {}
+        self.costs = {}
+        self._push(goal)
+        return self.path()
+
+    def _cost(self, index):
+        cost = self.costs.get(index)
+        if cost is None:
+            cost = self.costs[index] = self.cell_cost(index)
+        return cost
+
+    def _heuristic(self, a, b):
+        return octile_distance(self.grid, a, b)
+
+    def _key(self, s):
+        k2 = min(self.g.get(s, INF), self.rhs.get(s, INF))
+        return (k2 + self._heuristic(self.start, s) + self.km, k2)
+
+    def _push(self, s):
+        key = self._key(s)
+        self.open_keys[s] = key
+        heapq.heappush(self.open_heap, (key, s))
+
+    def _top(self):
+        """弹掉堆顶的过期条目，返回 (键, 顶点)；空堆返回 (INF键, None)"""
+        heap = self.open_heap
+        while heap:
+            key, s = heap[0]
+            if self.open_keys.get(s) == key:
+                return key, s
+            heapq.heappop(heap)
+        return (INF, INF), None
+
+    def _update_vertex(self, u):
+        g_u = self.g.get(u, INF)
+        rhs_u = self.rhs.get(u, INF)
+        in_open = u in self.open_keys
+        if g_u != rhs_u:
+            self._push(u)
+        elif in_open:
+            del self.open_keys[u]
+
+    def _best_rhs(self, u):
+        """rhs(u) = min(c(u,s') + g(s'))"""
+        best = INF
+        g = self.g
+        for neighbor, step in neighbors8(self.grid, u):
+            g_n = g.get(neighbor, INF)
+            if g_n == INF:
+                continue
+            cost = edge_cost(self._cost, u, neighbor, step) + g_n
+            if cost < best:
+                best = cost
+        return best
+
+    def compute_shortest_path(self, until=None):
+        """展开不一致顶点直到起点一致；给定 until 时继续展开直到该顶点也一致"""
+        g = self.g
+        rhs = self.rhs
+        while True:
+            top_key, u = self._top()
+            start_key = self._key(self.start)
+            if u is None or (top_key >= start_key and rhs.get(self.start, INF) == g.get(self.start, INF)
+                             and until not in self.open_keys):
+                break
+            self.expansions += 1
+            new_key = self._key(u)
+            g_u = g.get(u, INF)
+            rhs_u = rhs.get(u, INF)
+            if top_key < new_key:
+                self._push(u)
+            elif g_u > rhs_u:
+                g[u] = rhs_u
+                del self.open_keys[u]
+                heapq.heappop(self.open_heap)
+                for neighbor, step in neighbors8(self.grid, u):
+                    if neighbor != self.goal:
+                        cost = edge_cost(self._cost, neighbor, u, step) + rhs_u
+                        if cost < rhs.get(neighbor, INF):
+                            rhs[neighbor] = cost
+                    self._update_vertex(neighbor)
+            else:
+                g[u] = INF
+                for s in [u] + [neighbor for neighbor, _ in neighbors8(self.grid, u)]:
+                    if s != self.goal:
+                        rhs[s] = self._best_rhs(s)
+                    self._update_vertex(s)
+
+    def move_start(self, start):
+        """机器人移动后更新起点（只累加km，不重建队列）"""
+        if self.start is None or start == self.start:
+            return
+        self.km += self._heuristic(self.last_start, start)
+        self.last_start = start
+        self.start = start
+
+    def update_cells(self, changed):
+        """地图单元状态变化后修复受影响顶点；下一次取路径时增量重规划"""
+        if self.goal is None:
+            return
+        affected = set()
+        for index in changed:
+            # 搜索从未用到的单元或代价未变（如未知->自由）不影响当前解
+            old_cost = self.costs.get(index)
+            if old_cost is None:
+                continue
+            new_cost = self.cell_cost(index)
+            if new_cost == old_cost:
+                continue
+            self.costs[index] = new_cost
+            affected.add(index)
+            for neighbor, _ in neighbors8(self.grid, index):
+                affected.add(neighbor)
+        for u in affected:
+            if u != self.goal:
+                self.rhs[u] = self._best_rhs(u)
+            self._update_vertex(u)
+
+    def path(self, max_length=None):
+        """增量重规划后沿 g 值下降方向提取路径；不可达返回None
+
+        起点一致时队列中仍可能留有键与起点相同（浮点舍入）的过期顶点，沿 g 值下降可能走进
+        这些顶点而绕远甚至兜圈。路径上每个顶点都必须一致（不在队列中）: 遇到不一致的顶点时
+        继续修复到它一致后重新提取，这样路径代价恰好等于 g(起点)。
+        """
+        if self.goal is None or self.start is None:
+            return None
+        self.compute_shortest_path()
+        max_length = max_length or self.grid.width * self.grid.height
+        while self.g.get(self.start, INF) != INF:
+            path = [self.start]
+            current = self.start
+            while current != self.goal and current not in self.open_keys and len(path) < max_length:
+                best, best_cost = None, INF
+                for neighbor, step in neighbors8(self.grid, current):
+                    cost = edge_cost(self._cost, current, neighbor, step) + self.g.get(neighbor, INF)
+                    if cost < best_cost:
+                        best, best_cost = neighbor, cost
+                if best is None:
+                    return None
+                path.append(best)
+                current = best
+            if current not in self.open_keys:
+                return path if current == self.goal else None
+            self.compute_shortest_path(until=current)
+        return None
+
+
+def lookahead_point(grid, path, x, y, distance=0.3):
+    """从路径上离机器人最近的单元起，取距机器人约 distance 米的跟踪点（世界坐标）"""
+    points = [grid.index_to_world(index) for index in path]
+    nearest = min(range(len(points)),
+                  key=lambda k: (points[k][0] - x) ** 2 + (points[k][1] - y) ** 2)
+    for wx, wy in points[nearest:]:
+        if math.hypot(wx - x, wy - y) >= distance:
+            return wx, wy
+    return points[-1]
@@ -0,0 +1,352 @@
+"""
+二维位姿图优化 - 无外部依赖版本
+关键帧节点 + 相对约束（里程计/扫描匹配/回环），增量稀疏高斯-牛顿优化
+"""
+
+import math
+
+
+def normalize_angle(angle):
+    """角度归一化到 [-π, π]"""
+    return math.atan2(math.sin(angle), math.cos(angle))
+
+
+def compose(a, b):
+    """位姿复合 a ⊕ b（b在a坐标系下表示）"""
+    c, s = math.cos(a[2]), math.sin(a[2])
+    return (a[0] + c * b[0] - s * b[1],
+            a[1] + s * b[0] + c * b[1],
+            normalize_angle(a[2] + b[2]))
+
+
+def relative(a, b):
+    """b相对于a的位姿 a⁻¹ ⊕ b"""
+    c, s = math.cos(a[2]), math.sin(a[2])
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    return (c * dx + s * dy, -s * dx + c * dy, normalize_angle(b[2] - a[2]))
+
+
+def diagonal_information(sigma_xy, sigma_theta):
+    """由标准差构造对角信息矩阵"""
+    wxy = 1.0 / (sigma_xy * sigma_xy)
+    wt = 1.0 / (sigma_theta * sigma_theta)
+    return ((wxy, 0.0, 0.0), (0.0, wxy, 0.0), (0.0, 0.0, wt))
+
+
+class PoseGraphEdge:
+    """相对位姿约束: 节点j在节点i坐标系下的观测"""
+    def __init__(self, i, j, measurement, information, kind="odometry"):
+        self.i = i
+        self.j = j
+        self.measurement = measurement
+        self.information = information
+        self.kind = kind  # odometry / scan / loop
+
+
+class PoseGraph:
+    def __init__(self):
+        self.poses = []        # 节点位姿 (x, y, theta)
+        self.edges = []
+        self.node_edges = []   # 每个节点关联的边索引
+
+    def add_node(self, pose):
+        self.poses.append(tuple(pose))
+        self.node_edges.append([])
+        return len(self.poses) - 1
+
+    def add_edge(self, i, j, measurement, information, kind="odometry"):
+        edge = PoseGraphEdge(i, j, tuple(measurement), information, kind)
+        self.edges.append(edge)
+        self.node_edges[i].append(len(self.edges) - 1)
+        self.node_edges[j].append(len(self.edges) - 1)
+        return edge
+
+    def edge_error(self, edge):
+        """约束误差 e = z⁻¹ ⊕ (xi⁻¹ ⊕ xj)"""
+        return relative(edge.measurement, relative(self.poses[edge.i], self.poses[edge.j]))
+
+    def chi2(self, edges=None):
+        """加权平方误差和"""
+        total = 0.0
+        for edge in (self.edges if edges is None else edges):
+            e = self.edge_error(edge)
+            omega = edge.information
+            for r in range(3):
+                for c in range(3):
+                    total += e[r] * omega[r][c] * e[c]
+        return total
+
+    def optimize(self, start=0, iterations=5, tolerance=1e-5):
+        """优化索引 >= start 的节点（之前的节点固定），节点0始终作为锚点固定；返回迭代次数"""
+        start = max(start, 1)
+        count = len(self.poses) - start
+        if count <= 0:
+            return 0
+
+        # 只收集与可变节点相关的约束
+        edge_ids = set()
+        for node in range(start, len(self.poses)):
+            edge_ids.update(self.node_edges[node])
+        edges = [self.edges[k] for k in sorted(edge_ids)]
+
+        # 最小度排序，减少回环带来的Cholesky填充
+        adjacency = [set() for _ in range(count)]
+        for edge in edges:
+            a, b = edge.i - start, edge.j - start
+            if a >= 0 and b >= 0 and a != b:
+                adjacency[a].add(b)
+                adjacency[b].add(a)
+        positions = [0] * count
+        for position, node in enumerate(self._minimum_degree_order(adjacency)):
+            positions[node] = position
+
+        for iteration in range(iterations):
+            delta = self._solve_step(edges, start, count, positions)
+            if delta is None:
+                return iteration
+            largest = 0.0
+            for k in range(count):
+                x, y, t = self.poses[start + k]
+                offset = 3 * positions[k]
+                dx, dy, dt = delta[offset], delta[offset + 1], delta[offset + 2]
+                self.poses[start + k] = (x + dx, y + dy, normalize_angle(t + dt))
+                largest = max(largest, abs(dx), abs(dy), abs(dt))
+            if largest < tolerance:
+                return iteration + 1
+        return iterations
+
+    @staticmethod
+    def _minimum_degree_order(adjacency):
+        """在节点图上做贪心最小度消元排序"""
+        graph = [set(neighbors) for neighbors in adjacency]
+        remaining = set(range(len(graph)))
+        order = []
+        while remaining:
+            node = min(remaining, key=lambda n: (len(graph[n]), n))
+            neighbors = graph[node]
+            for other in neighbors:
+                graph[other].discard(node)
+                graph[other].update(neighbors)
+                graph[other].discard(other)
+            remaining.discard(node)
+            order.append(node)
+        return order
+
+    def _solve_step(self, edges, start, count, positions):
+        """构建稀疏正规方程 H·Δ = -b 并用稀疏Cholesky求解（变量按positions排列）"""
+        size = 3 * count
+        columns = [dict() for _ in range(size)]  # 下三角按列存储 columns[c][r], r >= c
+        b = [0.0] * size
+
+        for edge in edges:
+            xi, xj = self.poses[edge.i], self.poses[edge.j]
+            e = self.edge_error(edge)
+
+            phi = xi[2] + edge.measurement[2]
+            c, s = math.cos(phi), math.sin(phi)
+            dtx, dty = xj[0] - xi[0], xj[1] - xi[1]
+            # 雅可比 A = ∂e/∂xi, B = ∂e/∂xj
+            jac_a = ((-c, -s, -s * dtx + c * dty),
+                     (s, -c, -c * dtx - s * dty),
+                     (0.0, 0.0, -1.0))
+            jac_b = ((c, s, 0.0),
+                     (-s, c, 0.0),
+                     (0.0, 0.0, 1.0))
+
+            blocks = []
+            if edge.i >= start:
+                blocks.append((3 * positions[edge.i - start], jac_a))
+            if edge.j >= start:
+                blocks.append((3 * positions[edge.j - start], jac_b))
+            if not blocks:
+                continue
+
+            omega = edge.information
+            # Ω·e 和 Ω·J
+            omega_e = [sum(omega[r][k] * e[k] for k in range(3)) for r in range(3)]
+            weighted = []
+            for offset, jac in blocks:
+                omega_jac = [[sum(omega[r][k] * jac[k][col] for k in range(3)) for col in range(3)]
+                             for r in range(3)]
+                weighted.append((offset, jac, omega_jac))
+                for col in range(3):
+                    b[offset + col] += sum(jac[k][col] * omega_e[k] for k in range(3))
+
+            for offset_p, jac_p, _ in weighted:
+                for offset_q, _, omega_jac_q in weighted:
+                    for r in range(3):
+                        row = offset_p + r
+                        for col in range(3):
+                            column = offset_q + col
+                            if row < column:
+                                continue
+                            value = (jac_p[0][r] * omega_jac_q[0][col] +
+                                     jac_p[1][r] * omega_jac_q[1][col] +
+                                     jac_p[2][r] * omega_jac_q[2][col])
+                            if value != 0.0:
+                                cell = columns[column]
+                                cell[row] = cell.get(row, 0.0) + value
+
+        # 微小阻尼保证正定
+        for index in range(size):
+            columns[index][index] = columns[index].get(index, 0.0) + 1e-9
+
+        factor = self._cholesky(columns)
+        if factor is None:
+            return None
+        return self._cholesky_solve(factor, [-value for value in b])
+
+    @staticmethod
+    def _cholesky(columns):
+        """右视稀疏Cholesky分解，返回下三角因子（按列存储）"""
+        size = len(columns)
+        for c in range(size):
+            column = columns[c]
+            pivot = column.get(c, 0.0)
+            if pivot <= 0.0:
+                return None
+            pivot = math.sqrt(pivot)
+            column[c] = pivot
+            below = sorted((r, v / pivot) for r, v in column.items() if r > c)
+            for r, v in below:
+                column[r] = v
+            # 用当前列更新右下角子矩阵
+            for a in range(len(below)):
+                ra, va = below[a]
+                target = columns[ra]
+                for k in range(a, len(below)):
+                    rk, vk = below[k]
+                    target[rk] = target.get(rk, 0.0) - va * vk
+        return columns
+
+    @staticmethod
+    def _cholesky_solve(factor, rhs):
+        """解 L·Lᵀ·x = rhs"""
+        size = len(factor)
+        y = list(rhs)
+        for c in range(size):
+            column = factor[c]
+            y[c] /= column[c]
+            value = y[c]
+            for r, v in column.items():
+                if r > c:
+                    y[r] -= v * value
+        x = y
+        for c in range(size - 1, -1, -1):
+            column = factor[c]
+            total = x[c]
+            for r, v in column.items():
+                if r > c:
+                    total -= v * x[r]
+            x[c] = total / column[c]
+        return x
+
+
+class PoseGraphTracker:
+    """位姿图前端: 累积相对运动，生成关键帧并检测回环，只在回环时局部重新优化"""
+
+    def __init__(self, keyframe_distance=0.2, keyframe_angle=0.35,
+                 loop_closure_radius=0.5, min_loop_gap=30, max_window=150,
+                 matcher=None, min_match_score=0.6):
+        self.keyframe_distance = keyframe_distance
+        self.keyframe_angle = keyframe_angle
+        self.loop_closure_radius = loop_closure_radius
+        self.min_loop_gap = min_loop_gap    # 回环候选至少相隔的关键帧数
+        self.max_window = max_window        # 每次优化的最大节点数
+        self.matcher = matcher              # matcher(参考扫描, 当前扫描, 初值) -> (相对位姿, 得分) 或 None
+        self.min_match_score = min_match_score
+
+        self.odometry_information = diagonal_information(0.05, 0.05)
+        self.loop_information = diagonal_information(0.05, 0.03)
+
+        self.reset((0.0, 0.0, 0.0))
+
+    @property
+    def pose(self):
+        """当前位姿估计 = 最新关键帧 ⊕ 之后的累积运动"""
+        return compose(self.graph.poses[-1], self.motion)
+
+    def reset(self, pose):
+        """用已知位姿重置（例如初始位置已知时）: 清空位姿图、关键帧扫描、空间索引和累积运动，参数不变"""
+        self.graph = PoseGraph()
+        self.keyframe_scans = []
+        self.spatial_index = {}  # (ix, iy) -> 关键帧列表，用于快速查找回环候选
+        self.motion = (0.0, 0.0, 0.0)  # 自上一关键帧以来的相对运动
+        self.loop_closures = 0
+        self.optimizations = 0
+
+        self.graph.add_node(pose)
+        self.keyframe_scans.append(None)
+        self._index_node(0)
+
+    def add_motion(self, dx, dy, dtheta, scan=None, information=None):
+        """加入机器人坐标系下的相对运动；满足关键帧条件时返回新关键帧索引"""
+        self.motion = compose(self.motion, (dx, dy, dtheta))
+        if (math.hypot(self.motion[0], self.motion[1]) < self.keyframe_distance and
+                abs(self.motion[2]) < self.keyframe_angle):
+            return None
+        return self.add_keyframe(scan, information)
+
+    def add_keyframe(self, scan=None, information=None, kind="odometry"):
+        """以当前累积运动为约束加入新关键帧"""
+        previous = len(self.graph.poses) - 1
+        node = self.graph.add_node(self.pose)
+        self.graph.add_edge(previous, node, self.motion,
+                            information or self.odometry_information, kind)
+        self.motion = (0.0, 0.0, 0.0)
+        self.keyframe_scans.append(list(scan) if scan is not None else None)
+        self._index_node(node)
+
+        if self.matcher is not None and scan is not None:
+            self._detect_loop_closure(node)
+        return node
+
+    def add_loop_closure(self, i, j, measurement, information=None):
+        """加入回环约束并只优化受影响的节点区间"""
+        self.graph.add_edge(i, j, measurement, information or self.loop_information, "loop")
+        self.loop_closures += 1
+        self.optimize_from(min(i, j))
+
+    def optimize_from(self, node):
+        """优化 node 之后的节点，窗口大小受 max_window 限制"""
+        last = len(self.graph.poses) - 1
+        start = max(node, last - self.max_window + 1)
+        self.graph.optimize(start)
+        self.optimizations += 1
+        # 优化后刷新窗口内节点的空间索引
+        for cell in self.spatial_index.values():
+            cell[:] = [n for n in cell if n < start]
+        for index in range(start, last + 1):
+            self._index_node(index)
+
+    def _cell(self, pose):
+        size = self.loop_closure_radius
+        return int(math.floor(pose[0] / size)), int(math.floor(pose[1] / size))
+
+    def _index_node(self, node):
+        self.spatial_index.setdefault(self._cell(self.graph.poses[node]), []).append(node)
+
+    def _detect_loop_closure(self, node):
+        """在附近的旧关键帧中找最近的一个，用扫描匹配验证"""
+        pose = self.graph.poses[node]
+        cx, cy = self._cell(pose)
+        best, best_distance = None, self.loop_closure_radius
+        for ix in (cx - 1, cx, cx + 1):
+            for iy in (cy - 1, cy, cy + 1):
+                for candidate in self.spatial_index.get((ix, iy), ()):
+                    if node - candidate < self.min_loop_gap or self.keyframe_scans[candidate] is None:
+                        continue
+                    other = self.graph.poses[candidate]
+                    distance = math.hypot(other[0] - pose[0], other[1] - pose[1])
+                    if distance < best_distance:
+                        best, best_distance = candidate, distance
+        if best is None:
+            return
+
+        guess = relative(self.graph.poses[best], pose)
+        result = self.matcher(self.keyframe_scans[best], self.keyframe_scans[node], guess)
+        if result is None:
+            return
+        measurement, score = result
+        if score >= self.min_match_score:
+            self.add_loop_closure(best, node, measurement)
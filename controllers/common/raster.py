@@ -0,0 +1,126 @@
+"""
+光栅绘图 - 无外部依赖版本
+RGB 字节缓冲区画布（矩形按行切片填充、Bresenham 画线）、世界坐标到像素的视图变换、
+二进制 PPM(P6) 输出，以及 LTTB 折线抽稀，供结果渲染工具共用
+"""
+
+
+class WorldView:
+    """世界坐标（米，y向上）到像素坐标（y向下）的变换"""
+
+    def __init__(self, min_x, min_y, max_x, max_y, scale=100.0, margin=0.2):
+        self.min_x = min_x - margin
+        self.max_y = max_y + margin
+        self.scale = scale  # 像素/米
+        self.width = max(1, int((max_x - min_x + 2 * margin) * scale) + 1)
+        self.height = max(1, int((max_y - min_y + 2 * margin) * scale) + 1)
+
+    def to_pixel(self, x, y):
+        return int((x - self.min_x) * self.scale), int((self.max_y - y) * self.scale)
+
+
+class Raster:
+    """RGB 画布，像素按行连续存放在 bytearray 中；越界绘制自动裁剪"""
+
+    def __init__(self, width, height, color=(0, 0, 0), pixels=None):
+        self.width = width
+        self.height = height
+        self.pixels = pixels if pixels is not None else bytearray(bytes(color) * (width * height))
+
+    def copy(self):
+        """复制整块缓冲区（用作每帧的底图）"""
+        return Raster(self.width, self.height, pixels=bytearray(self.pixels))
+
+    def set_pixel(self, x, y, color):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            offset = 3 * (y * self.width + x)
+            self.pixels[offset:offset + 3] = bytes(color)
+
+    def fill_rect(self, x0, y0, x1, y1, color):
+        """填充 [x0, x1) × [y0, y1)，每行一次切片赋值"""
+        x0, x1 = max(x0, 0), min(x1, self.width)
+        y0, y1 = max(y0, 0), min(y1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        row = bytes(color) * (x1 - x0)
+        stride = 3 * self.width
+        for y in range(y0, y1):
+            start = y * stride + 3 * x0
+            self.pixels[start:start + len(row)] = row
+
+    def dot(self, x, y, radius, color):
+        """以 (x, y) 为中心的方块点"""
+        self.fill_rect(x - radius, y - radius, x + radius + 1, y + radius + 1, color)
+
+    def line(self, x0, y0, x1, y1, color):
+        """Bresenham 直线"""
+        color = bytes(color)
+        width, height, pixels = self.width, self.height, self.pixels
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        error = dx + dy
+        while True:
+            if 0 <= x0 < width and 0 <= y0 < height:
+                offset = 3 * (y0 * width + x0)
+                pixels[offset:offset + 3] = color
+            if x0 == x1 and y0 == y1:
+                return
+            doubled = 2 * error
+            if doubled >= dy:
+                error += dy
+                x0 += sx
+            if doubled <= dx:
+                error += dx
+                y0 += sy
+
+    def polyline(self, points, color):
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            self.line(x0, y0, x1, y1, color)
+
+    def to_ppm(self):
+        return b"P6\n%d %d\n255\n" % (self.width, self.height) + bytes(self.pixels)
+
+    def write_ppm(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(self.to_ppm())
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets 折线抽稀，返回保留点的下标（含首尾）
+
+    按下标等分成 threshold-2 个桶，每桶保留与上一保留点、下一桶质心构成三角形面积最大的点；
+    二维轨迹直接用平面坐标算面积，拐角和急转处的点优先保留。
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+    selected = [0]
+    bucket_size = (count - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        # 下一个桶的质心（最后一个桶用终点）
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        span = next_end - next_start
+        cx = sum(points[i][0] for i in range(next_start, next_end)) / span
+        cy = sum(points[i][1] for i in range(next_start, next_end)) / span
+
+        ax, ay = points[previous]
+        best = start
+        best_area = -1.0
+        for i in range(start, end):
+            bx, by = points[i]
+            area = abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+            if area > best_area:
+                best_area = area
+                best = i
+        selected.append(best)
+        previous = best
+    selected.append(count - 1)
+    return selected
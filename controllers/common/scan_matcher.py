@@ -0,0 +1,250 @@
+"""
+激光里程计前端 - 无外部依赖版本
+相关性扫描匹配: 参考扫描预计算多分辨率查找表，当前扫描预计算点集，在有界窗口内由粗到细搜索
+"""
+
+import math
+
+from occupancy_grid import lidar_beam_angle
+from pose_graph import compose, diagonal_information, relative
+
+# 整数编码栅格坐标，平移偏移可以直接加到键上
+_KEY_STRIDE = 100003
+_NEIGHBOR_OFFSETS = [dx * _KEY_STRIDE + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def scan_points(ranges, stride=1, min_range=0.12, max_range=3.5):
+    """激光距离转换为机器人坐标系下的点集（过滤无效值和无回波）"""
+    count = len(ranges)
+    points = []
+    for i in range(0, count, stride):
+        distance = ranges[i]
+        if min_range < distance < max_range:
+            angle = lidar_beam_angle(i, count)
+            points.append((distance * math.cos(angle), distance * math.sin(angle)))
+    return points
+
+
+def densify(points, spacing, max_gap=0.15):
+    """在相邻且足够近的扫描点之间插值，使细分辨率查找表沿墙面连续"""
+    dense = []
+    count = len(points)
+    for k in range(count):
+        x0, y0 = points[k]
+        dense.append((x0, y0))
+        x1, y1 = points[(k + 1) % count]
+        gap = math.hypot(x1 - x0, y1 - y0)
+        if spacing < gap < max_gap:
+            steps = int(gap / spacing)
+            for j in range(1, steps):
+                t = j / steps
+                dense.append((x0 + (x1 - x0) * t, y0 + (y1 - y0) * t))
+    return dense
+
+
+class ReferenceScan:
+    """参考扫描: 每个分辨率一张 键->得分 的平滑查找表，外加ICP精化用的点分桶"""
+    def __init__(self, points, lookups, buckets, bucket_size):
+        self.points = points
+        self.lookups = lookups  # {resolution: {key: score}}
+        self.buckets = buckets  # {key: [(x, y), ...]}
+        self.bucket_size = bucket_size
+
+
+class ScanMatcher:
+    def __init__(self, coarse_resolution=0.05, fine_resolution=0.01, point_stride=6,
+                 linear_window=0.1, angular_window=0.1, angular_step=0.02,
+                 icp_iterations=3, icp_max_distance=0.05, min_range=0.12, max_range=3.5):
+        self.coarse_resolution = coarse_resolution
+        self.fine_resolution = fine_resolution
+        self.point_stride = point_stride      # 当前扫描每隔几束取一个点
+        self.linear_window = linear_window    # 平移搜索半径（米）
+        self.angular_window = angular_window  # 旋转搜索半径（弧度）
+        self.angular_step = angular_step
+        self.icp_iterations = icp_iterations  # 细搜索后的ICP精化次数
+        self.icp_max_distance = icp_max_distance
+        self.min_range = min_range
+        self.max_range = max_range
+
+    def _build_lookup(self, points, resolution, radius):
+        """把参考点平滑到栅格上: 得分按与点所在单元的距离做高斯衰减"""
+        kernel = []
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                score = math.exp(-(dx * dx + dy * dy) / (2.0 * radius * radius))
+                kernel.append((dx * _KEY_STRIDE + dy, score))
+        lookup = {}
+        get = lookup.get
+        for px, py in points:
+            key = int(math.floor(px / resolution)) * _KEY_STRIDE + int(math.floor(py / resolution))
+            for offset, score in kernel:
+                if get(key + offset, 0.0) < score:
+                    lookup[key + offset] = score
+        return lookup
+
+    def prepare_reference(self, ranges):
+        """预处理参考扫描（每个关键帧只做一次）"""
+        points = scan_points(ranges, 1, self.min_range, self.max_range)
+        dense = densify(points, 2 * self.fine_resolution)
+        lookups = {
+            self.coarse_resolution: self._build_lookup(points, self.coarse_resolution, 1),
+            self.fine_resolution: self._build_lookup(dense, self.fine_resolution, 2),
+        }
+        size = self.coarse_resolution
+        buckets = {}
+        for px, py in dense:
+            key = int(math.floor(px / size)) * _KEY_STRIDE + int(math.floor(py / size))
+            buckets.setdefault(key, []).append((px, py))
+        return ReferenceScan(points, lookups, buckets, size)
+
+    def prepare_points(self, ranges):
+        """预处理当前扫描的稀疏点集"""
+        return scan_points(ranges, self.point_stride, self.min_range, self.max_range)
+
+    def _search(self, lookup, points, center, resolution, angles, cells):
+        """在给定角度集合和 ±cells 个栅格的平移窗口内穷举，返回 (最优位姿, 得分)"""
+        get = lookup.get
+        best_pose, best_score = center, -1.0
+        offsets = [(ix, iy, ix * _KEY_STRIDE + iy)
+                   for ix in range(-cells, cells + 1) for iy in range(-cells, cells + 1)]
+        floor = math.floor
+        for dtheta in angles:
+            theta = center[2] + dtheta
+            c, s = math.cos(theta), math.sin(theta)
+            tx, ty = center[0], center[1]
+            keys = [int(floor((c * px - s * py + tx) / resolution)) * _KEY_STRIDE +
+                    int(floor((s * px + c * py + ty) / resolution)) for px, py in points]
+            for ix, iy, offset in offsets:
+                score = sum([get(key + offset, 0.0) for key in keys])
+                if score > best_score:
+                    best_score = score
+                    best_pose = (tx + ix * resolution, ty + iy * resolution, theta)
+        return best_pose, best_score
+
+    def match(self, reference, points, guess, linear_window=None, angular_window=None):
+        """估计当前扫描在参考扫描坐标系下的位姿；返回 (位姿, 0~1的匹配得分)"""
+        if len(points) < 10 or len(reference.points) < 10:
+            return guess, 0.0
+        linear_window = self.linear_window if linear_window is None else linear_window
+        angular_window = self.angular_window if angular_window is None else angular_window
+
+        # 粗搜索: 粗分辨率栅格步长 + 角度步长
+        steps = int(round(angular_window / self.angular_step))
+        angles = [k * self.angular_step for k in range(-steps, steps + 1)]
+        cells = max(1, int(round(linear_window / self.coarse_resolution)))
+        pose, _ = self._search(reference.lookups[self.coarse_resolution], points, guess,
+                               self.coarse_resolution, angles, cells)
+
+        # 细搜索: 在粗结果附近用细分辨率查找表
+        fine_step = self.angular_step / 4
+        angles = [k * fine_step for k in range(-2, 3)]
+        cells = max(1, int(math.ceil(self.coarse_resolution / self.fine_resolution / 2)))
+        pose, score = self._search(reference.lookups[self.fine_resolution], points, pose,
+                                   self.fine_resolution, angles, cells)
+
+        # 亚栅格精化: 几次点到点ICP
+        for _ in range(self.icp_iterations):
+            refined = self._icp_step(reference, points, pose)
+            if refined is None:
+                break
+            pose = refined
+        return pose, score / len(points)
+
+    def _icp_step(self, reference, points, pose):
+        """一次点到点ICP: 在3x3分桶内找最近参考点，闭式求解二维刚体变换"""
+        size = reference.bucket_size
+        buckets = reference.buckets
+        max_distance_sq = self.icp_max_distance ** 2
+        c, s = math.cos(pose[2]), math.sin(pose[2])
+        pairs = []
+        for px, py in points:
+            wx = c * px - s * py + pose[0]
+            wy = s * px + c * py + pose[1]
+            key = int(math.floor(wx / size)) * _KEY_STRIDE + int(math.floor(wy / size))
+            best, best_sq = None, max_distance_sq
+            for offset in _NEIGHBOR_OFFSETS:
+                for qx, qy in buckets.get(key + offset, ()):
+                    distance_sq = (qx - wx) ** 2 + (qy - wy) ** 2
+                    if distance_sq < best_sq:
+                        best, best_sq = (qx, qy), distance_sq
+            if best is not None:
+                pairs.append((px, py, best[0], best[1]))
+        if len(pairs) < 10:
+            return None
+
+        n = len(pairs)
+        pmx = sum(p[0] for p in pairs) / n
+        pmy = sum(p[1] for p in pairs) / n
+        qmx = sum(p[2] for p in pairs) / n
+        qmy = sum(p[3] for p in pairs) / n
+        cross = dot = 0.0
+        for px, py, qx, qy in pairs:
+            ax, ay, bx, by = px - pmx, py - pmy, qx - qmx, qy - qmy
+            dot += ax * bx + ay * by
+            cross += ax * by - ay * bx
+        theta = math.atan2(cross, dot)
+        c, s = math.cos(theta), math.sin(theta)
+        refined = (qmx - (c * pmx - s * pmy), qmy - (s * pmx + c * pmy), theta)
+
+        # 精化量应在细搜索分辨率量级，过大说明对应关系不可靠
+        if (math.hypot(refined[0] - pose[0], refined[1] - pose[1]) > self.coarse_resolution or
+                abs(math.atan2(math.sin(refined[2] - pose[2]), math.cos(refined[2] - pose[2]))) >
+                self.angular_step):
+            return None
+        return refined
+
+    def match_scans(self, reference_ranges, ranges, guess):
+        """用于位姿图回环检测: 更大的搜索窗口"""
+        reference = self.prepare_reference(reference_ranges)
+        points = self.prepare_points(ranges)
+        return self.match(reference, points, guess,
+                          linear_window=3 * self.linear_window,
+                          angular_window=3 * self.angular_window)
+
+
+class LidarOdometry:
+    """扫描到关键帧匹配的激光里程计: 输出每个控制周期的相对运动"""
+
+    def __init__(self, matcher=None, keyframe_distance=0.15, keyframe_angle=0.2, min_score=0.5):
+        self.matcher = matcher or ScanMatcher()
+        self.keyframe_distance = keyframe_distance
+        self.keyframe_angle = keyframe_angle
+        self.min_score = min_score          # 低于该得分时信任里程计初值
+        self.information = diagonal_information(0.02, 0.02)
+
+        self.reference = None               # 当前参考关键帧
+        self.pose_in_reference = (0.0, 0.0, 0.0)
+        self.last_score = 0.0
+        self.last_matched = False
+        self.matches = 0
+        self.rejected = 0
+
+    def update(self, ranges, motion_guess=(0.0, 0.0, 0.0)):
+        """输入一帧完整扫描和轮式里程计增量，返回估计的相对运动 (dx, dy, dtheta)"""
+        if not ranges:
+            return motion_guess
+        if self.reference is None:
+            self.reference = self.matcher.prepare_reference(ranges)
+            self.pose_in_reference = (0.0, 0.0, 0.0)
+            return motion_guess
+
+        previous = self.pose_in_reference
+        guess = compose(previous, motion_guess)
+        pose, score = self.matcher.match(self.reference, self.matcher.prepare_points(ranges), guess)
+        self.last_score = score
+        self.last_matched = score >= self.min_score
+        if self.last_matched:
+            self.matches += 1
+        else:
+            self.rejected += 1
+            pose = guess
+
+        self.pose_in_reference = pose
+        motion = relative(previous, pose)
+
+        # 离参考帧足够远时切换关键帧，限制搜索漂移
+        if (math.hypot(pose[0], pose[1]) > self.keyframe_distance or
+                abs(pose[2]) > self.keyframe_angle):
+            self.reference = self.matcher.prepare_reference(ranges)
+            self.pose_in_reference = (0.0, 0.0, 0.0)
+        return motion
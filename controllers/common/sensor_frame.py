@@ -0,0 +1,119 @@
+"""
+单周期传感器帧 - 无外部依赖版本
+每个控制周期只读取一次激光/GPS/指南针，派生视图（截断距离、扇区最小值、四方向距离、
+光束端点）在首次访问时计算并缓存到下一次 update，供各控制器共享使用
+"""
+
+import math
+from array import array
+
+from occupancy_grid import lidar_beam_angle
+
+
+class SensorFrame:
+    """一个控制周期的传感器快照"""
+
+    def __init__(self, lidar=None, gps=None, compass=None, max_range=5.0):
+        self.lidar = lidar
+        self.gps = gps
+        self.compass = compass
+        self.max_range = max_range  # 无回波(inf)和超量程读数截断到该值
+
+        self.ranges = None      # 本周期原始激光距离（getRangeImage 的唯一一次拷贝）
+        self.position = None    # GPS (x, y)
+        self.heading = None     # 指南针航向（弧度）
+        self.frame_id = 0
+
+        # 预分配缓冲区: 光束数不变时跨周期复用
+        self._beam_count = 0
+        self._clamped = array('d')
+        self._cos = array('d')
+        self._sin = array('d')
+        self._views = {}
+
+    def update(self):
+        """新周期: 读取一次全部传感器并作废派生视图"""
+        self.frame_id += 1
+        self._views.clear()
+        self.ranges = self.lidar.getRangeImage() if self.lidar else None
+        if self.ranges and len(self.ranges) != self._beam_count:
+            self._allocate(len(self.ranges))
+        if self.gps:
+            values = self.gps.getValues()
+            self.position = (values[0], values[1])
+        if self.compass:
+            values = self.compass.getValues()
+            self.heading = math.atan2(values[0], values[1])
+        return self
+
+    def _allocate(self, count):
+        self._beam_count = count
+        self._clamped = array('d', bytes(8 * count))
+        self._cos = array('d', (math.cos(lidar_beam_angle(i, count)) for i in range(count)))
+        self._sin = array('d', (math.sin(lidar_beam_angle(i, count)) for i in range(count)))
+
+    def clamped(self):
+        """截断到 [0, max_range] 的距离（inf/NaN 视为 max_range）"""
+        if 'clamped' not in self._views:
+            buffer = self._clamped
+            max_range = self.max_range
+            for i, distance in enumerate(self.ranges or ()):
+                buffer[i] = distance if distance < max_range else max_range
+            self._views['clamped'] = buffer
+        return self._views['clamped']
+
+    def cardinal(self):
+        """前、左、右、后四个方向单束的截断距离；没有扫描时全部为 max_range"""
+        if 'cardinal' not in self._views:
+            if self.ranges:
+                # 只截断用到的四束，不展开整圈
+                ranges = self.ranges
+                count = self._beam_count
+                max_range = self.max_range
+                self._views['cardinal'] = tuple(
+                    distance if distance < max_range else max_range
+                    for distance in (ranges[count // 2], ranges[count // 4],
+                                     ranges[3 * count // 4], ranges[0]))
+            else:
+                self._views['cardinal'] = (self.max_range,) * 4
+        return self._views['cardinal']
+
+    def sector_minima(self, sectors=4):
+        """把一圈均分为 sectors 个扇区（第k个以第 k*n/sectors 束为中心），返回各扇区最小截断距离
+
+        sectors=4 时依次为 后、左、前、右。
+        """
+        key = ('sectors', sectors)
+        if key not in self._views:
+            if not self.ranges:
+                self._views[key] = (self.max_range,) * sectors
+            else:
+                clamped = self.clamped()
+                count = self._beam_count
+                half = count / (2 * sectors)
+                minima = []
+                for k in range(sectors):
+                    center = k * count / sectors
+                    first = int(math.ceil(center - half))
+                    last = int(math.ceil(center + half))
+                    minima.append(min(clamped[i % count] for i in range(first, last)))
+                self._views[key] = tuple(minima)
+        return self._views[key]
+
+    def endpoints(self, x, y, theta, max_range=3.5, stride=1):
+        """有效回波在世界坐标系下的端点列表 [(光束索引, ex, ey), ...]（用预计算的光束方向表）"""
+        key = ('endpoints', x, y, theta, max_range, stride)
+        if key not in self._views:
+            points = []
+            if self.ranges:
+                ranges = self.ranges
+                cos_table, sin_table = self._cos, self._sin
+                c, s = math.cos(theta), math.sin(theta)
+                for i in range(0, self._beam_count, stride):
+                    distance = ranges[i]
+                    if 0 < distance < max_range:
+                        dx = c * cos_table[i] - s * sin_table[i]
+                        dy = s * cos_table[i] + c * sin_table[i]
+                        points.append((i, x + distance * dx, y + distance * dy))
+            self._views[key] = points
+        return self._views[key]
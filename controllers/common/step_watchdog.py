@@ -0,0 +1,75 @@
+"""
+控制周期预算看门狗 - 无外部依赖版本
+测量每次 robot.step 返回后控制器自身的墙钟耗时，与世界的 basicTimeStep 比较并记录超时；
+平滑后的负载持续超出预算时降低质量等级（控制器据此减少粒子、光束、跳过可视化），
+恢复余量后再逐级回升。宁可保持实时控制，也不要晚到的完美估计。
+"""
+
+import time
+
+from online_stats import RunningStats
+
+
+class StepWatchdog:
+    """按步预算监控循环耗时并给出质量等级（0=全质量，max_level=最大降级）"""
+
+    def __init__(self, budget_ms, max_level=3, degrade_ratio=0.9, restore_ratio=0.5,
+                 smoothing=0.2, hold_steps=20, clock=time.perf_counter):
+        self.budget = budget_ms / 1000.0
+        self.max_level = max_level
+        self.degrade_ratio = degrade_ratio  # 平滑负载超过预算的该比例时降级
+        self.restore_ratio = restore_ratio  # 低于该比例时回升
+        self.smoothing = smoothing          # 指数平滑系数
+        self.hold_steps = hold_steps        # 两次等级调整之间至少间隔的步数
+        self.clock = clock
+
+        self.level = 0
+        self.load = None                    # 平滑后的每步耗时（秒）
+        self.timings = RunningStats()
+        self.overruns = 0
+        self.level_changes = 0
+        self._start = None
+        self._since_change = 0
+
+    def begin(self):
+        """robot.step 返回后调用"""
+        self._start = self.clock()
+
+    def end(self):
+        """本步工作结束（下一次 robot.step 之前）调用；质量等级改变时返回 True"""
+        if self._start is None:
+            return False
+        elapsed = self.clock() - self._start
+        self._start = None
+        self.timings.add(elapsed)
+        if elapsed > self.budget:
+            self.overruns += 1
+        self.load = elapsed if self.load is None else self.load + self.smoothing * (elapsed - self.load)
+
+        self._since_change += 1
+        if self._since_change < self.hold_steps:
+            return False
+        if self.load > self.degrade_ratio * self.budget and self.level < self.max_level:
+            self.level += 1
+        elif self.load < self.restore_ratio * self.budget and self.level > 0:
+            self.level -= 1
+        else:
+            return False
+        self._since_change = 0
+        self.level_changes += 1
+        return True
+
+    @property
+    def degraded(self):
+        return self.level > 0
+
+    def interpolate(self, full, degraded):
+        """按当前等级在全质量取值和最大降级取值之间线性插值"""
+        if not self.max_level:
+            return full
+        return full + (degraded - full) * self.level / self.max_level
+
+    def summary(self):
+        return {'steps': self.timings.count, 'overruns': self.overruns,
+                'mean_ms': self.timings.mean * 1000, 'worst_ms': max(self.timings.maximum, 0.0) * 1000,
+                'level': self.level, 'level_changes': self.level_changes}
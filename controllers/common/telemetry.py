@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+实时遥测 - 无外部依赖版本
+控制器把位姿、粒子云摘要、地图增量和各阶段耗时打包成紧凑的二进制数据报，
+经非阻塞UDP或Unix域套接字发出（发不出去就丢弃，从不阻塞控制循环）；
+外部查看/录制工具用 decode() 解包。本文件也可直接运行作为监听器:
+    python telemetry.py udp://127.0.0.1:5600 --record run.tlm
+"""
+
+import argparse
+import math
+import os
+import socket
+import struct
+import time
+from array import array
+
+ENV_ADDRESS = "WEBOTS_TELEMETRY"  # 控制器从该环境变量读取遥测地址，未设置时不发送
+
+MAGIC = 0x57  # 'W'
+POSE = 1
+PARTICLES = 2
+MAP_DELTA = 3
+TIMINGS = 4
+
+_HEADER = struct.Struct('<BBIf')          # 魔数, 类型, 序号, 仿真时间
+_POSE = struct.Struct('<fffB')            # x, y, theta, 来源
+_PARTICLES = struct.Struct('<Hffffff')    # 粒子数, 均值x/y/theta, 标准差x/y, 有效粒子数
+_MAP_DELTA = struct.Struct('<HH')         # 栅格宽度, 单元数；随后 u32 索引数组 + u8 状态数组
+_TIMING = struct.Struct('<f')
+
+MAX_DATAGRAM = 1400  # 保持在常见MTU以内，避免IP分片
+MAX_DELTA_CELLS = (MAX_DATAGRAM - _HEADER.size - _MAP_DELTA.size) // 5
+
+POSE_SOURCES = {'gps': 0, 'pose_graph': 1, 'particle_filter': 2}
+
+
+def parse_address(address):
+    """'udp://host:port' 或 'unix:///path' -> (地址族, 套接字地址)"""
+    if address.startswith("unix://"):
+        return socket.AF_UNIX, address[len("unix://"):]
+    if address.startswith("udp://"):
+        address = address[len("udp://"):]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class TelemetryPublisher:
+    """即发即弃的遥测发送端；address 为 None 时所有方法都是空操作"""
+
+    def __init__(self, address=None):
+        self.address = address
+        self.enabled = False
+        self.sequence = 0
+        self.sent = 0
+        self.dropped = 0
+        self.socket = None
+        if not address:
+            return
+        try:
+            family, self.target = parse_address(address)
+            self.socket = socket.socket(family, socket.SOCK_DGRAM)
+            self.socket.setblocking(False)
+            self.enabled = True
+        except (OSError, ValueError) as e:
+            print(f"遥测地址无效，已禁用 ({address}): {e}")
+
+    @classmethod
+    def from_environment(cls):
+        return cls(os.environ.get(ENV_ADDRESS))
+
+    def _send(self, kind, stamp, payload):
+        self.sequence += 1
+        try:
+            self.socket.sendto(_HEADER.pack(MAGIC, kind, self.sequence & 0xFFFFFFFF, stamp) + payload,
+                               self.target)
+            self.sent += 1
+        except OSError:
+            # 缓冲区满、没有接收端、套接字文件不存在: 丢弃
+            self.dropped += 1
+
+    def pose(self, stamp, x, y, theta, source='gps'):
+        if self.enabled:
+            self._send(POSE, stamp, _POSE.pack(x, y, theta, POSE_SOURCES.get(source, 255)))
+
+    def particles(self, stamp, particles):
+        """粒子云摘要: 加权均值、标准差和有效粒子数（不发送整个粒子集）"""
+        if not self.enabled or not particles:
+            return
+        # 单遍累积加权矩
+        total = sum_x = sum_y = sum_xx = sum_yy = sum_cos = sum_sin = sum_squared = 0.0
+        for p in particles:
+            w = p.weight
+            total += w
+            sum_x += w * p.x
+            sum_y += w * p.y
+            sum_xx += w * p.x * p.x
+            sum_yy += w * p.y * p.y
+            sum_cos += w * math.cos(p.theta)
+            sum_sin += w * math.sin(p.theta)
+            sum_squared += w * w
+        if total <= 0:
+            return
+        mean_x = sum_x / total
+        mean_y = sum_y / total
+        std_x = math.sqrt(max(sum_xx / total - mean_x * mean_x, 0.0))
+        std_y = math.sqrt(max(sum_yy / total - mean_y * mean_y, 0.0))
+        self._send(PARTICLES, stamp, _PARTICLES.pack(
+            len(particles), mean_x, mean_y, math.atan2(sum_sin, sum_cos), std_x, std_y,
+            total * total / sum_squared))
+
+    def map_delta(self, stamp, width, cells, states):
+        """地图增量: 状态变化的单元索引及其新状态，超出单个数据报时分片发送"""
+        if not self.enabled or not cells:
+            return
+        for start in range(0, len(cells), MAX_DELTA_CELLS):
+            chunk = cells[start:start + MAX_DELTA_CELLS]
+            payload = (_MAP_DELTA.pack(width, len(chunk)) + array('I', chunk).tobytes() +
+                       bytes(states[index] for index in chunk))
+            self._send(MAP_DELTA, stamp, payload)
+
+    def timings(self, stamp, stages):
+        """各阶段耗时 {名称: 秒}，以毫秒 float32 发送"""
+        if not self.enabled:
+            return
+        parts = [bytes((len(stages),))]
+        for name, seconds in stages.items():
+            encoded = name.encode('utf-8')[:255]
+            parts.append(bytes((len(encoded),)) + encoded + _TIMING.pack(seconds * 1000.0))
+        self._send(TIMINGS, stamp, b''.join(parts))
+
+    def close(self):
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+        self.enabled = False
+
+
+def decode(datagram):
+    """解包一个遥测数据报为字典；不是遥测消息时返回 None"""
+    if len(datagram) < _HEADER.size:
+        return None
+    magic, kind, sequence, stamp = _HEADER.unpack_from(datagram)
+    if magic != MAGIC:
+        return None
+    message = {'type': kind, 'sequence': sequence, 'time': stamp}
+    offset = _HEADER.size
+    if kind == POSE:
+        x, y, theta, source = _POSE.unpack_from(datagram, offset)
+        names = {code: name for name, code in POSE_SOURCES.items()}
+        message.update(x=x, y=y, theta=theta, source=names.get(source, 'unknown'))
+    elif kind == PARTICLES:
+        count, x, y, theta, std_x, std_y, effective = _PARTICLES.unpack_from(datagram, offset)
+        message.update(count=count, x=x, y=y, theta=theta, std_x=std_x, std_y=std_y,
+                       effective=effective)
+    elif kind == MAP_DELTA:
+        width, count = _MAP_DELTA.unpack_from(datagram, offset)
+        offset += _MAP_DELTA.size
+        cells = array('I')
+        cells.frombytes(datagram[offset:offset + 4 * count])
+        states = datagram[offset + 4 * count:offset + 5 * count]
+        message.update(width=width, cells=list(cells), states=list(states))
+    elif kind == TIMINGS:
+        count = datagram[offset]
+        offset += 1
+        stages = {}
+        for _ in range(count):
+            length = datagram[offset]
+            name = datagram[offset + 1:offset + 1 + length].decode('utf-8')
+            offset += 1 + length
+            stages[name] = _TIMING.unpack_from(datagram, offset)[0]
+            offset += _TIMING.size
+        message['stages_ms'] = stages
+    return message
+
+
+def open_receiver(address, timeout=0.5):
+    """绑定接收端套接字（Unix域地址会先删除残留的套接字文件）"""
+    family, target = parse_address(address)
+    receiver = socket.socket(family, socket.SOCK_DGRAM)
+    if family == socket.AF_UNIX and os.path.exists(target):
+        os.unlink(target)
+    receiver.bind(target)
+    receiver.settimeout(timeout)
+    return receiver
+
+
+def main():
+    parser = argparse.ArgumentParser(description="遥测监听/录制工具")
+    parser.add_argument("address", nargs="?", default="udp://127.0.0.1:5600",
+                        help="udp://host:port 或 unix:///path")
+    parser.add_argument("--record", default=None, help="把原始数据报（长度前缀）录制到文件")
+    parser.add_argument("--interval", type=float, default=1.0, help="摘要打印间隔（秒）")
+    args = parser.parse_args()
+
+    receiver = open_receiver(args.address)
+    record = open(args.record, 'wb') if args.record else None
+    counts = {}
+    latest = {}
+    last_print = time.monotonic()
+    print(f"监听遥测: {args.address}（Ctrl+C 结束）")
+    try:
+        while True:
+            try:
+                datagram = receiver.recv(65536)
+            except socket.timeout:
+                datagram = None
+            if datagram:
+                if record:
+                    record.write(struct.pack('<H', len(datagram)) + datagram)
+                message = decode(datagram)
+                if message:
+                    counts[message['type']] = counts.get(message['type'], 0) + 1
+                    latest[message['type']] = message
+            if time.monotonic() - last_print >= args.interval:
+                last_print = time.monotonic()
+                pose = latest.get(POSE)
+                timing = latest.get(TIMINGS)
+                text = f"消息数 位姿{counts.get(POSE, 0)} 粒子{counts.get(PARTICLES, 0)} " \
+                       f"地图{counts.get(MAP_DELTA, 0)} 耗时{counts.get(TIMINGS, 0)}"
+                if pose:
+                    text += f" | t={pose['time']:.1f}s 位姿({pose['x']:.2f}, {pose['y']:.2f}, {pose['theta']:.2f})"
+                if timing:
+                    text += " | " + ", ".join(f"{name} {ms:.1f}ms" for name, ms in timing['stages_ms'].items())
+                print(text)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.close()
+        if record:
+            record.close()
+
+
+if __name__ == "__main__":
+    main()
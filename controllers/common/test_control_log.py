@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+控制循环日志测试
+验证按键限流与计数、输出端卡住时不阻塞也不丢记录
+"""
+
+import io
+import json
+import os
+import tempfile
+import threading
+
+from control_log import ControlLogger
+
+
+class BlockedStream(io.StringIO):
+    """在 release 事件置位之前，每次写入都卡住的输出端"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.writing = threading.Event()
+
+    def write(self, text):
+        self.writing.set()
+        self.release.wait()
+        return super().write(text)
+
+
+def test_rate_limit_counts_suppressed():
+    """同一键1秒内只输出一条，被限流的条数附在下一条和关闭汇总里；无键消息不限流"""
+    now = [0.0]
+    stream = io.StringIO()
+    record_file = os.path.join(tempfile.mkdtemp(), "log.jsonl")
+    logger = ControlLogger(stream=stream, record_file=record_file,
+                           rate_limits={'escape': 1.0}, clock=lambda: now[0])
+    for step in range(40):
+        now[0] = step * 0.064
+        logger.info('escape', "右转脱困: 右侧空间{:.2f}m", 0.5)
+        logger.info(None, "第{}步", step)
+    logger.close()
+
+    lines = stream.getvalue().splitlines()
+    escape_lines = [line for line in lines if "脱困" in line]
+    # 0秒、1.024秒、2.048秒各输出一条
+    assert len(escape_lines) == 3
+    assert escape_lines[0] == "右转脱困: 右侧空间0.50m"
+    assert escape_lines[1].endswith("(期间另有15条已限流)")
+    assert sum(1 for line in lines if line.startswith("第")) == 40
+    assert lines[-1] == "[escape] 另有7条消息被限流合并"
+    assert escape_lines[2].endswith("(期间另有15条已限流)")
+    assert logger.suppressed_total == 15 + 15 + 7
+
+    with open(record_file, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    escape_records = [record for record in records if record['key'] == 'escape']
+    assert [record['suppressed'] for record in escape_records] == [0, 15, 15, 0]
+    assert escape_records[1]['time'] == 1.024
+
+
+def test_blocked_sink_never_blocks_or_drops():
+    """输出端卡住时控制线程的调用照常返回，缓冲区扩容，放行后所有记录按顺序写出"""
+    stream = BlockedStream()
+    logger = ControlLogger(stream=stream, capacity=8, flush_interval=0.001)
+    logger.info(None, "消息{}", 0)
+    assert stream.writing.wait(5.0)  # 后台写出线程已卡在输出端
+
+    control = threading.Thread(target=lambda: [logger.info(None, "消息{}", i) for i in range(1, 500)],
+                               daemon=True)
+    control.start()
+    control.join(5.0)
+    assert not control.is_alive(), "控制线程被输出端阻塞"
+    assert logger.pushed == 500 and logger.grow_count >= 1
+
+    stream.release.set()
+    logger.close()
+    lines = stream.getvalue().splitlines()
+    assert lines == [f"消息{i}" for i in range(500)]
+    print(f"输出端卡住期间记录500条，缓冲区峰值 {logger.high_water} 条，扩容 {logger.grow_count} 次")
+
+
+if __name__ == "__main__":
+    print("=== 控制循环日志测试 ===\n")
+    test_rate_limit_counts_suppressed()
+    test_blocked_sink_never_blocks_or_drops()
+    print("\n 控制循环日志测试完成！")
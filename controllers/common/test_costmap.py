@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+膨胀代价地图测试
+验证增量距离场与暴力计算一致、代价随间隙单调下降（独立于Webots）
+"""
+
+import math
+import random
+
+from costmap import INF, Costmap
+from occupancy_grid import OccupancyGrid
+from path_planner import astar
+
+
+def brute_force_distances(grid, max_distance):
+    """逐个障碍物暴力计算截断距离场（栅格单位）"""
+    width = grid.width
+    reach = int(max_distance) + 1
+    best = {}
+    for index, state in enumerate(grid.state):
+        if state != grid.OCCUPIED:
+            continue
+        ox, oy = index % width, index // width
+        for y in range(max(0, oy - reach), min(grid.height, oy + reach + 1)):
+            for x in range(max(0, ox - reach), min(width, ox + reach + 1)):
+                distance = math.hypot(x - ox, y - oy)
+                if distance <= max_distance and distance < best.get(y * width + x, INF):
+                    best[y * width + x] = distance
+    return [best.get(index, INF) for index in range(len(grid.state))]
+
+
+def set_cells(grid, cells, state):
+    for index in cells:
+        grid.state[index] = state
+    return list(cells)
+
+
+def test_incremental_matches_brute_force():
+    """加墙、随机增删、拆墙后，距离场都与暴力结果完全一致"""
+    random.seed(1)
+    grid = OccupancyGrid(resolution=0.05, width_m=3.2, height_m=3.2, origin=(-1.6, -1.6))
+    width = grid.width
+    costmap = Costmap(grid)
+
+    wall = [20 * width + k for k in range(10, 50)] + [k * width + 30 for k in range(10, 50)]
+    costmap.update(set_cells(grid, wall, grid.OCCUPIED))
+    assert list(costmap.distance_cells) == brute_force_distances(grid, costmap.max_distance)
+
+    for round_index in range(4):
+        changed = []
+        for _ in range(15):
+            index = random.randrange(len(grid.state))
+            grid.state[index] = grid.FREE if grid.state[index] == grid.OCCUPIED else grid.OCCUPIED
+            changed.append(index)
+        changed += set_cells(grid, wall[round_index * 8:round_index * 8 + 5], grid.FREE)
+        touched = costmap.update(changed)
+        assert len(touched) < len(grid.state) / 2
+        assert list(costmap.distance_cells) == brute_force_distances(grid, costmap.max_distance)
+
+
+def test_cost_and_planning_keep_clearance():
+    """代价随距离单调下降；带膨胀代价的路径不再贴墙"""
+    grid = OccupancyGrid(resolution=0.05, width_m=2.0, height_m=2.0, origin=(0.0, 0.0))
+    width = grid.width
+    costmap = Costmap(grid)
+    wall = [20 * width + k for k in range(width)]
+    costmap.update(set_cells(grid, wall, grid.OCCUPIED))
+
+    costs = [costmap.cost((20 + k) * width + 10) for k in range(12)]
+    assert costs[0] == INF
+    assert all(a >= b for a, b in zip(costs[1:], costs[2:]))
+    assert costs[-1] == 1.0
+    assert abs(costmap.clearance(*grid.cell_to_world(10, 25)) - 0.25) < 1e-9
+
+    start, goal = 21 * width + 2, 21 * width + 37
+    plain = astar(grid, start, goal)
+    inflated = astar(grid, start, goal, cell_cost=costmap)
+    closest = min(costmap.distance(index) for index in inflated[5:-5])
+    assert min(costmap.distance(index) for index in plain) < 0.1
+    assert closest >= costmap.inflation_radius - grid.resolution
+    print(f"膨胀后路径最小间隙: {closest:.2f}米")
+
+
+if __name__ == "__main__":
+    print("=== 膨胀代价地图测试 ===\n")
+    test_incremental_matches_brute_force()
+    test_cost_and_planning_keep_clearance()
+    print("\n 代价地图测试完成！")
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+LRU 缓存测试
+验证容量淘汰顺序和命中/未命中计数
+"""
+
+from lru_cache import LRUCache
+
+
+def test_eviction_and_counters():
+    """超出容量时淘汰最久未使用的条目；get 会刷新使用顺序"""
+    cache = LRUCache(capacity=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1      # a 变为最近使用
+    cache.put('c', 3)               # 淘汰 b
+    assert 'b' not in cache and len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 2, 'hit_rate': 2 / 3}
+    cache.clear()
+    assert len(cache) == 0 and cache.hits == 2
+
+
+if __name__ == "__main__":
+    print("=== LRU 缓存测试 ===\n")
+    test_eviction_and_counters()
+    print("\n LRU 缓存测试完成！")
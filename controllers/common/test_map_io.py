@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+建图日志读写测试
+验证分块流式解析与整体读取一致、坏行被跳过，障碍物推断与逐方向三角函数结果一致，以及体素降采样/轨迹抽稀
+"""
+
+import math
+import os
+import tempfile
+
+from map_io import (DATA_HEADER, count_records, decimate_path, infer_obstacles, iter_log_chunks, load_log,
+                    load_map_points)
+
+
+def write_log(rows):
+    path = os.path.join(tempfile.mkdtemp(), "simple_map_data.txt")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("=== 地图数据 ===\n\n=== 扫描数据 ===\n")
+        f.write(DATA_HEADER + "\n")
+        for row in rows:
+            f.write(row + "\n")
+        f.write("\n=== 统计信息 ===\n平均距离: 1.00m\n")
+    return path
+
+
+def test_chunked_parsing():
+    """分块结果拼接后与整体读取一致；字段不足和无法解析的行被跳过"""
+    rows = [f"{i},{i * 0.064:.3f},{i * 0.01:.3f},0.5,{i * 0.1:.3f},0.8,2.0,inf,0.4,0.4" for i in range(25)]
+    rows.insert(3, "坏行,1,2,3,4,5,6,7,8,9")
+    rows.insert(7, "1,2,3")
+    path = write_log(rows)
+
+    chunks = list(iter_log_chunks(path, chunk_rows=4))
+    assert len(chunks) == 7
+    log = load_log(path)
+    assert len(log) == count_records(path) == 25
+    assert list(log.step) == [float(i) for i in range(25)]
+    assert [value for chunk in chunks for value in chunk.x] == list(log.x)
+    assert math.isinf(log.right[0]) and log.back[5] == 0.4
+
+
+def test_obstacle_inference_matches_trig():
+    """一次 cos/sin 的旋转与四个方向分别求三角函数的结果一致"""
+    rows = ["0,0.0,1.0,2.0,0.7,0.5,0.9,0.3,0.6,0.3",
+            "1,0.1,1.5,2.0,-2.0,3.0,0.8,inf,5.0,0.8",
+            "2,0.2,0.0,0.0,0.0,3.0,3.0,3.0,3.0,3.0"]
+    path = write_log(rows)
+    obstacles = infer_obstacles(load_log(path), max_distance=1.0)
+
+    expected = []
+    for row in rows:
+        values = [float(v) for v in row.split(',')]
+        x, y, angle = values[2:5]
+        if values[9] < 1.0:
+            for distance, offset in zip(values[5:9], (0.0, math.pi / 2, -math.pi / 2, math.pi)):
+                if distance < 1.0:
+                    expected.append((x + distance * math.cos(angle + offset),
+                                     y + distance * math.sin(angle + offset)))
+    assert len(obstacles) == len(expected) == 5
+    for (ax, ay), (bx, by) in zip(obstacles, expected):
+        assert abs(ax - bx) < 1e-12 and abs(ay - by) < 1e-12
+
+    map_points = load_map_points(path)
+    assert map_points['records'] == 3
+    assert map_points['free_space'] == [(1.0, 2.0), (1.5, 2.0), (0.0, 0.0)]
+
+
+
+def test_voxel_and_path_decimation():
+    """体素降采样保留命中总数且每个原始点都靠近某个质心；分块抽稀轨迹与整体抽稀一致"""
+    rows = []
+    for i in range(400):
+        # 沿 x 方向往返行驶，前方0.5米处始终有墙
+        x = (i % 100) * 0.01 if (i // 100) % 2 == 0 else (99 - i % 100) * 0.01
+        rows.append(f"{i},{i * 0.064:.3f},{x:.3f},0.0,0.0,5.0,0.5,5.0,5.0,0.5")
+    path = write_log(rows)
+    raw = load_map_points(path)
+    reduced = load_map_points(path, chunk_rows=32, voxel_size=0.1, path_spacing=0.1)
+
+    assert len(raw['obstacles']) == 400 and sum(reduced['obstacle_hits']) == 400
+    assert len(reduced['obstacles']) == 10
+    for x, y in raw['obstacles']:
+        assert min(math.hypot(x - cx, y - cy) for cx, cy in reduced['obstacles']) < 0.1
+    assert reduced['free_space'] == decimate_path(raw['free_space'], 0.1)
+    assert len(reduced['free_space']) <= 40 and reduced['records'] == 400
+
+
+if __name__ == "__main__":
+    print("=== 建图日志读写测试 ===\n")
+    test_chunked_parsing()
+    test_obstacle_inference_matches_trig()
+    test_voxel_and_path_decimation()
+    print("\n 建图日志读写测试完成！")
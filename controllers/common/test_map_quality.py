@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+世界几何解析与地图质量评分测试
+验证 .wbt 解析结果、旋转箱体几何，以及完美/偏移地图的评分差异
+"""
+
+import math
+import time
+
+from map_quality import GroundTruth, ground_truth, score_map
+from world_geometry import geometry_from_nodes, load_world, parse_wbt
+
+
+def test_parse_world_file():
+    """真实世界文件: 半径3米圆形场地、10个0.3米木箱和机器人初始位姿"""
+    geometry = load_world()
+    assert geometry.arena_radius == 3.0
+    assert len(geometry.boxes) == 10
+    assert all(abs(box.half_x - 0.15) < 1e-9 and abs(box.half_y - 0.15) < 1e-9 for box in geometry.boxes)
+    x, y, yaw = geometry.robot_pose
+    assert abs(x - 0.319) < 0.01 and abs(y - 0.023) < 0.01 and abs(yaw) < 0.1
+
+
+def test_rotated_box():
+    """绕z轴旋转45度的长方体: 旋转后的角点在内部，未旋转的角点在外部"""
+    text = '''
+    #VRML_SIM R2023b utf8
+    EXTERNPROTO "https://example.com/WoodenBox.proto"
+    RectangleArena { floorSize 4 2 }
+    WoodenBox { translation 1 0 0.1 rotation 0 0 1 0.785398 name "box" size 0.4 0.2 0.2 }
+    '''
+    geometry = geometry_from_nodes(parse_wbt(text))
+    assert geometry.arena_half_size == (2.0, 1.0)
+    box = geometry.boxes[0]
+    assert abs(box.yaw - math.pi / 4) < 1e-6
+    assert box.contains(1 + 0.19 * math.cos(math.pi / 4), 0.19 * math.sin(math.pi / 4))
+    assert not box.contains(1.15, -0.08)
+    assert abs(geometry.surface_distance(-1.0, 0.0) - 1.0) < 1e-9
+
+
+def test_score_perfect_and_shifted_map():
+    """完美地图IoU为1，整体偏移两个单元后各项指标下降；评分只需毫秒级"""
+    truth = ground_truth()
+    perfect = [truth.index_to_world(index) for index in truth.occupied]
+    score = score_map(truth, perfect)
+    assert score['iou'] == 1.0 and score['precision'] == 1.0 and score['recall'] == 1.0
+    assert score['wall_error'] < truth.resolution / 2
+
+    start = time.perf_counter()
+    shifted = score_map(truth, [(x + 0.1, y) for x, y in perfect])
+    elapsed = (time.perf_counter() - start) * 1000
+    assert shifted['iou'] < 0.5
+    assert shifted['precision'] < 0.9
+    assert shifted['wall_error'] > score['wall_error']
+    print(f"评分用时 {elapsed:.1f} 毫秒，偏移地图IoU {shifted['iou']:.3f}")
+
+
+def test_ground_truth_states():
+    """箱体内部不可观测，场地中心为自由空间"""
+    truth = GroundTruth(load_world(), resolution=0.1)
+    box = truth.geometry.boxes[0]
+    assert truth.cells_of([(box.cx, box.cy)]).isdisjoint(truth.occupied)
+    index = next(iter(truth.cells_of([(box.cx, box.cy)])))
+    assert truth.state[index] == 3
+    index = next(iter(truth.cells_of([(0.0, 0.0)])))
+    assert truth.state[index] == 1
+
+
+if __name__ == "__main__":
+    print("=== 地图质量评分测试 ===\n")
+    test_parse_world_file()
+    test_rotated_box()
+    test_score_perfect_and_shifted_map()
+    test_ground_truth_states()
+    print("\n 地图质量评分测试完成！")
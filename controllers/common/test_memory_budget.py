@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+内存统计与预算测试
+验证占用估算精度、超出预算时的转存，以及转存后记录的完整读回
+"""
+
+import os
+import tempfile
+import tracemalloc
+
+from memory_budget import MemoryMonitor, SpillList, estimate_size
+
+
+def make_record(i):
+    return {'step': i, 'time': i * 0.032, 'position': (i * 0.01, -i * 0.01), 'angle': i * 0.001,
+            'distances': {'front': i + 0.1, 'left': i + 0.2, 'right': i + 0.3, 'back': i + 0.4}}
+
+
+def test_estimate_close_to_tracemalloc():
+    """抽样估算与 tracemalloc 实测的分配量相差不超过10%"""
+    tracemalloc.start()
+    records = [make_record(i) for i in range(20000)]
+    actual = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert abs(estimate_size(records) - actual) < 0.1 * actual
+
+
+def test_spill_over_budget_and_read_back():
+    """超出预算的 SpillList 被转存到磁盘；迭代、切片和下标仍按原顺序给出全部记录"""
+    records = SpillList(os.path.join(tempfile.mkdtemp(), "records.spill"))
+    monitor = MemoryMonitor(interval=100)
+    monitor.track('records', lambda: records, budget_mb=0.05, spill=True)
+    monitor.track('other', lambda: [0.5] * 10000, budget_mb=0.01)
+
+    lines = []
+    for step in range(1000):
+        records.append(make_record(step))
+        report = monitor.check(step)
+        assert (report != []) == (step % 100 == 0)
+        lines.extend(report)
+    assert records.spilled > 0 and len(records.memory) < 1000
+    assert sum('转存' in line for line in lines) >= 5
+    assert sum('警告' in line for line in lines) == 1  # 持续超出预算只警告一次
+
+    assert len(records) == 1000
+    assert [r['step'] for r in records] == list(range(1000))
+    assert [r['step'] for r in records[::3]] == list(range(0, 1000, 3))
+    assert records[5]['step'] == 5 and records[-1]['step'] == 999
+    assert all(records[i]['step'] == i for i in range(0, 1000, 7))
+    assert len(records.chunk_starts) == len(records.chunk_offsets) >= 5  # 每次转存一个块，下标只读所在块
+    for index in (1000, -1001):
+        try:
+            records[index]
+            assert False, f"下标 {index} 越界应抛出 IndexError"
+        except IndexError:
+            pass
+    assert monitor.summary()['records']['spilled'] == records.spilled
+
+    records.close()
+    assert not os.path.exists(records.filename)
+    monitor.close()
+
+
+def test_leftover_spill_file_is_replaced():
+    """上一次运行留下的转存文件不会混入新列表的记录"""
+    filename = os.path.join(tempfile.mkdtemp(), "records.spill")
+    old = SpillList(filename)
+    old.append('old1')
+    old.append('old2')
+    old.spill()  # 保存失败，文件未删除
+
+    records = SpillList(filename)
+    assert len(records) == 0 and list(records) == []
+    records.append('new1')
+    records.spill()
+    records.append('new2')
+    records.spill()
+    records.append('new3')
+    assert len(records) == 3
+    assert list(records) == ['new1', 'new2', 'new3']
+    assert records[0] == 'new1' and records[1] == 'new2' and records[-1] == 'new3'
+    records.close()
+
+
+if __name__ == "__main__":
+    print("=== 内存统计与预算测试 ===\n")
+    test_estimate_close_to_tracemalloc()
+    test_spill_over_budget_and_read_back()
+    test_leftover_spill_file_is_replaced()
+    print("\n 内存统计与预算测试完成！")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+在线统计测试
+验证 Welford 均值/方差、P² 分位数、自动扩展直方图和抽稀序列与整体计算的结果一致
+"""
+
+import math
+import random
+import statistics
+
+from online_stats import DecimatedSeries, P2Quantile, RunningStats, StreamingHistogram
+
+
+def test_running_stats_matches_batch():
+    """大偏移量数据上 Welford 结果与 statistics 模块一致"""
+    random.seed(1)
+    data = [1e6 + random.gauss(0, 0.5) for _ in range(5000)]
+    stats = RunningStats()
+    for value in data:
+        stats.add(value)
+    assert stats.count == 5000
+    assert abs(stats.mean - statistics.mean(data)) < 1e-6
+    assert abs(stats.std - statistics.stdev(data)) < 1e-6
+    assert stats.minimum == min(data) and stats.maximum == max(data)
+
+
+def test_p2_quantiles_close_to_exact():
+    """P² 估计与排序后的精确分位数相差很小；样本不足5个时精确插值"""
+    random.seed(2)
+    data = [random.expovariate(2.0) for _ in range(20000)]
+    ordered = sorted(data)
+    for p in (0.5, 0.9, 0.95):
+        quantile = P2Quantile(p)
+        for value in data:
+            quantile.add(value)
+        exact = ordered[int(p * (len(ordered) - 1))]
+        assert abs(quantile.value - exact) < 0.02 * exact + 0.005, (p, quantile.value, exact)
+
+    small = P2Quantile(0.5)
+    for value in (3.0, 1.0, 2.0):
+        small.add(value)
+    assert small.value == 2.0
+    assert math.isnan(P2Quantile(0.9).value)
+
+
+def test_histogram_grows_without_known_maximum():
+    """先小后大的数据: 范围自动扩展，重新分桶与按最大值直接分桶一致"""
+    data = [0.01 * i for i in range(1, 101)] + [5.0 - 0.01 * i for i in range(200)]
+    histogram = StreamingHistogram()
+    for value in data:
+        histogram.add(value)
+    upper = max(data)
+    expected = [0] * 10
+    for value in data:
+        expected[min(int(value / (upper / 10)), 9)] += 1
+    assert histogram.bins(10, upper) == expected
+    assert sum(histogram.counts) == len(data)
+
+
+def test_decimated_series_bounded():
+    """抽稀序列的长度不超过容量，保留的样本都落在当前步长的整数倍上"""
+    series = DecimatedSeries(capacity=64, stride=5)
+    for i in range(100000):
+        series.add(i)
+    assert len(series) < 64
+    assert series.stride > 5 and all(i % series.stride == 0 for i in series)
+    assert list(series)[:2] == [0, series.stride]
+
+    short = DecimatedSeries(capacity=64, stride=5)
+    for i in range(100):
+        short.add(i)
+    assert list(short) == list(range(0, 100, 5))
+
+
+if __name__ == "__main__":
+    print("=== 在线统计测试 ===\n")
+    test_running_stats_matches_batch()
+    test_p2_quantiles_close_to_exact()
+    test_histogram_grows_without_known_maximum()
+    test_decimated_series_bounded()
+    print("\n 在线统计测试完成！")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+栅格路径规划测试
+验证A*绕开障碍、D* Lite在地图变化后增量修复且结果与从头规划一致（独立于Webots）
+"""
+
+import random
+
+from occupancy_grid import OccupancyGrid
+from path_planner import SQRT2, DStarLite, GridCost, astar, edge_cost
+
+
+def path_cost(grid, path):
+    cell_cost = GridCost(grid)
+    total = 0.0
+    for a, b in zip(path, path[1:]):
+        diagonal = a % grid.width != b % grid.width and a // grid.width != b // grid.width
+        total += edge_cost(cell_cost, a, b, SQRT2 if diagonal else 1.0)
+    return total
+
+
+def random_grid(seed, density=0.2):
+    random.seed(seed)
+    grid = OccupancyGrid()
+    for index in range(len(grid.state)):
+        grid.state[index] = grid.OCCUPIED if random.random() < density else grid.FREE
+    return grid
+
+
+def test_astar_detours_around_wall():
+    """竖墙留一个缺口，路径必须穿过缺口"""
+    grid = OccupancyGrid(resolution=0.1, width_m=2.0, height_m=2.0, origin=(0.0, 0.0))
+    width = grid.width
+    for gy in range(grid.height):
+        if gy != 15:
+            grid.state[gy * width + 10] = grid.OCCUPIED
+    path = astar(grid, 2 * width + 2, 2 * width + 18)
+    assert path is not None
+    assert 15 * width + 10 in path
+    assert all(grid.state[index] != grid.OCCUPIED for index in path)
+
+    grid.state[15 * width + 10] = grid.OCCUPIED
+    assert astar(grid, 2 * width + 2, 2 * width + 18) is None
+
+
+def test_dstar_lite_repairs_incrementally():
+    """随机地图上机器人前进并不断出现新障碍，每次增量重规划的代价都与A*一致且展开少于从头规划"""
+    rng = random.Random(7)
+    initial_total = repair_total = repairs = 0
+    for trial in range(12):
+        grid = random_grid(trial)
+        cells = len(grid.state)
+        start, goal = rng.randrange(cells), rng.randrange(cells)
+        grid.state[start] = grid.state[goal] = grid.FREE
+
+        planner = DStarLite(grid)
+        path = planner.plan(start, goal)
+        initial_total += planner.expansions
+        for _ in range(6):
+            if path is not None and len(path) > 3:
+                planner.move_start(path[3])
+            blocked = [index for index in rng.sample(range(cells), 50)
+                       if index not in (planner.start, goal)]
+            for index in blocked:
+                grid.state[index] = grid.OCCUPIED
+            before = planner.expansions
+            planner.update_cells(blocked)
+            path = planner.path()
+            repair_total += planner.expansions - before
+            repairs += 1
+            reference = astar(grid, planner.start, goal)
+            assert (path is None) == (reference is None)
+            if path is not None:
+                assert path[0] == planner.start and path[-1] == goal
+                assert all(grid.state[index] != grid.OCCUPIED for index in path)
+                assert abs(path_cost(grid, path) - path_cost(grid, reference)) < 1e-6
+    assert repair_total / repairs < initial_total / 12
+    print(f"首次规划平均展开 {initial_total / 12:.0f} 次，增量重规划平均展开 {repair_total / repairs:.0f} 次")
+
+
+if __name__ == "__main__":
+    print("=== 路径规划测试 ===\n")
+    test_astar_detours_around_wall()
+    test_dstar_lite_repairs_incrementally()
+    print("\n 路径规划测试完成！")
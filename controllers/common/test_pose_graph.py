@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+位姿图优化测试
+测试里程计漂移在回环约束下被修正（独立于Webots）
+"""
+
+import math
+
+from odometry import WheelOdometry
+from pose_graph import PoseGraph, PoseGraphTracker, compose, relative, diagonal_information
+
+
+def square_path(laps=2, side_steps=10, step=0.2):
+    """沿边长2米的正方形行驶的真实相对运动序列"""
+    moves = []
+    for _ in range(laps * 4):
+        moves.extend([(step, 0.0, 0.0)] * side_steps)
+        moves.append((0.0, 0.0, math.pi / 2))
+    return moves
+
+
+def test_compose_relative_roundtrip():
+    """relative 是 compose 的逆运算"""
+    a = (1.0, -2.0, 0.7)
+    b = (0.3, 0.4, -1.2)
+    c = relative(a, compose(a, b))
+    assert all(abs(u - v) < 1e-9 for u, v in zip(b, c))
+
+
+def test_loop_closure_corrects_drift():
+    """带航向偏差的里程计绕两圈后，回环约束把误差压回到小范围"""
+    moves = square_path()
+    truth = [(0.0, 0.0, 0.0)]
+    for move in moves:
+        truth.append(compose(truth[-1], move))
+
+    tracker = PoseGraphTracker(keyframe_distance=0.1, min_loop_gap=20)
+    for node, move in enumerate(moves, start=1):
+        tracker.add_motion(move[0], move[1], move[2] + 0.02)  # 每步航向偏差0.02弧度
+        if node >= 44 and node % 4 == 0:
+            previous = node - 44  # 第二圈与第一圈相同位置
+            tracker.add_loop_closure(previous, node, relative(truth[previous], truth[node]))
+
+    drift = math.hypot(tracker.pose[0] - truth[-1][0], tracker.pose[1] - truth[-1][1])
+    assert len(tracker.graph.poses) == len(truth)
+    assert tracker.loop_closures > 0
+    assert drift < 0.1, drift
+    print(f"关键帧: {len(tracker.graph.poses)}, 回环: {tracker.loop_closures}, 终点误差: {drift:.3f}米")
+
+
+def test_reset_clears_graph_and_keyframes():
+    """reset 后只剩位于给定位姿的首个关键帧，参数和匹配器保持不变"""
+    def matcher(reference, scan, guess):
+        return None
+
+    tracker = PoseGraphTracker(keyframe_distance=0.1, min_loop_gap=20, matcher=matcher)
+    for move in square_path(laps=1):
+        tracker.add_motion(*move, scan=[1.0] * 8)
+    tracker.add_motion(0.05, 0.0, 0.0)
+    tracker.add_loop_closure(0, 4, (0.4, 0.0, 0.0))
+
+    tracker.reset((1.0, 2.0, 0.5))
+    assert tracker.graph.poses == [(1.0, 2.0, 0.5)] and tracker.graph.edges == []
+    assert tracker.keyframe_scans == [None] and tracker.motion == (0.0, 0.0, 0.0)
+    assert tracker.spatial_index == {tracker._cell((1.0, 2.0, 0.5)): [0]}
+    assert tracker.loop_closures == 0 and tracker.optimizations == 0
+    assert tracker.keyframe_distance == 0.1 and tracker.min_loop_gap == 20 and tracker.matcher is matcher
+    assert tracker.pose == (1.0, 2.0, 0.5)
+
+
+def test_optimize_only_touches_window():
+    """start之前的节点在优化中保持不变"""
+    graph = PoseGraph()
+    information = diagonal_information(0.05, 0.05)
+    for k in range(6):
+        graph.add_node((k * 1.1, 0.0, 0.0))
+        if k:
+            graph.add_edge(k - 1, k, (1.0, 0.0, 0.0), information)
+    before = list(graph.poses)
+    graph.optimize(start=3)
+
+    assert graph.poses[:3] == before[:3]
+    assert abs(graph.poses[5][0] - (before[2][0] + 3.0)) < 1e-6
+    assert graph.chi2() > 0  # 固定节点之间的误差无法消除
+
+
+def test_wheel_odometry_straight_and_turn():
+    """编码器增量转换为相对运动"""
+    odometry = WheelOdometry(wheel_radius=0.033, wheel_base=0.16)
+    odometry.update(0.0, 0.0)
+    dx, dy, dtheta = odometry.update(10.0, 10.0)
+    assert abs(dx - 0.33) < 1e-9 and abs(dy) < 1e-9 and abs(dtheta) < 1e-9
+
+    dx, dy, dtheta = odometry.update(9.0, 11.0)
+    assert abs(dx) < 1e-9 and abs(dtheta - 2 * 0.033 / 0.16) < 1e-9
+
+
+if __name__ == "__main__":
+    print("=== 位姿图优化测试 ===\n")
+    test_compose_relative_roundtrip()
+    test_loop_closure_corrects_drift()
+    test_reset_clears_graph_and_keyframes()
+    test_optimize_only_touches_window()
+    test_wheel_odometry_straight_and_turn()
+    print("\n 位姿图测试完成！")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+光栅绘图测试
+验证画线端点、矩形裁剪、PPM输出和 LTTB 抽稀保留拐角
+"""
+
+from raster import Raster, WorldView, lttb
+
+RED = (255, 0, 0)
+
+
+def pixel(raster, x, y):
+    offset = 3 * (y * raster.width + x)
+    return tuple(raster.pixels[offset:offset + 3])
+
+
+def test_drawing_and_clipping():
+    """直线覆盖两个端点，越界矩形被裁剪，副本与原图互不影响"""
+    raster = Raster(20, 10, (0, 0, 0))
+    raster.line(2, 1, 17, 8, RED)
+    assert pixel(raster, 2, 1) == RED and pixel(raster, 17, 8) == RED
+    assert sum(1 for i in range(0, len(raster.pixels), 3) if raster.pixels[i] == 255) == 16
+
+    frame = raster.copy()
+    frame.fill_rect(-5, -5, 3, 3, (0, 255, 0))
+    assert pixel(frame, 0, 0) == (0, 255, 0) and pixel(frame, 3, 3) == (0, 0, 0)
+    assert pixel(raster, 0, 0) == (0, 0, 0)
+    assert len(frame.pixels) == 20 * 10 * 3
+
+    data = frame.to_ppm()
+    assert data.startswith(b"P6\n20 10\n255\n") and len(data) == len(b"P6\n20 10\n255\n") + 600
+
+    view = WorldView(0.0, 0.0, 1.0, 1.0, scale=10.0, margin=0.0)
+    assert view.to_pixel(0.0, 1.0) == (0, 0)
+    assert view.to_pixel(1.0, 0.0) == (10, 10)
+
+
+def test_lttb_keeps_corners():
+    """L形长轨迹抽稀到少量点: 保留首尾和拐角，下标递增"""
+    points = [(i * 0.01, 0.0) for i in range(500)] + [(4.99, i * 0.01) for i in range(1, 500)]
+    kept = lttb(points, 20)
+    assert len(kept) == 20
+    assert kept[0] == 0 and kept[-1] == len(points) - 1
+    assert kept == sorted(kept)
+    corner = min(kept, key=lambda i: abs(i - 499))
+    assert abs(corner - 499) <= 2
+    assert lttb(points[:10], 20) == list(range(10))
+
+
+if __name__ == "__main__":
+    print("=== 光栅绘图测试 ===\n")
+    test_drawing_and_clipping()
+    test_lttb_keeps_corners()
+    print("\n 光栅绘图测试完成！")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+激光里程计前端测试
+在解析的方形房间中合成扫描，验证扫描匹配修正有偏差的轮式里程计（独立于Webots）
+"""
+
+import math
+import random
+import time
+
+from occupancy_grid import lidar_beam_angle
+from pose_graph import compose
+from scan_matcher import LidarOdometry, ScanMatcher
+
+
+def square(cx, cy, half):
+    corners = [(cx - half, cy - half), (cx + half, cy - half),
+               (cx + half, cy + half), (cx - half, cy + half)]
+    return [(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+
+
+# 4x4米房间 + 三个木箱
+WALLS = square(0.0, 0.0, 2.0) + square(1.3, 1.3, 0.15) + square(-1.0, -0.6, 0.15) + square(0.3, -1.2, 0.15)
+
+
+def cast(x, y, angle, max_range=3.5):
+    dx, dy = math.cos(angle), math.sin(angle)
+    best = float('inf')
+    for (x1, y1), (x2, y2) in WALLS:
+        ex, ey = x2 - x1, y2 - y1
+        den = dx * ey - dy * ex
+        if abs(den) < 1e-12:
+            continue
+        t = ((x1 - x) * ey - (y1 - y) * ex) / den
+        u = ((x1 - x) * dy - (y1 - y) * dx) / den
+        if t > 0 and 0 <= u <= 1 and t < best:
+            best = t
+    return best if best < max_range else float('inf')
+
+
+def synthetic_scan(pose, count=360, noise=0.01):
+    x, y, theta = pose
+    return [cast(x, y, theta + lidar_beam_angle(i, count)) + random.gauss(0, noise)
+            for i in range(count)]
+
+
+def test_match_recovers_offset():
+    """有界窗口内从零初值恢复平移和旋转"""
+    random.seed(1)
+    matcher = ScanMatcher()
+    reference = matcher.prepare_reference(synthetic_scan((0.0, 0.0, 0.0)))
+    points = matcher.prepare_points(synthetic_scan((0.04, -0.03, 0.06)))
+    pose, score = matcher.match(reference, points, (0.0, 0.0, 0.0))
+    assert score > 0.5
+    assert math.hypot(pose[0] - 0.04, pose[1] + 0.03) < 0.01
+    assert abs(pose[2] - 0.06) < 0.01
+
+
+def test_lidar_odometry_beats_wheel_drift():
+    """轮式里程计系统性偏差（距离+10%，转角-20%）被扫描匹配修正（单帧耗时只打印，不作为断言）"""
+    random.seed(0)
+    odometry = LidarOdometry()
+    true_pose = estimate = wheel = (0.0, 0.0, 0.0)
+    worst = 0.0
+    for step in range(150):
+        move = (0.012, 0.0, 0.03 if step % 40 < 20 else -0.02)
+        true_pose = compose(true_pose, move)
+        guess = (move[0] * 1.1, 0.0, move[2] * 0.8)
+        wheel = compose(wheel, guess)
+        scan = synthetic_scan(true_pose)
+        start = time.perf_counter()
+        estimate = compose(estimate, odometry.update(scan, guess))
+        worst = max(worst, time.perf_counter() - start)
+
+    position_error = math.hypot(estimate[0] - true_pose[0], estimate[1] - true_pose[1])
+    wheel_error = math.hypot(wheel[0] - true_pose[0], wheel[1] - true_pose[1])
+    print(f"激光里程计误差 {position_error:.3f}m, 轮式里程计误差 {wheel_error:.3f}m, "
+          f"最大单帧耗时 {worst * 1000:.1f}ms")
+    assert odometry.rejected == 0
+    assert position_error < 0.1 and position_error < wheel_error / 3
+    assert abs(estimate[2] - true_pose[2]) < 0.05
+
+
+if __name__ == "__main__":
+    print("=== 激光里程计测试 ===\n")
+    test_match_recovers_offset()
+    test_lidar_odometry_beats_wheel_drift()
+    print("\n 激光里程计测试完成！")
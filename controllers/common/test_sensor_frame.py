@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+传感器帧测试
+验证每周期只读取一次设备，以及截断距离、扇区最小值和光束端点视图
+"""
+
+import math
+
+from sensor_frame import SensorFrame
+
+
+class FakeLidar:
+    def __init__(self, ranges):
+        self.ranges = ranges
+        self.reads = 0
+
+    def getRangeImage(self):
+        self.reads += 1
+        return list(self.ranges)
+
+
+class FakeCompass:
+    def getValues(self):
+        return [1.0, 0.0, 0.0]  # 朝向 +y
+
+
+def test_single_fetch_and_views():
+    """一个周期内多次访问视图只读取一次激光；inf 截断为最大距离"""
+    ranges = [2.0] * 360
+    ranges[180] = float('inf')  # 正前方无回波
+    ranges[90] = 0.5            # 左侧
+    ranges[275] = 0.3           # 右侧扇区内
+    lidar = FakeLidar(ranges)
+    frame = SensorFrame(lidar, compass=FakeCompass(), max_range=5.0)
+    frame.update()
+    for _ in range(3):
+        front, left, right, back = frame.cardinal()
+        frame.sector_minima()
+        frame.clamped()
+    assert lidar.reads == 1
+    assert (front, left, right, back) == (5.0, 0.5, 2.0, 2.0)
+    assert frame.sector_minima() == (2.0, 0.5, 2.0, 0.3)  # 后、左、前、右
+    assert frame.clamped()[180] == 5.0
+    assert abs(frame.heading - math.pi / 2) < 1e-12
+
+    lidar.ranges = [1.0] * 360
+    frame.update()
+    assert lidar.reads == 2 and frame.cardinal() == (1.0, 1.0, 1.0, 1.0)
+
+
+def test_endpoints():
+    """光束端点与 lidar_beam_angle 约定一致，超量程光束被丢弃"""
+    ranges = [float('inf')] * 360
+    ranges[180] = 1.0  # 正前方
+    ranges[90] = 2.0   # 左侧
+    frame = SensorFrame(FakeLidar(ranges)).update()
+    points = frame.endpoints(1.0, 1.0, math.pi / 2)
+    assert [index for index, _, _ in points] == [90, 180]
+    _, x, y = points[1]
+    assert abs(x - 1.0) < 1e-9 and abs(y - 2.0) < 1e-9
+    _, x, y = points[0]
+    assert abs(x + 1.0) < 1e-9 and abs(y - 1.0) < 1e-9
+
+
+if __name__ == "__main__":
+    print("=== 传感器帧测试 ===\n")
+    test_single_fetch_and_views()
+    test_endpoints()
+    print("\n 传感器帧测试完成！")
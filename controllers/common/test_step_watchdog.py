@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+控制周期看门狗测试
+用可控时钟验证超时计数、持续超预算时逐级降级、恢复余量后逐级回升
+"""
+
+from step_watchdog import StepWatchdog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_steps(watchdog, clock, count, work):
+    changes = 0
+    for _ in range(count):
+        watchdog.begin()
+        clock.now += work
+        changes += watchdog.end()
+    return changes
+
+
+def test_degrade_and_restore():
+    """64毫秒预算: 每步80毫秒时每隔 hold_steps 降一级直到最大；每步10毫秒时逐级回升"""
+    clock = FakeClock()
+    watchdog = StepWatchdog(64, max_level=3, hold_steps=10, clock=clock)
+    run_steps(watchdog, clock, 5, 0.010)
+    assert watchdog.level == 0 and watchdog.overruns == 0
+
+    assert run_steps(watchdog, clock, 45, 0.080) == 3
+    assert watchdog.level == 3 and watchdog.overruns == 45
+    assert watchdog.interpolate(100, 40) == 40
+
+    run_steps(watchdog, clock, 15, 0.010)
+    assert watchdog.level == 2
+    assert watchdog.interpolate(100, 40) == 60
+    run_steps(watchdog, clock, 30, 0.010)
+    assert watchdog.level == 0 and not watchdog.degraded
+
+    summary = watchdog.summary()
+    assert summary['steps'] == 95 and summary['level_changes'] == 6
+    assert abs(summary['worst_ms'] - 80.0) < 1e-9
+    assert watchdog.end() is False  # 没有 begin 的 end 被忽略
+
+
+if __name__ == "__main__":
+    print("=== 控制周期看门狗测试 ===\n")
+    test_degrade_and_restore()
+    print("\n 控制周期看门狗测试完成！")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+实时遥测测试
+验证UDP/Unix域套接字往返解包、地图增量分片，以及没有接收端时只计数丢弃不阻塞
+"""
+
+import math
+import os
+import tempfile
+
+from telemetry import (MAP_DELTA, MAX_DELTA_CELLS, PARTICLES, POSE, TIMINGS,
+                       TelemetryPublisher, decode, open_receiver)
+
+
+class FakeParticle:
+    def __init__(self, x, y, theta, weight):
+        self.x = x
+        self.y = y
+        self.theta = theta
+        self.weight = weight
+
+
+class FullSocket:
+    """发送缓冲区已满的非阻塞套接字: sendto 总是抛出 BlockingIOError"""
+
+    def __init__(self):
+        self.attempts = 0
+
+    def sendto(self, data, address):
+        self.attempts += 1
+        raise BlockingIOError("发送缓冲区已满")
+
+    def close(self):
+        pass
+
+
+def receive_all(receiver, count):
+    return [decode(receiver.recv(65536)) for _ in range(count)]
+
+
+def test_udp_round_trip():
+    """位姿、粒子摘要、耗时经UDP发出后能原样解包"""
+    receiver = open_receiver("udp://127.0.0.1:0", timeout=2.0)
+    port = receiver.getsockname()[1]
+    publisher = TelemetryPublisher(f"udp://127.0.0.1:{port}")
+    particles = [FakeParticle(1.0, 2.0, 0.1, 1.0), FakeParticle(3.0, 2.0, -0.1, 1.0)]
+    publisher.pose(1.5, 0.25, -0.5, 1.0, 'pose_graph')
+    publisher.particles(1.5, particles)
+    publisher.timings(1.5, {'predict': 0.001, 'update': 0.0025})
+    pose, summary, timing = receive_all(receiver, 3)
+    publisher.close()
+    receiver.close()
+
+    assert pose['type'] == POSE and pose['source'] == 'pose_graph'
+    assert abs(pose['x'] - 0.25) < 1e-6 and abs(pose['time'] - 1.5) < 1e-6
+    assert summary['type'] == PARTICLES and summary['count'] == 2
+    assert abs(summary['x'] - 2.0) < 1e-6 and abs(summary['std_x'] - 1.0) < 1e-6
+    assert abs(summary['theta']) < 1e-6 and abs(summary['effective'] - 2.0) < 1e-6
+    assert timing['type'] == TIMINGS
+    assert abs(timing['stages_ms']['update'] - 2.5) < 1e-4
+    assert [pose['sequence'], summary['sequence'], timing['sequence']] == [1, 2, 3]
+
+
+def test_unix_map_delta_chunked():
+    """地图增量超出单个数据报时分片，拼接后与原始变化一致"""
+    path = os.path.join(tempfile.mkdtemp(), "telemetry.sock")
+    receiver = open_receiver("unix://" + path, timeout=2.0)
+    publisher = TelemetryPublisher("unix://" + path)
+    width = 400
+    states = bytearray(width * width)
+    cells = list(range(0, 3 * MAX_DELTA_CELLS + 10, 3))
+    for index in cells:
+        states[index] = index % 3
+    publisher.map_delta(2.0, width, cells, states)
+    chunk_count = math.ceil(len(cells) / MAX_DELTA_CELLS)
+    messages = receive_all(receiver, chunk_count)
+    publisher.close()
+    receiver.close()
+
+    assert all(message['type'] == MAP_DELTA and message['width'] == width for message in messages)
+    assert [cell for message in messages for cell in message['cells']] == cells
+    assert [state for message in messages for state in message['states']] == [index % 3 for index in cells]
+
+
+def test_no_receiver_drops_without_blocking():
+    """接收端不存在时发送失败只计入 dropped，不抛异常也不阻塞；未配置地址时是空操作"""
+    path = os.path.join(tempfile.mkdtemp(), "missing.sock")
+    publisher = TelemetryPublisher("unix://" + path)
+    assert publisher.socket.gettimeout() == 0.0  # 非阻塞套接字: 发不出去立即返回错误而不是等待
+    for step in range(1000):
+        publisher.pose(step * 0.064, 0.0, 0.0, 0.0)
+    assert publisher.dropped == 1000 and publisher.sent == 0
+    publisher.close()
+
+    full = TelemetryPublisher("udp://127.0.0.1:9")
+    full.socket.close()
+    full.socket = FullSocket()
+    full.pose(0.0, 1.0, 1.0, 0.0)
+    full.timings(0.0, {'map': 0.01})
+    assert full.socket.attempts == 2 and full.dropped == 2 and full.sent == 0
+    full.close()
+
+    disabled = TelemetryPublisher(None)
+    disabled.pose(0.0, 1.0, 1.0, 0.0)
+    disabled.timings(0.0, {'map': 0.01})
+    assert not disabled.enabled and disabled.sequence == 0
+    assert decode(b"\x00" * 3) is None
+
+
+if __name__ == "__main__":
+    print("=== 实时遥测测试 ===\n")
+    test_udp_round_trip()
+    test_unix_map_delta_chunked()
+    test_no_receiver_drops_without_blocking()
+    print("\n 实时遥测测试完成！")
@@ -0,0 +1,256 @@
+"""
+Webots世界文件几何解析 - 无外部依赖版本
+把 .wbt 中的场地和箱体编译成二维几何（圆形/矩形场地内壁 + 有朝向的矩形障碍物），
+供真值栅格、地图质量评分和无头仿真共用
+"""
+
+import math
+import os
+import re
+
+DEFAULT_WORLD = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'tb_world', 'turtlebot3_burger_world.wbt')
+
+# 箱体类PROTO及其默认边长（米），与Webots PROTO默认值一致
+BOX_PROTOS = {
+    'WoodenBox': (0.6, 0.6),
+    'CardboardBox': (0.6, 0.6),
+    'PlasticCrate': (0.6, 0.6),
+}
+
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]|[^\s{}\[\]"]+')
+
+
+def tokenize(text):
+    """VRML分词: 去掉 # 注释，字符串保持完整"""
+    tokens = []
+    for line in text.splitlines():
+        if '#' in line:
+            # 注释符只在字符串外生效
+            quoted = False
+            for i, char in enumerate(line):
+                if char == '"':
+                    quoted = not quoted
+                elif char == '#' and not quoted:
+                    line = line[:i]
+                    break
+        tokens.extend(_TOKEN.findall(line))
+    return tokens
+
+
+def _scalar(token):
+    if token.startswith('"'):
+        return token[1:-1]
+    if token in ('TRUE', 'FALSE'):
+        return token == 'TRUE'
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def _is_identifier(token):
+    return token[:1].isalpha() and token not in ('TRUE', 'FALSE', 'NULL')
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse_nodes(self):
+        """顶层: 跳过 EXTERNPROTO 声明，依次解析节点"""
+        nodes = []
+        while self.peek() is not None:
+            token = self.peek()
+            if token in ('EXTERNPROTO', 'IMPORTABLE'):
+                self.take()
+                continue
+            if token.startswith('"'):
+                self.take()
+                continue
+            nodes.append(self.parse_node())
+        return nodes
+
+    def parse_node(self):
+        name = None
+        if self.peek() == 'DEF':
+            self.take()
+            name = self.take()
+        if self.peek() == 'USE':
+            self.take()
+            return {'type': 'USE', 'def': name, 'fields': {'name': self.take()}}
+        node_type = self.take()
+        node = {'type': node_type, 'def': name, 'fields': {}}
+        if self.peek() != '{':
+            return node
+        self.take()
+        while self.peek() not in ('}', None):
+            field = self.take()
+            if field == 'hidden':
+                continue
+            node['fields'][field] = self.parse_value()
+        self.take()
+        return node
+
+    def parse_value(self):
+        token = self.peek()
+        if token == '[':
+            self.take()
+            items = []
+            while self.peek() not in (']', None):
+                if (_is_identifier(self.peek()) and self.peek(1) == '{') or self.peek() in ('DEF', 'USE'):
+                    items.append(self.parse_node())
+                else:
+                    items.append(_scalar(self.take()))
+            self.take()
+            return items
+        if token in ('DEF', 'USE') or (_is_identifier(token) and self.peek(1) == '{'):
+            return self.parse_node()
+        # 标量序列: 直到下一个字段名或节点结束
+        values = [_scalar(self.take())]
+        while self.peek() is not None and self.peek() not in ('}', ']') and not _is_identifier(self.peek()):
+            values.append(_scalar(self.take()))
+        return values if len(values) > 1 else values[0]
+
+
+def parse_wbt(text):
+    """解析 .wbt 文本，返回顶层节点列表 [{'type', 'def', 'fields'}, ...]"""
+    return _Parser(tokenize(text)).parse_nodes()
+
+
+class Box:
+    """有朝向的矩形障碍物（俯视投影）"""
+
+    def __init__(self, cx, cy, half_x, half_y, yaw=0.0, name=""):
+        self.cx = cx
+        self.cy = cy
+        self.half_x = half_x
+        self.half_y = half_y
+        self.yaw = yaw
+        self.name = name
+        self.cos = math.cos(yaw)
+        self.sin = math.sin(yaw)
+
+    def to_local(self, x, y):
+        dx, dy = x - self.cx, y - self.cy
+        return self.cos * dx + self.sin * dy, -self.sin * dx + self.cos * dy
+
+    def contains(self, x, y):
+        lx, ly = self.to_local(x, y)
+        return abs(lx) <= self.half_x and abs(ly) <= self.half_y
+
+    def distance(self, x, y):
+        """到边界的距离（内外都为正）"""
+        lx, ly = self.to_local(x, y)
+        ox = abs(lx) - self.half_x
+        oy = abs(ly) - self.half_y
+        if ox <= 0 and oy <= 0:
+            return -max(ox, oy)
+        return math.hypot(max(ox, 0.0), max(oy, 0.0))
+
+    def radius(self):
+        """外接圆半径"""
+        return math.hypot(self.half_x, self.half_y)
+
+
+class WorldGeometry:
+    """二维世界: 场地内壁（圆形或矩形）+ 箱体障碍物"""
+
+    def __init__(self, arena_radius=None, arena_half_size=None, boxes=None):
+        self.arena_radius = arena_radius        # 圆形场地内壁半径
+        self.arena_half_size = arena_half_size  # 矩形场地内壁半长 (hx, hy)
+        self.boxes = boxes or []
+        self.robot_pose = None  # 世界文件中机器人的初始位姿 (x, y, yaw)
+
+    def inside_arena(self, x, y):
+        if self.arena_radius is not None:
+            return math.hypot(x, y) <= self.arena_radius
+        if self.arena_half_size is not None:
+            return abs(x) <= self.arena_half_size[0] and abs(y) <= self.arena_half_size[1]
+        return True
+
+    def inside_obstacle(self, x, y):
+        """点是否在墙外或箱体内部"""
+        return not self.inside_arena(x, y) or any(box.contains(x, y) for box in self.boxes)
+
+    def surface_distance(self, x, y):
+        """到最近墙面/箱体表面的距离（米）"""
+        best = float('inf')
+        if self.arena_radius is not None:
+            best = abs(self.arena_radius - math.hypot(x, y))
+        elif self.arena_half_size is not None:
+            hx, hy = self.arena_half_size
+            if abs(x) <= hx and abs(y) <= hy:
+                best = min(hx - abs(x), hy - abs(y))
+            else:
+                best = math.hypot(max(abs(x) - hx, 0.0), max(abs(y) - hy, 0.0))
+        for box in self.boxes:
+            distance = box.distance(x, y)
+            if distance < best:
+                best = distance
+        return best
+
+    def extent(self):
+        """包含场地的最小正方形半边长"""
+        if self.arena_radius is not None:
+            return self.arena_radius
+        if self.arena_half_size is not None:
+            return max(self.arena_half_size)
+        return max((max(abs(b.cx), abs(b.cy)) + b.radius() for b in self.boxes), default=1.0)
+
+
+def _vector(fields, name, default):
+    value = fields.get(name, default)
+    if not isinstance(value, list):
+        value = [value]
+    return [float(v) for v in value]
+
+
+def _yaw(fields):
+    """轴角旋转 (x y z angle) 对应旋转矩阵在水平面上的偏航角"""
+    axis_x, axis_y, axis_z, angle = _vector(fields, 'rotation', [0, 0, 1, 0])
+    norm = math.sqrt(axis_x ** 2 + axis_y ** 2 + axis_z ** 2) or 1.0
+    axis_x, axis_y, axis_z = axis_x / norm, axis_y / norm, axis_z / norm
+    c, s = math.cos(angle), math.sin(angle)
+    r00 = c + axis_x * axis_x * (1 - c)
+    r10 = axis_y * axis_x * (1 - c) + axis_z * s
+    return math.atan2(r10, r00)
+
+
+def geometry_from_nodes(nodes):
+    """从解析后的顶层节点提取场地和箱体"""
+    geometry = WorldGeometry()
+    for node in nodes:
+        node_type = node['type']
+        fields = node['fields']
+        if node_type == 'CircleArena':
+            geometry.arena_radius = float(fields.get('radius', 1.0))
+        elif node_type == 'RectangleArena':
+            size_x, size_y = _vector(fields, 'floorSize', [1.0, 1.0])
+            geometry.arena_half_size = (size_x / 2, size_y / 2)
+        elif node_type in BOX_PROTOS:
+            default_x, default_y = BOX_PROTOS[node_type]
+            size = _vector(fields, 'size', [default_x, default_y, default_x])
+            x, y = _vector(fields, 'translation', [0, 0, 0])[:2]
+            geometry.boxes.append(Box(x, y, size[0] / 2, size[1] / 2, _yaw(fields),
+                                      fields.get('name', node_type)))
+        elif 'controller' in fields and geometry.robot_pose is None:
+            x, y = _vector(fields, 'translation', [0, 0, 0])[:2]
+            geometry.robot_pose = (x, y, _yaw(fields))
+    return geometry
+
+
+def load_world(path=DEFAULT_WORLD):
+    """读取 .wbt 文件并编译为 WorldGeometry"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return geometry_from_nodes(parse_wbt(f.read()))
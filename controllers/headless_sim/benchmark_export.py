@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+建图收尾流水线基准测试 - 在录制的建图日志及其放大的合成版本上计时
+阶段: 日志解析（map_io.load_log 并转换为扫描记录）、栅格构建（merge_maps.accumulate_log）、
+日志导出（save_simple_map 写主文件和备份）、ASCII导出（create_simple_visualization）、
+PPM导出（create_ppm_image）；报告 记录/秒、MB/秒，以及放大后单条记录耗时的变化
+例: python benchmark_export.py --scales 10,30 --repeat 3 --csv /tmp/bench.csv
+"""
+
+import argparse
+import math
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+
+from run_headless import CONTROLLERS_DIR, controller_environment
+
+sys.path.append(os.path.join(CONTROLLERS_DIR, 'common'))
+sys.path.append(os.path.join(CONTROLLERS_DIR, 'localization_controller'))
+
+from map_io import load_log  # noqa: E402
+from merge_maps import accumulate_log, default_log_paths, unique_logs  # noqa: E402
+
+CONTROLLERS = {
+    'auto': ("mapping_controller_auto", "AutoMappingController"),
+    'manual': ("mapping_controller", "MinimalMappingController"),
+}
+STAGES = ('parse', 'grid', 'log_export', 'ascii_export', 'ppm_export')
+STAGE_NAMES = {'parse': "日志解析", 'grid': "栅格构建", 'log_export': "日志导出",
+               'ascii_export': "ASCII导出", 'ppm_export': "PPM导出"}
+MB = 1024 * 1024
+
+
+def scan_records(log):
+    """列式 MapLog -> 与控制器 scan_data 相同的记录字典"""
+    records = []
+    for step, stamp, x, y, angle, distances, min_distance in zip(
+            log.step, log.time, log.x, log.y, log.angle, log.distances(), log.min_distance):
+        finite = [d for d in distances if d != float('inf')]
+        records.append({
+            'step': int(step),
+            'time': stamp,
+            'position': (x, y),
+            'angle': angle,
+            'distances': dict(zip(('front', 'left', 'right', 'back'), distances)),
+            'min_distance': min_distance,
+            'avg_distance': sum(finite) / 4,
+        })
+    return records
+
+
+def scale_records(records, factor):
+    """记录首尾相接重复 factor 次（步数和时间顺延），模拟长 factor 倍的探索"""
+    step_span = records[-1]['step'] + 1
+    duration = records[-1]['time'] - records[0]['time']
+    time_span = duration + duration / max(len(records) - 1, 1)
+    scaled = []
+    for k in range(factor):
+        for record in records:
+            copy = dict(record)
+            copy['step'] = record['step'] + k * step_span
+            copy['time'] = record['time'] + k * time_span
+            scaled.append(copy)
+    return scaled
+
+
+def timed(function, repeat):
+    """在新的临时目录中重复执行 function，返回 (最短耗时, 写出文件总字节数, 返回值)"""
+    best = math.inf
+    size = 0
+    result = None
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix="bench_export_")
+        saved_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            start = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - start)
+            size = sum(os.path.getsize(name) for name in os.listdir(workdir))
+        finally:
+            os.chdir(saved_cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+    return best, size, result
+
+
+def write_synthetic_log(mapper, records, directory):
+    """用控制器自己的日志导出写出合成日志，返回日志路径"""
+    os.makedirs(directory, exist_ok=True)
+    saved_cwd = os.getcwd()
+    mapper.scan_data = records
+    mapper.create_simple_visualization = lambda: None
+    try:
+        os.chdir(directory)
+        mapper.save_simple_map()
+    finally:
+        del mapper.create_simple_visualization
+        os.chdir(saved_cwd)
+    return os.path.join(directory, "simple_map_data.txt")
+
+
+def bench_dataset(mapper, log_path, repeat):
+    """对一个日志计时五个阶段，返回 (记录数, {阶段: (耗时秒, 字节数)})"""
+    input_bytes = os.path.getsize(log_path)
+    stages = {}
+    elapsed, _, records = timed(lambda: scan_records(load_log(log_path)), repeat)
+    stages['parse'] = (elapsed, input_bytes)
+    elapsed, _, _ = timed(lambda: accumulate_log(log_path), repeat)
+    stages['grid'] = (elapsed, input_bytes)
+
+    mapper.scan_data = records
+    mapper.create_simple_visualization = lambda: None  # 只计日志导出
+    try:
+        elapsed, size, _ = timed(mapper.save_simple_map, repeat)
+    finally:
+        del mapper.create_simple_visualization
+    stages['log_export'] = (elapsed, size)
+
+    grids = []
+    mapper.create_ppm_image = grids.append  # 只计ASCII导出，保留网格给PPM阶段
+    try:
+        elapsed, size, _ = timed(mapper.create_simple_visualization, repeat)
+    finally:
+        del mapper.create_ppm_image
+    stages['ascii_export'] = (elapsed, size)
+    elapsed, size, _ = timed(lambda: mapper.create_ppm_image(grids[-1]), repeat)
+    stages['ppm_export'] = (elapsed, size)
+    return len(records), stages
+
+
+def run_benchmark(controllers=('auto', 'manual'), paths=None, scales=(10,), repeat=3):
+    """计时各控制器在录制日志和合成日志上的收尾流水线，返回结果行列表
+
+    合成日志由最大的录制日志按 scales 中的倍数放大，用第一个控制器的日志导出写出。
+    """
+    if paths is None:
+        paths = default_log_paths(os.path.join(CONTROLLERS_DIR, 'localization_controller'))
+    paths = unique_logs([os.path.abspath(path) for path in paths])
+    base_path = max(paths, key=os.path.getsize)
+    base_records = scan_records(load_log(base_path))
+    data_dir = tempfile.mkdtemp(prefix="bench_logs_")
+
+    rows = []
+    try:
+        datasets = [(os.path.basename(path), path, 1) for path in paths]
+        for index, key in enumerate(controllers):
+            name, class_name = CONTROLLERS[key]
+            with controller_environment(name, quiet=True, workdir=data_dir, steps=1):
+                mapper = runpy.run_path(os.path.join(CONTROLLERS_DIR, name, name + ".py"),
+                                        run_name="benchmark_export")[class_name]()
+                try:
+                    if index == 0:
+                        for factor in scales:
+                            path = write_synthetic_log(mapper, scale_records(base_records, factor),
+                                                       os.path.join(data_dir, f"x{factor}"))
+                            datasets.append((f"合成×{factor}", path, factor))
+                    for dataset, path, factor in datasets:
+                        count, stages = bench_dataset(mapper, path, repeat)
+                        for stage in STAGES:
+                            seconds, size = stages[stage]
+                            rows.append({'controller': key, 'dataset': dataset, 'scale': factor,
+                                         'base': path == base_path, 'records': count, 'stage': stage,
+                                         'seconds': seconds, 'bytes': size,
+                                         'records_per_s': count / seconds if seconds > 0 else math.inf,
+                                         'mb_per_s': size / MB / seconds if seconds > 0 else math.inf})
+                finally:
+                    if hasattr(mapper, 'log'):
+                        mapper.log.close()
+                    mapper.telemetry.close()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return rows
+
+
+def scaling(rows, controller):
+    """各放大倍数下每阶段单条记录耗时相对原始最大日志的倍数 {倍数: {阶段: 倍数}}"""
+    base = {row['stage']: row['seconds'] / row['records'] for row in rows
+            if row['controller'] == controller and row['base']}
+    ratios = {}
+    for row in rows:
+        if row['controller'] == controller and row['scale'] > 1:
+            ratios.setdefault(row['scale'], {})[row['stage']] = row['seconds'] / row['records'] / base[row['stage']]
+    return ratios
+
+
+def write_csv(filename, rows):
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("控制器,数据集,倍数,记录数,阶段,耗时(秒),字节数,记录/秒,MB/秒\n")
+        for row in rows:
+            f.write(f"{row['controller']},{row['dataset']},{row['scale']},{row['records']},{row['stage']},"
+                    f"{row['seconds']:.6f},{row['bytes']},{row['records_per_s']:.0f},{row['mb_per_s']:.3f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="建图日志解析、栅格构建和导出的基准测试")
+    parser.add_argument("logs", nargs="*", help="建图日志（默认手动建图结果和自动建图目录下的所有日志）")
+    parser.add_argument("--scales", default="10", help="合成日志的放大倍数，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段重复次数（取最短）")
+    parser.add_argument("--controllers", default="auto,manual", help="计时哪些控制器的导出: auto,manual")
+    parser.add_argument("--csv", default=None, help="结果CSV文件")
+    args = parser.parse_args()
+
+    scales = tuple(int(value) for value in args.scales.split(',') if value)
+    controllers = tuple(args.controllers.split(','))
+    start = time.perf_counter()
+    rows = run_benchmark(controllers, args.logs or None, scales, args.repeat)
+
+    for key in controllers:
+        name, _ = CONTROLLERS[key]
+        print(f"\n=== {name} ===")
+        print(f"{'数据集':<28}{'记录数':>8}  {'阶段':<10}{'耗时(ms)':>10}{'记录/秒':>12}{'MB/秒':>9}")
+        for row in rows:
+            if row['controller'] == key:
+                print(f"{row['dataset']:<28}{row['records']:>8}  {STAGE_NAMES[row['stage']]:<10}"
+                      f"{row['seconds'] * 1000:>10.1f}{row['records_per_s']:>12.0f}{row['mb_per_s']:>9.2f}")
+        for factor, ratios in sorted(scaling(rows, key).items()):
+            summary = ", ".join(f"{STAGE_NAMES[stage]} ×{ratios[stage]:.2f}" for stage in STAGES)
+            print(f"放大{factor}倍后单条记录耗时: {summary}")
+    print(f"\n基准测试完成, 用时 {time.perf_counter() - start:.1f} 秒")
+    if args.csv:
+        write_csv(args.csv, rows)
+        print(f"结果CSV: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+无头二维仿真 - Webots `controller` 模块的本地替身（无外部依赖）
+提供 Robot / Motor / PositionSensor / Lidar / GPS / Compass / Keyboard，
+差速驱动运动学 + 360线激光解析光线投射（世界几何由 common/world_geometry.py 从 .wbt 编译），
+使未修改的控制器可以脱离Webots运行。
+
+用法: 把本目录放到 sys.path 最前面（run_headless.py 会自动处理），不要放进 common/，
+以免在Webots中遮蔽真正的 controller 模块。
+"""
+
+import math
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from world_geometry import DEFAULT_WORLD, load_world
+
+# TurtleBot3 Burger 参数
+WHEEL_RADIUS = 0.033
+WHEEL_BASE = 0.16
+ROBOT_RADIUS = 0.09
+MAX_WHEEL_VELOCITY = 6.67
+
+# LDS-01 参数
+LIDAR_RESOLUTION = 360
+LIDAR_MIN_RANGE = 0.12
+LIDAR_MAX_RANGE = 3.5
+
+# 运行参数默认值，可被 configure() 或 HEADLESS_SIM_* 环境变量覆盖
+_DEFAULTS = {
+    'steps': 3000,          # 最大仿真步数，之后 Robot.step 返回 -1
+    'timestep': 64,         # basicTimeStep（毫秒）
+    'world': DEFAULT_WORLD, # Webots世界文件（场地和箱体几何）
+    'pose': None,           # 初始位姿 (x, y, theta)，默认取世界文件中机器人的位姿
+    'seed': 0,
+    'lidar_noise': 0.0,     # 激光测距高斯噪声标准差（米）
+    'disable': (),          # 模拟缺失的设备名，如 ('gps', 'compass')
+    'keys': (),             # 键盘脚本 [(步数, 键值), ...]，键从该步起保持按下直到下一条，键值-1为松开
+}
+_config = {}
+simulation = None  # 最近一次创建的仿真实例，供运行脚本读取统计
+
+
+def configure(**options):
+    """设置下一次创建 Robot 时使用的仿真参数（替换之前的设置）"""
+    for name in options:
+        if name not in _DEFAULTS:
+            raise ValueError(f"未知仿真参数: {name}")
+    _config.clear()
+    _config.update(options)
+
+
+def parse_keys(text):
+    """解析键盘脚本 "步数:键,步数:键"，键为单个字符，留空表示松开"""
+    keys = []
+    for item in text.split(','):
+        step, key = item.split(':', 1)
+        keys.append((int(step), ord(key) if key else -1))
+    return tuple(keys)
+
+
+def _env_options():
+    """从 HEADLESS_SIM_* 环境变量读取参数（供子进程/命令行使用）"""
+    options = {}
+    if os.environ.get('HEADLESS_SIM_STEPS'):
+        options['steps'] = int(os.environ['HEADLESS_SIM_STEPS'])
+    if os.environ.get('HEADLESS_SIM_SEED'):
+        options['seed'] = int(os.environ['HEADLESS_SIM_SEED'])
+    if os.environ.get('HEADLESS_SIM_WORLD'):
+        options['world'] = os.environ['HEADLESS_SIM_WORLD']
+    if os.environ.get('HEADLESS_SIM_POSE'):
+        options['pose'] = tuple(float(v) for v in os.environ['HEADLESS_SIM_POSE'].split(','))
+    if os.environ.get('HEADLESS_SIM_NOISE'):
+        options['lidar_noise'] = float(os.environ['HEADLESS_SIM_NOISE'])
+    if os.environ.get('HEADLESS_SIM_DISABLE'):
+        options['disable'] = tuple(os.environ['HEADLESS_SIM_DISABLE'].split(','))
+    if os.environ.get('HEADLESS_SIM_KEYS'):
+        options['keys'] = parse_keys(os.environ['HEADLESS_SIM_KEYS'])
+    return options
+
+
+class World:
+    """二维世界: 由 .wbt 编译的场地内壁（圆形或矩形）+ 有朝向的箱体"""
+
+    def __init__(self, geometry=None):
+        self.geometry = geometry or load_world()
+        self.arena_radius = self.geometry.arena_radius
+        self.arena_half_size = self.geometry.arena_half_size
+        self.boxes = self.geometry.boxes
+
+    def collides(self, x, y, radius=ROBOT_RADIUS):
+        """机器人圆盘是否与场地墙或箱体相交"""
+        if self.arena_radius is not None and math.hypot(x, y) + radius > self.arena_radius:
+            return True
+        if self.arena_half_size is not None and (abs(x) + radius > self.arena_half_size[0] or
+                                                 abs(y) + radius > self.arena_half_size[1]):
+            return True
+        for box in self.boxes:
+            if box.contains(x, y) or box.distance(x, y) < radius:
+                return True
+        return False
+
+    def scan(self, x, y, theta, count=LIDAR_RESOLUTION, max_range=LIDAR_MAX_RANGE):
+        """一次计算整圈 count 束激光的命中距离（束序与 Lidar 一致），无命中为inf"""
+        step = 2 * math.pi / count
+        directions = [(math.cos(theta + math.pi - step * i), math.sin(theta + math.pi - step * i))
+                      for i in range(count)]
+        distances = []
+        if self.arena_radius is not None:
+            # 圆形场地内壁: 从圆内出发的射线与圆的远交点 t = -b + sqrt(b² - c)
+            c = x * x + y * y - self.arena_radius * self.arena_radius
+            for dx, dy in directions:
+                b = x * dx + y * dy
+                distances.append(-b + math.sqrt(max(b * b - c, 0.0)))
+        elif self.arena_half_size is not None:
+            # 矩形场地内壁: 两组平行墙的出射距离取小
+            hx, hy = self.arena_half_size
+            for dx, dy in directions:
+                tx = ((hx if dx > 0 else -hx) - x) / dx if abs(dx) > 1e-12 else float('inf')
+                ty = ((hy if dy > 0 else -hy) - y) / dy if abs(dy) > 1e-12 else float('inf')
+                distances.append(min(tx, ty))
+        else:
+            distances = [float('inf')] * count
+
+        # 箱体: 由方位角直接算出可能命中的光束区间，只对这些光束在箱体坐标系中做slab求交
+        for box in self.boxes:
+            rx, ry = box.cx - x, box.cy - y
+            center_distance = math.hypot(rx, ry)
+            radius = box.radius()
+            if center_distance - radius > max_range:
+                continue
+            if center_distance <= radius:
+                candidates = range(count)
+            else:
+                spread = math.asin(radius / center_distance)
+                # 第i束的方位 = theta + π - i*step  =>  i = (theta + π - 方位) / step
+                middle = (theta + math.pi - math.atan2(ry, rx)) / step
+                first = int(math.floor(middle - spread / step))
+                last = int(math.ceil(middle + spread / step))
+                candidates = [i % count for i in range(first, last + 1)]
+            lx, ly = box.to_local(x, y)
+            x_low, x_high = -box.half_x - lx, box.half_x - lx
+            y_low, y_high = -box.half_y - ly, box.half_y - ly
+            c, s = box.cos, box.sin
+            for i in candidates:
+                wx, wy = directions[i]
+                dx, dy = c * wx + s * wy, -s * wx + c * wy
+                t_near, t_far = 0.0, distances[i]
+                if abs(dx) < 1e-12:
+                    if not x_low <= 0.0 <= x_high:
+                        continue
+                else:
+                    t1, t2 = x_low / dx, x_high / dx
+                    if t1 > t2:
+                        t1, t2 = t2, t1
+                    t_near, t_far = max(t_near, t1), min(t_far, t2)
+                if abs(dy) < 1e-12:
+                    if not y_low <= 0.0 <= y_high:
+                        continue
+                else:
+                    t1, t2 = y_low / dy, y_high / dy
+                    if t1 > t2:
+                        t1, t2 = t2, t1
+                    t_near, t_far = max(t_near, t1), min(t_far, t2)
+                if t_near <= t_far and t_near < distances[i]:
+                    distances[i] = t_near
+        return distances
+
+
+class Device:
+    def __init__(self, simulation, name):
+        self.simulation = simulation
+        self.name = name
+        self.sampling_period = 0
+
+    def enable(self, sampling_period):
+        self.sampling_period = sampling_period
+
+    def disable(self):
+        self.sampling_period = 0
+
+    def getSamplingPeriod(self):
+        return self.sampling_period
+
+    def getName(self):
+        return self.name
+
+
+class Motor(Device):
+    def __init__(self, simulation, name):
+        super().__init__(simulation, name)
+        self.velocity = 0.0
+        self.target_position = 0.0
+
+    def setPosition(self, position):
+        self.target_position = position  # 只支持速度控制模式（position=inf）
+
+    def setVelocity(self, velocity):
+        self.velocity = max(-MAX_WHEEL_VELOCITY, min(MAX_WHEEL_VELOCITY, velocity))
+
+    def getVelocity(self):
+        return self.velocity
+
+    def getMaxVelocity(self):
+        return MAX_WHEEL_VELOCITY
+
+
+class PositionSensor(Device):
+    def __init__(self, simulation, name, motor):
+        super().__init__(simulation, name)
+        self.motor = motor
+        self.position = 0.0
+
+    def getValue(self):
+        return self.position if self.sampling_period else float('nan')
+
+
+class Lidar(Device):
+    def __init__(self, simulation, name):
+        super().__init__(simulation, name)
+        self.range_image = None
+
+    def enablePointCloud(self):
+        pass
+
+    def getHorizontalResolution(self):
+        return LIDAR_RESOLUTION
+
+    def getNumberOfLayers(self):
+        return 1
+
+    def getFov(self):
+        return 2 * math.pi
+
+    def getMinRange(self):
+        return LIDAR_MIN_RANGE
+
+    def getMaxRange(self):
+        return LIDAR_MAX_RANGE
+
+    def getRangeImage(self):
+        return self.range_image if self.sampling_period else None
+
+    def refresh(self):
+        sim = self.simulation
+        # 与控制器约定一致: 第i束相对朝向的角度为 π - 2πi/n（0=后方, n/2=前方）
+        distances = sim.world.scan(*sim.pose, count=LIDAR_RESOLUTION)
+        noise = sim.lidar_noise
+        image = []
+        for distance in distances:
+            if noise:
+                distance += sim.random.gauss(0.0, noise)
+            image.append(distance if LIDAR_MIN_RANGE <= distance < LIDAR_MAX_RANGE else float('inf'))
+        self.range_image = image
+
+
+class GPS(Device):
+    def getValues(self):
+        if not self.sampling_period:
+            return [float('nan')] * 3
+        x, y, _ = self.simulation.pose
+        return [x, y, 0.0]
+
+
+class Compass(Device):
+    def getValues(self):
+        """北向(+Y)在机器人坐标系中的方向，atan2(v[0], v[1]) 即航向角"""
+        if not self.sampling_period:
+            return [float('nan')] * 3
+        theta = self.simulation.pose[2]
+        return [math.sin(theta), math.cos(theta), 0.0]
+
+
+class Keyboard:
+    END = 312
+    HOME = 313
+    LEFT = 314
+    UP = 315
+    RIGHT = 316
+    DOWN = 317
+    PAGEUP = 366
+    PAGEDOWN = 367
+    NUMPAD_HOME = 375
+    NUMPAD_LEFT = 376
+    NUMPAD_UP = 377
+    NUMPAD_RIGHT = 378
+    NUMPAD_DOWN = 379
+    NUMPAD_END = 382
+    KEY = 0xffff
+    SHIFT = 0x10000
+    CONTROL = 0x20000
+    ALT = 0x40000
+
+    def __init__(self, simulation=None):
+        self.simulation = simulation or Robot.instance.simulation
+        self.sampling_period = 0
+
+    def enable(self, sampling_period):
+        self.sampling_period = sampling_period
+
+    def disable(self):
+        self.sampling_period = 0
+
+    def getKey(self):
+        """返回脚本中当前按下的键，没有则返回-1"""
+        if not self.sampling_period:
+            return -1
+        return self.simulation.current_key()
+
+
+class Simulation:
+    """仿真状态: 世界、机器人位姿、设备，以及步进统计"""
+
+    def __init__(self, options):
+        self.world = World(load_world(options['world']))
+        self.pose = tuple(options['pose'] or self.world.geometry.robot_pose or (0.0, 0.0, 0.0))
+        self.max_steps = options['steps']
+        self.basic_timestep = options['timestep']
+        self.lidar_noise = options['lidar_noise']
+        self.random = random.Random(options['seed'])
+        self.keys = sorted(options['keys'])
+        self.steps = 0
+        self.time = 0.0
+        self.distance = 0.0
+        self.collisions = 0
+        if self.world.collides(self.pose[0], self.pose[1]):
+            raise ValueError(f"初始位姿与障碍物重叠: {self.pose}")
+
+        left_motor = Motor(self, 'left wheel motor')
+        right_motor = Motor(self, 'right wheel motor')
+        self.devices = {
+            'left wheel motor': left_motor,
+            'right wheel motor': right_motor,
+            'left wheel sensor': PositionSensor(self, 'left wheel sensor', left_motor),
+            'right wheel sensor': PositionSensor(self, 'right wheel sensor', right_motor),
+            'LDS-01': Lidar(self, 'LDS-01'),
+            'gps': GPS(self, 'gps'),
+            'compass': Compass(self, 'compass'),
+        }
+        for name in options['disable']:
+            self.devices.pop(name, None)
+
+    def current_key(self):
+        key = -1
+        for step, value in self.keys:
+            if step > self.steps:
+                break
+            key = value
+        return key
+
+    def advance(self, duration_ms):
+        """差速驱动积分一个周期；碰撞时位姿保持不变（轮子打滑，编码器照常累计）"""
+        dt = duration_ms / 1000.0
+        left = self.devices.get('left wheel motor')
+        right = self.devices.get('right wheel motor')
+        left_speed = left.velocity if left else 0.0
+        right_speed = right.velocity if right else 0.0
+        for name, speed in (('left wheel sensor', left_speed), ('right wheel sensor', right_speed)):
+            sensor = self.devices.get(name)
+            if sensor:
+                sensor.position += speed * dt
+
+        x, y, theta = self.pose
+        linear = (left_speed + right_speed) * WHEEL_RADIUS / 2
+        angular = (right_speed - left_speed) * WHEEL_RADIUS / WHEEL_BASE
+        mid = theta + angular * dt / 2
+        new_x = x + linear * dt * math.cos(mid)
+        new_y = y + linear * dt * math.sin(mid)
+        new_theta = math.atan2(math.sin(theta + angular * dt), math.cos(theta + angular * dt))
+        if self.world.collides(new_x, new_y):
+            self.collisions += 1
+            self.pose = (x, y, new_theta)
+        else:
+            self.distance += math.hypot(new_x - x, new_y - y)
+            self.pose = (new_x, new_y, new_theta)
+
+        self.steps += 1
+        self.time += dt
+        lidar = self.devices.get('LDS-01')
+        if lidar and lidar.sampling_period:
+            lidar.refresh()
+
+
+class Robot:
+    instance = None
+
+    def __init__(self):
+        global simulation
+        options = dict(_DEFAULTS)
+        options.update(_env_options())
+        options.update(_config)
+        self.simulation = simulation = Simulation(options)
+        self.keyboard = Keyboard(self.simulation)
+        Robot.instance = self
+
+    def getDevice(self, name):
+        device = self.simulation.devices.get(name)
+        if device is None:
+            print(f"Warning: \"{name}\" device not found.")
+        return device
+
+    def getKeyboard(self):
+        return self.keyboard
+
+    def getBasicTimeStep(self):
+        return float(self.simulation.basic_timestep)
+
+    def getTime(self):
+        return self.simulation.time
+
+    def getName(self):
+        return "TurtleBot3Burger"
+
+    def step(self, duration=None):
+        """推进一个周期；达到最大步数时返回-1（相当于仿真结束）"""
+        sim = self.simulation
+        if sim.steps >= sim.max_steps:
+            return -1
+        sim.advance(duration or sim.basic_timestep)
+        return 0
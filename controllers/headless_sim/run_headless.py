@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+无头运行控制器 - 用本目录的 controller 替身代替Webots执行未修改的控制器脚本
+例: python run_headless.py mapping_controller_auto --steps 2000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import runpy
+import sys
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTROLLERS_DIR = os.path.dirname(SIM_DIR)
+
+import controller  # noqa: E402  本目录的仿真替身
+
+
+@contextlib.contextmanager
+def controller_environment(name, quiet=False, workdir=None, **options):
+    """配置仿真并切换到控制器的运行环境，产出 (控制器脚本路径, 输出缓冲)
+
+    workdir 为控制器输出文件的目录（默认与Webots一致为控制器目录），并行运行时应各自独立。
+    """
+    script = os.path.join(CONTROLLERS_DIR, name, name + ".py")
+    if not os.path.exists(script):
+        raise FileNotFoundError(f"找不到控制器脚本: {script}")
+
+    controller.configure(**options)
+    controller_dir = os.path.dirname(script)
+    if workdir:
+        os.makedirs(workdir, exist_ok=True)
+    saved_cwd = os.getcwd()
+    saved_path = list(sys.path)
+    output = io.StringIO()
+    try:
+        # 与Webots一致: 工作目录默认为控制器目录；仿真替身优先于任何同名模块
+        os.chdir(workdir or controller_dir)
+        sys.path[:0] = [SIM_DIR, controller_dir]
+        sys.modules['controller'] = controller
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            yield script, output
+    finally:
+        os.chdir(saved_cwd)
+        sys.path[:] = saved_path
+
+
+def simulation_stats(name, wall_time, output=""):
+    """当前仿真的统计字典"""
+    sim = controller.simulation
+    return {
+        'controller': name,
+        'steps': sim.steps,
+        'sim_time': sim.time,
+        'wall_time': wall_time,
+        'speedup': sim.time / wall_time if wall_time > 0 else float('inf'),
+        'pose': sim.pose,
+        'distance': sim.distance,
+        'collisions': sim.collisions,
+        'output': output,
+    }
+
+
+def run_controller(name, quiet=False, workdir=None, **options):
+    """以 __main__ 身份运行控制器，返回仿真统计字典"""
+    start = time.perf_counter()
+    with controller_environment(name, quiet, workdir, **options) as (script, output):
+        runpy.run_path(script, run_name="__main__")
+    return simulation_stats(name, time.perf_counter() - start, output.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无头运行Webots控制器")
+    parser.add_argument("controller", help="控制器目录名，如 mapping_controller_auto")
+    parser.add_argument("--steps", type=int, default=3000, help="最大仿真步数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--noise", type=float, default=0.0, help="激光测距噪声标准差（米）")
+    parser.add_argument("--world", default=None, help="Webots世界文件（默认 tb_world/turtlebot3_burger_world.wbt）")
+    parser.add_argument("--pose", default=None, help="初始位姿 x,y,theta")
+    parser.add_argument("--disable", default="", help="禁用的设备，逗号分隔，如 gps,compass")
+    parser.add_argument("--keys", default="", help="键盘脚本 步数:键,... 键保持按下直到下一条，留空为松开，如 5:w,60:a,70:")
+    parser.add_argument("--workdir", default=None, help="输出文件目录（默认控制器目录）")
+    parser.add_argument("--quiet", action="store_true", help="不显示控制器输出")
+    args = parser.parse_args()
+
+    options = {'steps': args.steps, 'seed': args.seed, 'lidar_noise': args.noise}
+    if args.world:
+        options['world'] = args.world
+    if args.pose:
+        options['pose'] = tuple(float(v) for v in args.pose.split(','))
+    if args.disable:
+        options['disable'] = tuple(args.disable.split(','))
+    if args.keys:
+        options['keys'] = controller.parse_keys(args.keys)
+
+    stats = run_controller(args.controller, quiet=args.quiet, workdir=args.workdir, **options)
+    print(f"\n=== 无头仿真结束 ===")
+    print(f"步数: {stats['steps']}, 仿真时间: {stats['sim_time']:.1f}秒, "
+          f"实际用时: {stats['wall_time']:.1f}秒, 加速比: {stats['speedup']:.1f}x")
+    print(f"行驶距离: {stats['distance']:.2f}米, 碰撞次数: {stats['collisions']}, "
+          f"最终位姿: ({stats['pose'][0]:.2f}, {stats['pose'][1]:.2f}, {stats['pose'][2]:.2f})")
+
+
+if __name__ == "__main__":
+    main()
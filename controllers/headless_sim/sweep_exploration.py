@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+探索策略参数扫描 - 用进程池并行运行无头自动建图回合
+每个配置在独立的工作进程和临时目录中运行，收集覆盖率-时间曲线并按覆盖速度排名
+例: python sweep_exploration.py --steps 1500 --seeds 2 --jobs 8
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from run_headless import CONTROLLERS_DIR, controller_environment, simulation_stats
+
+sys.path.append(os.path.join(CONTROLLERS_DIR, 'common'))
+
+from map_quality import ground_truth, score_grid  # noqa: E402
+
+CONTROLLER_NAME = "mapping_controller_auto"
+CONTROLLER_CLASS = "AutoMappingController"
+
+# 默认扫描网格: 反应式探索的阈值、定期转向逻辑和轮速
+DEFAULT_GRID = {
+    'exploration_strategy': ["reactive", "frontier"],
+    'obstacle_threshold': [0.3, 0.45],
+    'turn_threshold': [0.1, 0.25],
+    'direction_flip_interval': [50, 200],
+    'random_turn_interval': [30, 120],
+    'forward_speed': [3.0, 5.0],
+}
+
+
+def expand_grid(grid):
+    """参数网格 {名称: [取值, ...]} 展开为配置列表（笛卡尔积）"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def read_coverage_curve(filename):
+    """读取探索指标CSV，返回 [(仿真时间, 已探索面积), ...]"""
+    curve = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        next(f, None)
+        for line in f:
+            parts = line.strip().split(',')
+            if len(parts) < 3:
+                break  # 统计信息段
+            curve.append((float(parts[1]), float(parts[2])))
+    return curve
+
+
+def mean_coverage(curve, duration):
+    """覆盖率曲线下面积除以时长: 越早覆盖得分越高"""
+    if not curve or duration <= 0:
+        return 0.0
+    area = 0.0
+    last_time, last_value = 0.0, 0.0
+    for sim_time, value in curve:
+        area += (sim_time - last_time) * (last_value + value) / 2
+        last_time, last_value = sim_time, value
+    area += max(duration - last_time, 0.0) * last_value
+    return area / duration
+
+
+def run_episode(job):
+    """工作进程: 运行一个 (配置, 种子) 回合，返回结果字典"""
+    index, params, seed, steps, options = job
+    workdir = tempfile.mkdtemp(prefix="sweep_")
+    start = time.perf_counter()
+    try:
+        with controller_environment(CONTROLLER_NAME, quiet=True, workdir=workdir,
+                                    steps=steps, seed=seed, **options) as (script, output):
+            random.seed(seed)
+            # 不以 __main__ 运行，只取控制器类，实例化后覆盖参数再运行
+            namespace = runpy.run_path(script, run_name="sweep_episode")
+            mapper = namespace[CONTROLLER_CLASS]()
+            for name, value in params.items():
+                if not hasattr(mapper, name):
+                    raise AttributeError(f"{CONTROLLER_CLASS} 没有参数: {name}")
+                setattr(mapper, name, value)
+            mapper.run()
+        stats = simulation_stats(CONTROLLER_NAME, time.perf_counter() - start)
+        curve = read_coverage_curve(os.path.join(workdir, "exploration_metrics.csv"))
+        score = score_grid(ground_truth(), mapper.occupancy_grid)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'index': index,
+        'params': params,
+        'seed': seed,
+        'explored_area': mapper.metrics.explored_area(),
+        'mean_coverage': mean_coverage(curve, stats['sim_time']),
+        'iou': score['iou'],
+        'wall_error': score['wall_error'],
+        'distance': stats['distance'],
+        'collisions': stats['collisions'],
+        'wall_time': stats['wall_time'],
+        'curve': curve,
+    }
+
+
+def summarize(results):
+    """按配置汇总多个种子的结果，按平均覆盖（曲线下面积）降序排名"""
+    by_config = {}
+    for result in results:
+        by_config.setdefault(result['index'], []).append(result)
+    rows = []
+    for index, runs in by_config.items():
+        count = len(runs)
+        row = {'index': index, 'params': runs[0]['params'], 'runs': count}
+        for key in ('mean_coverage', 'explored_area', 'iou', 'wall_error', 'distance', 'collisions'):
+            row[key] = sum(run[key] for run in runs) / count
+        rows.append(row)
+    rows.sort(key=lambda row: (-row['mean_coverage'], -row['explored_area']))
+    return rows
+
+
+def write_results(output_dir, results, rows):
+    """写出排名表和覆盖率曲线CSV"""
+    os.makedirs(output_dir, exist_ok=True)
+    table = os.path.join(output_dir, "sweep_results.txt")
+    with open(table, 'w', encoding='utf-8') as f:
+        f.write("=== 探索参数扫描结果（按平均覆盖面积排名） ===\n")
+        f.write("排名,配置,回合数,平均覆盖面积,最终面积,IoU,墙面误差,行驶距离,碰撞次数,参数\n")
+        for rank, row in enumerate(rows, 1):
+            params = json.dumps(row['params'], ensure_ascii=False, sort_keys=True)
+            f.write(f"{rank},{row['index']},{row['runs']},{row['mean_coverage']:.3f},"
+                    f"{row['explored_area']:.3f},{row['iou']:.3f},{row['wall_error']:.3f},"
+                    f"{row['distance']:.2f},{row['collisions']:.1f},{params}\n")
+
+    curves = os.path.join(output_dir, "coverage_curves.csv")
+    with open(curves, 'w', encoding='utf-8') as f:
+        f.write("配置,种子,时间,已探索面积\n")
+        for result in sorted(results, key=lambda r: (r['index'], r['seed'])):
+            for sim_time, area in result['curve']:
+                f.write(f"{result['index']},{result['seed']},{sim_time:.2f},{area:.3f}\n")
+    return table, curves
+
+
+def run_sweep(configs, seeds=1, steps=1500, jobs=None, options=None, progress=None):
+    """并行运行所有 (配置, 种子) 回合，返回结果列表"""
+    jobs_list = [(index, params, seed, steps, options or {})
+                 for index, params in enumerate(configs) for seed in range(seeds)]
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_episode, job) for job in jobs_list]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress:
+                progress(len(results), len(jobs_list), results[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行扫描自动建图探索参数")
+    parser.add_argument("--grid", default=None, help='参数网格JSON文件 {"参数名": [取值, ...]}（默认内置网格）')
+    parser.add_argument("--steps", type=int, default=1500, help="每个回合的仿真步数")
+    parser.add_argument("--seeds", type=int, default=1, help="每个配置的随机种子数")
+    parser.add_argument("--jobs", type=int, default=None, help="并行进程数（默认CPU核数）")
+    parser.add_argument("--disable", default="", help="禁用的设备，逗号分隔，如 gps,compass")
+    parser.add_argument("--output", default="sweep_results", help="结果目录")
+    args = parser.parse_args()
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid, 'r', encoding='utf-8') as f:
+            grid = json.load(f)
+    configs = expand_grid(grid)
+    options = {'disable': tuple(args.disable.split(','))} if args.disable else {}
+    print(f"扫描 {len(configs)} 个配置 x {args.seeds} 个种子, 每回合 {args.steps} 步")
+
+    def progress(done, total, result):
+        print(f"[{done}/{total}] 配置{result['index']} 种子{result['seed']}: "
+              f"平均覆盖 {result['mean_coverage']:.2f}平方米, 用时 {result['wall_time']:.1f}秒")
+
+    start = time.perf_counter()
+    results = run_sweep(configs, args.seeds, args.steps, args.jobs, options, progress)
+    rows = summarize(results)
+    table, curves = write_results(args.output, results, rows)
+    print(f"\n扫描完成, 用时 {time.perf_counter() - start:.1f} 秒")
+    for rank, row in enumerate(rows[:5], 1):
+        print(f"  {rank}. 平均覆盖 {row['mean_coverage']:.2f}平方米, IoU {row['iou']:.3f}: {row['params']}")
+    print(f"排名表: {table}")
+    print(f"覆盖率曲线: {curves}")
+
+
+if __name__ == "__main__":
+    main()
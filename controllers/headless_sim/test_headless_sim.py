@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+无头仿真测试
+验证光线投射几何、差速驱动运动学，以及未修改的自动建图控制器可以脱离Webots运行
+"""
+
+import math
+import os
+import random
+import runpy
+import tempfile
+
+import controller
+from benchmark_export import CONTROLLERS_DIR, STAGES, run_benchmark, scaling
+from run_headless import controller_environment, run_controller
+from sweep_exploration import expand_grid, mean_coverage, run_episode
+
+
+def test_scan_geometry():
+    """正前方束命中木箱下表面，正后方束命中场地内壁"""
+    world = controller.World()
+    ranges = world.scan(0.467367, -1.2, math.pi / 2)
+    assert abs(ranges[180] - (1.2 - 0.545426 - 0.15)) < 1e-9
+    assert abs(ranges[0] - (math.sqrt(9.0 - 0.467367 ** 2) - 1.2)) < 1e-9
+    assert world.collides(0.467367, -0.7)
+    assert not world.collides(0.0, 0.0)
+
+
+def test_differential_drive_and_devices():
+    """等速直行的距离与编码器读数一致；未启用的设备没有读数；缺失设备返回None"""
+    controller.configure(steps=10, pose=(0.0, 0.0, 0.0), disable=('gps',), keys=((3, ord('W')), (5, -1)))
+    robot = controller.Robot()
+    assert robot.getDevice('gps') is None
+    left = robot.getDevice('left wheel motor')
+    right = robot.getDevice('right wheel motor')
+    sensor = robot.getDevice('left wheel sensor')
+    lidar = robot.getDevice('LDS-01')
+    keyboard = controller.Keyboard()
+    assert lidar.getRangeImage() is None
+    sensor.enable(64)
+    lidar.enable(64)
+    keyboard.enable(64)
+    left.setPosition(float('inf'))
+    right.setPosition(float('inf'))
+    left.setVelocity(5.0)
+    right.setVelocity(5.0)
+
+    keys = []
+    while robot.step(64) != -1:
+        keys.append(keyboard.getKey())
+    x, y, theta = robot.simulation.pose
+    assert abs(x - 5.0 * 0.033 * 0.064 * 10) < 1e-9 and abs(y) < 1e-12 and theta == 0.0
+    assert abs(sensor.getValue() - 5.0 * 0.064 * 10) < 1e-9
+    assert len(lidar.getRangeImage()) == 360
+    assert keys == [-1, -1, ord('W'), ord('W'), -1, -1, -1, -1, -1, -1]
+
+
+def test_unmodified_controller_runs_headless():
+    """自动建图控制器在临时目录中跑完300步并写出地图文件"""
+    workdir = tempfile.mkdtemp()
+    stats = run_controller("mapping_controller_auto", quiet=True, workdir=workdir, steps=300)
+    assert stats['steps'] == 300
+    assert stats['distance'] > 0.3
+    assert os.path.exists(os.path.join(workdir, "simple_map_data.txt"))
+    assert "自动建图完成" in stats['output']
+    print(f"300步用时 {stats['wall_time']:.2f}秒，加速比 {stats['speedup']:.1f}x")
+
+
+def test_sweep_episode():
+    """参数网格展开为笛卡尔积；单个回合覆盖参数运行并返回覆盖率曲线"""
+    assert len(expand_grid({'a': [1, 2], 'b': [3, 4, 5]})) == 6
+    assert abs(mean_coverage([(1.0, 2.0), (2.0, 2.0)], 4.0) - 1.75) < 1e-9
+    result = run_episode((0, {'exploration_strategy': 'reactive', 'forward_speed': 4.0}, 0, 60, {}))
+    assert result['curve'] and result['explored_area'] > 0
+    assert 0.0 < result['iou'] <= 1.0
+    try:
+        run_episode((1, {'no_such_parameter': 1}, 0, 10, {}))
+        assert False, "未知参数应报错"
+    except AttributeError:
+        pass
+
+
+def test_staged_weighting_matches_full():
+    """分级权重: 逐环扫描的上界不低于完整似然；未淘汰粒子的似然与完整计算完全相同"""
+    with controller_environment("localization_controller", quiet=True, workdir=tempfile.mkdtemp(),
+                                steps=5) as (script, _):
+        namespace = runpy.run_path(script, run_name="staged")
+        particle_filter = namespace['SimpleParticleFilter'](background_loading=False)
+    # 场地四周的墙
+    walls = [(x / 10.0, y) for x in range(-20, 21) for y in (-2.0, 2.0)]
+    walls += [(x, y / 10.0) for x in (-2.0, 2.0) for y in range(-19, 20)]
+    particle_filter.map_data['obstacles'] = walls
+    particle_filter.occupied_cells = particle_filter.build_occupied_cells()
+    particle_filter.obstacle_buckets, particle_filter.bucket_bounds = particle_filter.build_obstacle_buckets()
+
+    random.seed(3)
+    particle_filter.num_particles = 200
+    particle_filter.initialize_particles()
+    sensor_data = particle_filter.simulate_sensor_reading(0.5, -1.0, 0.3)
+    # 期望读数按量化位姿（格中心）计算
+    poses = [particle_filter.key_pose(particle_filter.pose_key(p.x, p.y, p.theta)) for p in particle_filter.particles]
+    full = [particle_filter.calculate_likelihood(sensor_data, particle_filter.simulate_sensor_reading(*pose))
+            for pose in poses]
+    for pose, likelihood in list(zip(poses, full))[:50]:
+        scan = namespace['RingScan'](particle_filter.obstacle_buckets, particle_filter.bucket_size,
+                                     particle_filter.bucket_bounds, *pose)
+        while not scan.resolved():
+            scan.expand()
+            assert particle_filter.likelihood_bound(sensor_data, scan) >= likelihood * (1 - 1e-12)
+
+    staged = particle_filter.staged_likelihoods(sensor_data)
+    assert particle_filter.rejected_particles > 100
+    assert all(s == 0.0 or s == f for s, f in zip(staged, full))
+    assert max(staged) == max(full)
+
+    # 第二次更新命中缓存，未淘汰粒子的似然仍与完整计算相同
+    hits = particle_filter.reading_cache.hits
+    again = particle_filter.staged_likelihoods(sensor_data)
+    assert particle_filter.reading_cache.hits > hits
+    assert all(s == 0.0 or s == f for s, f in zip(again, full)) and max(again) == max(full)
+
+
+def test_motion_gated_updates():
+    """静止时只在启动时做一次观测更新；行驶超过阈值后才再次更新"""
+    keys = controller.parse_keys("30:w,40:")
+    with controller_environment("localization_controller", quiet=True, workdir=tempfile.mkdtemp(),
+                                steps=60, keys=keys) as (script, _):
+        namespace = runpy.run_path(script, run_name="gated")
+        particle_filter = namespace['SimpleParticleFilter'](background_loading=False)
+        particle_filter.update_distance = 0.02
+        particle_filter.run()
+    # 10步前进约 2.0*0.0325*0.064*10 = 0.042米 -> 再更新2次
+    assert particle_filter.filter_updates == 3
+    assert len(particle_filter.localization_results) == 60
+
+
+def test_watchdog_degrades_localization():
+    """每步都超出64毫秒预算时逐级降级: 粒子数减到三分之一，最大降级时只用前后两束"""
+    class SlowClock:
+        now = 0.0
+
+        def __call__(self):
+            self.now += 0.1  # begin/end 各调用一次: 每步耗时100毫秒
+            return self.now
+
+    with controller_environment("localization_controller", quiet=True, workdir=tempfile.mkdtemp(),
+                                steps=60) as (script, _):
+        namespace = runpy.run_path(script, run_name="watchdog")
+        particle_filter = namespace['SimpleParticleFilter'](background_loading=False)
+        particle_filter.watchdog.clock = SlowClock()
+        particle_filter.run()
+    watchdog = particle_filter.watchdog
+    assert watchdog.overruns == 60 and watchdog.level == watchdog.max_level == 3
+    assert particle_filter.num_particles == 33
+    assert particle_filter.active_directions == ('front', 'back')
+    # 第20步首次降级，之后不再保存粒子快照
+    assert [step for step, _, _ in particle_filter.particle_snapshots] == [0, 10]
+
+
+def test_background_map_loading():
+    """后台加载地图: 构造后立即可以步进，地图就绪后才开始滤波并报告启动耗时"""
+    with controller_environment("localization_controller", quiet=True, workdir=tempfile.mkdtemp(),
+                                steps=20) as (script, _):
+        namespace = runpy.run_path(script, run_name="background")
+        particle_filter = namespace['SimpleParticleFilter']()
+        particle_filter.run()
+    assert particle_filter.map_loader is None and particle_filter.map_ready.is_set()
+    assert len(particle_filter.particles) == particle_filter.num_particles
+    assert 0 < len(particle_filter.localization_results) <= 20
+    assert particle_filter.first_step_time > 0 and particle_filter.map_ready_time > 0
+
+
+def test_export_benchmark():
+    """导出基准: 录制日志和放大2倍的合成日志各计时五个阶段，合成日志记录数翻倍"""
+    log = os.path.join(CONTROLLERS_DIR, "mapping_controller", "simple_map_data.txt")
+    rows = run_benchmark(controllers=('manual',), paths=[log], scales=(2,), repeat=1)
+    assert [row['stage'] for row in rows] == list(STAGES) * 2
+    assert [row['records'] for row in rows] == [329] * 5 + [658] * 5
+    assert all(row['seconds'] > 0 and row['bytes'] > 0 for row in rows)
+    assert set(scaling(rows, 'manual')[2]) == set(STAGES)
+
+
+if __name__ == "__main__":
+    print("=== 无头仿真测试 ===\n")
+    test_scan_geometry()
+    test_differential_drive_and_devices()
+    test_unmodified_controller_runs_headless()
+    test_sweep_episode()
+    test_staged_weighting_matches_full()
+    test_motion_gated_updates()
+    test_watchdog_degrades_localization()
+    test_background_map_loading()
+    test_export_benchmark()
+    print("\n 无头仿真测试完成！")
@@ -5,6 +5,11 @@ Task 1完成状态检查器
 """
 
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from map_io import count_records, is_mapping_log  # noqa: E402
 
 def check_task1_completion():
     """检查Task 1是否完成"""
@@ -31,16 +36,15 @@ def check_task1_completion():
     map_data_path = "../mapping_controller/simple_map_data.txt"
     if os.path.exists(map_data_path):
         try:
-            with open(map_data_path, 'r') as f:
-                lines = f.readlines()
-                data_lines = [line for line in lines if ',' in line and not line.startswith('=')]
+            # 与定位控制器相同的解析器: 只统计表头之后的有效记录
+            records = count_records(map_data_path) if is_mapping_log(map_data_path) else 0
+            
+            if records > 50:  # 至少50个数据点
+                print(f" 地图数据质量检查 - 包含 {records} 个扫描点")
+            else:
+                print(f"  地图数据可能不足 - 只有 {records} 个扫描点")
+                print("   建议：重新运行mapping_controller，收集更多数据")
                 
-                if len(data_lines) > 50:  # 至少50个数据点
-                    print(f" 地图数据质量检查 - 包含 {len(data_lines)} 个扫描点")
-                else:
-                    print(f"  地图数据可能不足 - 只有 {len(data_lines)} 个扫描点")
-                    print("   建议：重新运行mapping_controller，收集更多数据")
-                    
         except Exception as e:
             print(f" 读取地图数据失败: {e}")
             all_good = False
@@ -5,7 +5,106 @@
 
 from controller import Robot, Keyboard
 import math
+import os
 import random
+import sys
+import threading
+import time
+
+# 共享模块目录
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from lru_cache import LRUCache
+from map_io import load_map_points
+from memory_budget import MemoryMonitor, SpillList
+from merge_maps import load_compiled_map, localization_points
+from particle_log import SNAPSHOT_FILE, snapshot, write_snapshots
+from range_table import TABLE_FILE, RangeTable
+from sensor_frame import SensorFrame
+from step_watchdog import StepWatchdog
+from telemetry import TelemetryPublisher
+
+# 四个测距方向相对机器人朝向的角度
+BEAM_OFFSETS = {'front': 0.0, 'right': -math.pi / 2, 'back': math.pi, 'left': math.pi / 2}
+DIRECTIONS = ('front', 'left', 'right', 'back')
+MAX_RANGE = 5.0  # 最大检测距离
+
+
+def beam_angles(theta):
+    """各测距方向的绝对角度"""
+    return [(direction, theta + BEAM_OFFSETS[direction]) for direction in DIRECTIONS]
+
+
+def scan_obstacles(x, y, angles, obstacles, readings):
+    """把一批障碍物分到各方向的45度扇区，更新 readings 中各方向的最近距离
+    
+    每个障碍物只算一次方位角，距离只在落入某个扇区时才算。
+    """
+    for obs_x, obs_y in obstacles:
+        dx = obs_x - x
+        dy = obs_y - y
+        obs_angle = math.atan2(dy, dx)
+        dist = None
+        for direction, angle in angles:
+            # 检查障碍物是否在这个方向上
+            angle_diff = abs(obs_angle - angle)
+            angle_diff = min(angle_diff, 2*math.pi - angle_diff)  # 处理角度环绕
+            
+            if angle_diff < math.pi/4:  # 45度范围内
+                if dist is None:
+                    dist = math.sqrt(dx**2 + dy**2)
+                if dist < readings[direction]:
+                    readings[direction] = dist
+
+
+class RingScan:
+    """单个粒子期望读数的惰性计算: 按障碍物分桶由近到远逐环扫描
+    
+    扫完第 k 环后，距粒子 k 个桶宽以内的障碍物都已计入: 读数小于该半径的方向已是精确值，
+    其余方向的期望读数落在 [半径, 当前读数] 之间。扫完整个地图或半径超过最大检测距离时全部精确。
+    """
+    
+    def __init__(self, buckets, size, bucket_bounds, x, y, theta):
+        self.buckets = buckets
+        self.size = size
+        self.x = x
+        self.y = y
+        self.angles = beam_angles(theta)
+        self.bx = math.floor(x / size)
+        self.by = math.floor(y / size)
+        min_bx, min_by, max_bx, max_by = bucket_bounds
+        self.last_ring = max(self.bx - min_bx, max_bx - self.bx, self.by - min_by, max_by - self.by, 0)
+        self.ring = -1
+        self.readings = {direction: MAX_RANGE for direction in DIRECTIONS}
+    
+    @property
+    def radius(self):
+        """已完整扫描的半径；全部精确时为无穷大"""
+        radius = self.ring * self.size
+        if self.ring >= self.last_ring or radius >= MAX_RANGE:
+            return math.inf
+        return max(radius, 0.0)
+    
+    def resolved(self):
+        radius = self.radius
+        return all(self.readings[direction] < radius for direction in DIRECTIONS)
+    
+    def expand(self):
+        """扫描下一环的桶"""
+        self.ring += 1
+        k = self.ring
+        bx, by = self.bx, self.by
+        if k == 0:
+            keys = [(bx, by)]
+        else:
+            keys = [(bx + i, by + j) for i in range(-k, k + 1) for j in (-k, k)]
+            keys += [(bx + i, by + j) for i in (-k, k) for j in range(-k + 1, k)]
+        obstacles = []
+        for key in keys:
+            bucket = self.buckets.get(key)
+            if bucket:
+                obstacles.extend(bucket)
+        scan_obstacles(self.x, self.y, self.angles, obstacles, self.readings)
 
 class Particle:
     """粒子类 - 表示机器人可能的位置和方向"""
@@ -16,7 +115,9 @@ class Particle:
         self.weight = weight # 权重
 
 class SimpleParticleFilter:
-    def __init__(self):
+    def __init__(self, background_loading=True):
+        self.startup_begin = time.perf_counter()
+        
         # 初始化机器人
         self.robot = Robot()
         self.timestep = int(self.robot.getBasicTimeStep())
@@ -43,15 +144,59 @@ class SimpleParticleFilter:
         except Exception:
             self.has_gps = False
         
+        # 每周期只读取一次激光/GPS
+        self.sensors = SensorFrame(self.lidar, self.gps if self.has_gps else None)
+        
+        # 实时遥测（设置 WEBOTS_TELEMETRY 时启用）
+        self.telemetry = TelemetryPublisher.from_environment()
+        
+        # 控制周期看门狗: 循环持续超出 basicTimeStep 预算时减少粒子和参与似然的光束、跳过粒子云可视化，
+        # 余量恢复后逐级回升
+        self.watchdog = StepWatchdog(self.timestep)
+        self.active_directions = DIRECTIONS
+        self.full_particles = None  # 首次降级时记录的全质量粒子数
+        
         # 粒子滤波参数
         self.num_particles = 100  # 粒子数量
         self.particles = []
         
         # 简单地图数据（基于Task 1的结果）
-        self.map_data = self.load_simple_map()
-        
-        # 初始化粒子
-        self.initialize_particles()
+        # 建图日志中的近重复点在加载时合并: 障碍物按体素取质心，自由空间按间距抽稀轨迹
+        self.map_voxel_size = 0.1
+        self.free_space_spacing = 0.1
+        
+        # 分级权重: 先只扫描粒子附近的障碍物粗评所有粒子，只对仍有竞争力的粒子由近到远扫描到底
+        self.sensor_sigma = 0.3      # 传感器噪声标准差
+        self.staged_weighting = True
+        self.rejection_ratio = 1e-3  # 似然上界低于当前最佳完整似然的该比例即淘汰
+        self.bucket_size = 0.5       # 障碍物分桶边长（米）
+        self.coarse_rings = 1        # 粗评阶段扫描的环数（第0环为粒子所在的桶）
+        
+        # 期望读数缓存: 位姿量化到格，同一格内的粒子（重采样后的同一父粒子副本）共用格中心的期望读数
+        self.cache_resolution = 0.05               # 位置量化（米）
+        self.cache_angle_resolution = math.radians(3)  # 朝向量化（弧度）
+        self.reading_cache = LRUCache(capacity=4096)
+        
+        self.rejected_particles = 0  # 上一次更新中被提前淘汰的粒子数
+        
+        # 地图及其编译结果（障碍物体素、分桶、期望读数查找表）和初始粒子由 load_map 生成；
+        # 默认在后台线程中加载，机器人立即开始步进，地图就绪前只响应键盘控制
+        self.map_data = {'obstacles': [], 'free_space': [], 'records': 0, 'obstacle_hits': []}
+        self.occupied_cells = set()
+        self.obstacle_buckets, self.bucket_bounds = {}, (0, 0, 0, 0)
+        self.range_table = None  # range_table.py 离线生成；存在时权重更新只做查表
+        self.map_ready = threading.Event()
+        self.map_load_error = None
+        self.map_ready_time = None   # 从启动到地图就绪的秒数
+        self.first_step_time = None  # 从启动到第一个控制周期的秒数
+        self.map_loader = None
+        if background_loading:
+            self.map_loader = threading.Thread(target=self.load_map, name="map-loader", daemon=True)
+            self.map_loader.start()
+        else:
+            self.load_map()
+            if self.map_load_error is not None:
+                raise self.map_load_error
         
         # 估计的位置
         self.estimated_x = 0
@@ -59,7 +204,27 @@ class SimpleParticleFilter:
         self.estimated_theta = 0
         
         self.step_count = 0
-        self.localization_results = []
+        self.localization_results = SpillList("localization_results.spill")
+        
+        # 运动门控: 自上次观测更新以来累计行驶距离或转角超过阈值才做观测更新和重采样，
+        # 静止时不更新，沿用上一次的估计
+        self.update_distance = 0.1               # 米
+        self.update_rotation = math.radians(20)  # 弧度
+        self.distance_since_update = math.inf   # 启动后第一步先做一次观测更新
+        self.rotation_since_update = 0.0
+        self.filter_updates = 0
+        
+        # 粒子快照（供 render_frames.py 渲染粒子云动画）
+        self.snapshot_interval = 10
+        self.particle_snapshots = SpillList("particle_snapshots.spill")
+        
+        # 内存统计: 长时间运行时按子系统报告占用，结果和快照超出软预算时转存到磁盘
+        # （WEBOTS_MEMORY_TRACE 启用 tracemalloc 热点报告，WEBOTS_MEMORY_BUDGETS 覆盖预算）
+        self.memory = MemoryMonitor.from_environment()
+        self.memory.track('localization_results', lambda: self.localization_results, budget_mb=32, spill=True)
+        self.memory.track('particle_snapshots', lambda: self.particle_snapshots, budget_mb=64, spill=True)
+        self.memory.track('map_data', lambda: self.map_data, budget_mb=128)
+        self.memory.track('reading_cache', lambda: self.reading_cache, budget_mb=16)
         
         print("粒子滤波定位控制器启动成功!")
         print("=== 控制说明 ===")
@@ -71,14 +236,67 @@ class SimpleParticleFilter:
         print("Q: 退出并保存结果")
         print("==================")
     
+    def load_map(self):
+        """加载并编译地图、初始化粒子，完成（或出错）后置位 map_ready"""
+        try:
+            self.map_data = self.load_simple_map()
+            self.occupied_cells = self.build_occupied_cells()
+            self.obstacle_buckets, self.bucket_bounds = self.build_obstacle_buckets()
+            self.range_table = self.load_range_table()
+            self.initialize_particles()
+        except Exception as e:
+            self.map_load_error = e
+        finally:
+            self.map_ready_time = time.perf_counter() - self.startup_begin
+            self.map_ready.set()
+    
+    def finish_map_loading(self):
+        """后台加载完成时收尾并报告启动耗时；地图仍在加载时返回 False"""
+        if self.map_loader is None:
+            return True
+        if not self.map_ready.is_set():
+            return False
+        self.map_loader.join()
+        self.map_loader = None
+        if self.map_load_error is not None:
+            raise self.map_load_error
+        self.report_startup()
+        return True
+    
+    def report_startup(self):
+        mode = "后台加载" if self.first_step_time < self.map_ready_time else "同步加载"
+        print(f"启动耗时: 首个控制周期 {self.first_step_time * 1000:.0f}ms, "
+              f"地图就绪 {self.map_ready_time * 1000:.0f}ms（{mode}）")
+    
     def load_simple_map(self):
         """从Task 1的mapping结果加载地图数据 - 支持手动和自动建图"""
         map_data = {
             'obstacles': [],  # 障碍物位置
             'free_space': [],  # 自由空间
-            'scan_points': []  # 原始扫描点
+            'records': 0,  # 建图记录条数
+            'obstacle_hits': []  # 每个障碍物体素合并的命中次数（建图日志）
         }
         
+        # 优先使用merge_maps.py生成的多次建图合并地图
+        compiled_map_path = "compiled_map.txt"
+        if os.path.exists(compiled_map_path):
+            try:
+                # 只用近距离命中的障碍单元和机器人经过的单元，并与建图日志一样按体素合并近重复点
+                compiled = load_compiled_map(compiled_map_path)
+                map_data['obstacles'], map_data['free_space'] = localization_points(
+                    compiled, self.map_voxel_size, self.free_space_spacing)
+                print(" 成功加载合并地图:")
+                print(f"   - 文件: {compiled_map_path}")
+                if compiled['visited'] is None:
+                    print("   - 旧格式合并地图（没有经过次数），使用全部单元；请重新运行 merge_maps.py")
+                print(f"   - 自由空间: {len(map_data['free_space'])} 个")
+                print(f"   - 障碍物: {len(map_data['obstacles'])} 个")
+                return map_data
+            except Exception as e:
+                print(f" 读取合并地图时出错 ({compiled_map_path}): {e}")
+                map_data['obstacles'] = []
+                map_data['free_space'] = []
+        
         # 尝试读取Task 1生成的地图数据 - 支持手动和自动建图
         mapping_data_paths = [
             "../mapping_controller/simple_map_data.txt",      # 手动建图结果
@@ -87,81 +305,29 @@ class SimpleParticleFilter:
         
         loaded = False
         for mapping_data_path in mapping_data_paths:
-            try:
-                with open(mapping_data_path, 'r') as f:
-                    lines = f.readlines()
-                    
-                    # 跳过头部，找到数据行
-                    data_start = False
-                    for line in lines:
-                        if "步数,时间,X,Y,角度,前方,左侧,右侧,后方,最小距离" in line:
-                            data_start = True
-                            continue
-                        
-                        if data_start and "===" not in line and line.strip():
-                            parts = line.strip().split(',')
-                            if len(parts) >= 10:
-                                try:
-                                    x = float(parts[2])
-                                    y = float(parts[3])
-                                    angle = float(parts[4])
-                                    front_dist = float(parts[5])
-                                    left_dist = float(parts[6])
-                                    right_dist = float(parts[7])
-                                    back_dist = float(parts[8])
-                                    min_dist = float(parts[9])
-                                    
-                                    # 记录扫描点
-                                    map_data['scan_points'].append({
-                                        'x': x, 'y': y, 'angle': angle,
-                                        'distances': {
-                                            'front': front_dist,
-                                            'left': left_dist,
-                                            'right': right_dist,
-                                            'back': back_dist
-                                        }
-                                    })
-                                    
-                                    # 如果检测到近距离障碍物，推断障碍物位置
-                                    if min_dist < 1.0:  # 1米内认为有障碍物
-                                        # 计算障碍物可能的位置
-                                        for direction, dist in [('front', front_dist), ('left', left_dist), 
-                                                              ('right', right_dist), ('back', back_dist)]:
-                                            if dist < 1.0:
-                                                if direction == 'front':
-                                                    obs_x = x + dist * math.cos(angle)
-                                                    obs_y = y + dist * math.sin(angle)
-                                                elif direction == 'left':
-                                                    obs_x = x + dist * math.cos(angle + math.pi/2)
-                                                    obs_y = y + dist * math.sin(angle + math.pi/2)
-                                                elif direction == 'right':
-                                                    obs_x = x + dist * math.cos(angle - math.pi/2)
-                                                    obs_y = y + dist * math.sin(angle - math.pi/2)
-                                                else:  # back
-                                                    obs_x = x + dist * math.cos(angle + math.pi)
-                                                    obs_y = y + dist * math.sin(angle + math.pi)
-                                                
-                                                map_data['obstacles'].append((obs_x, obs_y))
-                                    
-                                    # 机器人经过的位置是自由空间
-                                    map_data['free_space'].append((x, y))
-                                    
-                                except ValueError:
-                                    continue
-                
-                print(" 成功加载Task 1地图数据:")
-                print(f"   - 文件: {mapping_data_path}")
-                print(f"   - 扫描点: {len(map_data['scan_points'])} 个")
-                print(f"   - 自由空间: {len(map_data['free_space'])} 个")
-                print(f"   - 推断障碍物: {len(map_data['obstacles'])} 个")
-                loaded = True
-                break
-                
-            except FileNotFoundError:
+            if not os.path.exists(mapping_data_path):
                 continue  # 尝试下一个路径
+            try:
+                # 流式读取，近距离（1米内）读数推断障碍物，机器人经过的位置为自由空间
+                map_points = load_map_points(mapping_data_path, max_distance=1.0,
+                                             voxel_size=self.map_voxel_size,
+                                             path_spacing=self.free_space_spacing)
             except Exception as e:
                 print(f" 读取地图数据时出错 ({mapping_data_path}): {e}")
                 continue
+            map_data['obstacles'] = map_points['obstacles']
+            map_data['free_space'] = map_points['free_space']
+            map_data['records'] = map_points['records']
+            map_data['obstacle_hits'] = map_points['obstacle_hits']
+            
+            print(" 成功加载Task 1地图数据:")
+            print(f"   - 文件: {mapping_data_path}")
+            print(f"   - 扫描点: {map_data['records']} 个")
+            print(f"   - 自由空间: {len(map_data['free_space'])} 个")
+            print(f"   - 推断障碍物: {len(map_data['obstacles'])} 个"
+                  f"（{sum(map_data['obstacle_hits'])} 次命中合并到 {self.map_voxel_size}m 体素）")
+            loaded = True
+            break
         
         if not loaded:
             print(" 警告: 找不到任何Task 1的地图数据文件")
@@ -191,6 +357,42 @@ class SimpleParticleFilter:
         
         return map_data
     
+    def build_occupied_cells(self):
+        """障碍物所在体素（去掉机器人实际到过的体素），用于粗评阶段排除位于障碍物内的粒子"""
+        size = self.map_voxel_size
+        visited = {(math.floor(x / size), math.floor(y / size)) for x, y in self.map_data['free_space']}
+        return {(math.floor(x / size), math.floor(y / size))
+                for x, y in self.map_data['obstacles']} - visited
+    
+    def build_obstacle_buckets(self):
+        """障碍物按 bucket_size 分桶，返回 (桶字典, 桶坐标范围)"""
+        size = self.bucket_size
+        buckets = {}
+        for point in self.map_data['obstacles']:
+            key = (math.floor(point[0] / size), math.floor(point[1] / size))
+            buckets.setdefault(key, []).append(point)
+        if not buckets:
+            return buckets, (0, 0, 0, 0)
+        return buckets, (min(bx for bx, _ in buckets), min(by for _, by in buckets),
+                         max(bx for bx, _ in buckets), max(by for _, by in buckets))
+    
+    def load_range_table(self):
+        """mmap 期望读数查找表；量化参数或地图签名与当前地图不一致时不使用"""
+        if not os.path.exists(TABLE_FILE):
+            return None
+        try:
+            table = RangeTable(TABLE_FILE)
+        except Exception as e:
+            print(f" 读取期望读数查找表时出错 ({TABLE_FILE}): {e}")
+            return None
+        headings = round(2 * math.pi / self.cache_angle_resolution)
+        if not table.matches(self.map_data['obstacles'], self.cache_resolution, headings):
+            print(f" 警告: 期望读数查找表 {TABLE_FILE} 与当前地图不一致，请重新运行 range_table.py")
+            table.close()
+            return None
+        print(f" 已加载期望读数查找表: {table.width}×{table.height} 格 × {table.headings} 朝向")
+        return table
+    
     def initialize_particles(self):
         """初始化粒子群"""
         self.particles = []
@@ -213,20 +415,20 @@ class SimpleParticleFilter:
         
         print(f"初始化了 {len(self.particles)} 个粒子")
     
-    def predict_particles(self, left_speed, right_speed, dt):
-        """预测步骤：根据运动模型更新粒子位置"""
-        # 简单的差分驱动模型
+    def body_velocity(self, left_speed, right_speed):
+        """简单的差分驱动模型: 轮速 -> (线速度, 角速度)"""
         wheel_radius = 0.0325  # 轮子半径（米）
         wheel_base = 0.16      # 轮距（米）
+        v_left = left_speed * wheel_radius
+        v_right = right_speed * wheel_radius
+        return (v_left + v_right) / 2, (v_right - v_left) / wheel_base
+    
+    def predict_particles(self, left_speed, right_speed, dt):
+        """预测步骤：根据运动模型更新粒子位置"""
+        # 计算线速度和角速度
+        linear_vel, angular_vel = self.body_velocity(left_speed, right_speed)
         
         for particle in self.particles:
-            # 计算线速度和角速度
-            v_left = left_speed * wheel_radius
-            v_right = right_speed * wheel_radius
-            
-            linear_vel = (v_left + v_right) / 2
-            angular_vel = (v_right - v_left) / wheel_base
-            
             # 更新粒子位置（添加噪声模拟不确定性）
             noise_x = random.uniform(-0.01, 0.01)
             noise_y = random.uniform(-0.01, 0.01) 
@@ -241,15 +443,19 @@ class SimpleParticleFilter:
     
     def update_weights(self, sensor_data):
         """更新步骤：根据传感器数据更新粒子权重"""
-        total_weight = 0
+        if self.staged_weighting and self.range_table is None:
+            likelihoods = self.staged_likelihoods(sensor_data)
+        else:
+            likelihoods = []
+            for particle in self.particles:
+                # 计算粒子位置的期望传感器读数
+                expected_readings = self.expected_readings(particle.x, particle.y, particle.theta)
+                
+                # 计算实际读数与期望读数的似然性
+                likelihoods.append(self.calculate_likelihood(sensor_data, expected_readings))
         
-        for particle in self.particles:
-            # 计算粒子位置的期望传感器读数
-            expected_readings = self.simulate_sensor_reading(particle.x, particle.y, particle.theta)
-            
-            # 计算实际读数与期望读数的似然性
-            likelihood = self.calculate_likelihood(sensor_data, expected_readings)
-            
+        total_weight = 0
+        for particle, likelihood in zip(self.particles, likelihoods):
             particle.weight = likelihood
             total_weight += likelihood
         
@@ -260,49 +466,123 @@ class SimpleParticleFilter:
         else:
             # 如果所有权重都是0，重新均匀分布
             for particle in self.particles:
-                particle.weight = 1.0 / self.num_particles
+                particle.weight = 1.0 / len(self.particles)
+    
+    def pose_key(self, x, y, theta):
+        """位姿 -> 量化格（缓存键）"""
+        return (math.floor(x / self.cache_resolution), math.floor(y / self.cache_resolution),
+                math.floor(theta % (2 * math.pi) / self.cache_angle_resolution))
+    
+    def key_pose(self, key):
+        """量化格 -> 格中心位姿"""
+        return ((key[0] + 0.5) * self.cache_resolution, (key[1] + 0.5) * self.cache_resolution,
+                (key[2] + 0.5) * self.cache_angle_resolution)
+    
+    def expected_readings(self, x, y, theta):
+        """粒子的期望读数: 按量化位姿查表或查缓存，未命中时在格中心计算并缓存"""
+        key = self.pose_key(x, y, theta)
+        if self.range_table is not None:
+            readings = self.range_table.lookup(key)
+            if readings is not None:
+                return readings
+        readings = self.reading_cache.get(key)
+        if readings is None:
+            readings = self.simulate_sensor_reading(*self.key_pose(key))
+            self.reading_cache.put(key, readings)
+        return readings
+    
+    def likelihood_bound(self, sensor_data, scan):
+        """部分扫描时完整似然的上界: 未确定的方向按期望读数区间 [半径, 当前读数] 取最小误差"""
+        radius = scan.radius
+        likelihood = 1.0
+        for direction in self.active_directions:
+            actual_dist = sensor_data.get(direction, 5.0)
+            found = scan.readings[direction]
+            if found < radius:
+                error = actual_dist - found
+            elif actual_dist < radius:
+                error = radius - actual_dist
+            elif actual_dist > found:
+                error = actual_dist - found
+            else:
+                continue
+            likelihood *= math.exp(-(error**2) / (2 * self.sensor_sigma**2))
+        return likelihood
+    
+    def staged_likelihoods(self, sensor_data):
+        """由粗到细的惰性似然计算
+        
+        粗评: 位于障碍物体素内的粒子直接记为0，其余粒子只扫描附近 coarse_rings 环的障碍物并求似然上界。
+        细评: 按上界从高到低逐环扩展扫描，直到读数全部确定（结果与完整计算相同），
+        或上界已低于当前最佳似然的 rejection_ratio 倍（不可能有竞争力，记为0）。
+        期望读数与 expected_readings 一样按量化位姿计算: 缓存命中的粒子直接得到精确似然，
+        同一次更新中同格的粒子共用一次扫描，扫描确定的读数写回缓存。
+        """
+        particles = self.particles
+        size = self.map_voxel_size
+        keys = [None] * len(particles)
+        bounds = [0.0] * len(particles)
+        readings = {}  # 量化格 -> 已确定的期望读数
+        scans = {}     # 量化格 -> 未完成的扫描
+        for index, particle in enumerate(particles):
+            if (math.floor(particle.x / size), math.floor(particle.y / size)) in self.occupied_cells:
+                continue
+            key = self.pose_key(particle.x, particle.y, particle.theta)
+            keys[index] = key
+            if key not in readings and key not in scans:
+                cached = self.reading_cache.get(key)
+                if cached is not None:
+                    readings[key] = cached
+                else:
+                    scan = RingScan(self.obstacle_buckets, self.bucket_size, self.bucket_bounds,
+                                    *self.key_pose(key))
+                    for _ in range(self.coarse_rings + 1):
+                        scan.expand()
+                    scans[key] = scan
+            if key in readings:
+                bounds[index] = self.calculate_likelihood(sensor_data, readings[key])
+            else:
+                bounds[index] = self.likelihood_bound(sensor_data, scans[key])
+        
+        likelihoods = [0.0] * len(particles)
+        best = 0.0
+        evaluated = 0
+        for index in sorted(range(len(bounds)), key=bounds.__getitem__, reverse=True):
+            bound = bounds[index]
+            threshold = self.rejection_ratio * best
+            if bound <= 0.0 or bound < threshold:
+                break  # 已按上界降序，之后的粒子同样没有竞争力
+            key = keys[index]
+            if key not in readings:
+                scan = scans[key]
+                while not scan.resolved():
+                    scan.expand()
+                    if self.likelihood_bound(sensor_data, scan) < threshold:
+                        break
+                else:
+                    readings[key] = scan.readings
+                    self.reading_cache.put(key, scan.readings)
+                if key not in readings:
+                    continue
+            likelihood = self.calculate_likelihood(sensor_data, readings[key])
+            likelihoods[index] = likelihood
+            best = max(best, likelihood)
+            evaluated += 1
+        self.rejected_particles = len(particles) - evaluated
+        return likelihoods
     
     def simulate_sensor_reading(self, x, y, theta):
         """模拟在给定位置的传感器读数"""
-        readings = {'front': 5.0, 'left': 5.0, 'right': 5.0, 'back': 5.0}
-        
-        # 计算四个方向
-        directions = {
-            'front': theta,
-            'right': theta - math.pi/2,
-            'back': theta + math.pi,
-            'left': theta + math.pi/2
-        }
-        
-        for direction_name, angle in directions.items():
-            min_dist = 5.0  # 最大检测距离
-            
-            # 检查到最近障碍物的距离
-            for obs_x, obs_y in self.map_data['obstacles']:
-                # 计算到障碍物的距离
-                dx = obs_x - x
-                dy = obs_y - y
-                
-                # 检查障碍物是否在这个方向上
-                obs_angle = math.atan2(dy, dx)
-                angle_diff = abs(obs_angle - angle)
-                angle_diff = min(angle_diff, 2*math.pi - angle_diff)  # 处理角度环绕
-                
-                if angle_diff < math.pi/4:  # 45度范围内
-                    dist = math.sqrt(dx**2 + dy**2)
-                    if dist < min_dist:
-                        min_dist = dist
-            
-            readings[direction_name] = min_dist
-        
+        readings = {direction: MAX_RANGE for direction in DIRECTIONS}
+        scan_obstacles(x, y, beam_angles(theta), self.map_data['obstacles'], readings)
         return readings
     
     def calculate_likelihood(self, actual, expected):
         """计算传感器读数的似然性"""
         likelihood = 1.0
-        sigma = 0.3  # 传感器噪声标准差
+        sigma = self.sensor_sigma  # 传感器噪声标准差
         
-        for direction in ['front', 'left', 'right', 'back']:
+        for direction in self.active_directions:
             actual_dist = actual.get(direction, 5.0)
             expected_dist = expected.get(direction, 5.0)
             
@@ -353,20 +633,21 @@ class SimpleParticleFilter:
             sin_sum = sum(math.sin(p.theta) * p.weight for p in self.particles) / total_weight
             self.estimated_theta = math.atan2(sin_sum, cos_sum)
     
+    def apply_quality(self):
+        """按看门狗的质量等级调整粒子数（下一次重采样时生效）和参与似然的光束"""
+        if self.full_particles is None:
+            self.full_particles = self.num_particles
+        level = self.watchdog.level
+        self.num_particles = round(self.watchdog.interpolate(self.full_particles, self.full_particles / 3))
+        # 最大降级时只用前后两个方向
+        self.active_directions = ('front', 'back') if level == self.watchdog.max_level else DIRECTIONS
+        print(f"步长预算: 平滑耗时 {self.watchdog.load * 1000:.1f}ms / {self.timestep}ms, "
+              f"质量等级 {level}, 粒子 {self.num_particles}, 光束 {len(self.active_directions)}")
+    
     def get_sensor_data(self):
-        """获取传感器数据"""
-        lidar_data = self.lidar.getRangeImage()
-        
-        if lidar_data:
-            num_points = len(lidar_data)
-            return {
-                'front': lidar_data[num_points//2] if num_points > 0 else 5.0,
-                'left': lidar_data[num_points//4] if num_points > 1 else 5.0,
-                'right': lidar_data[3*num_points//4] if num_points > 2 else 5.0,
-                'back': lidar_data[0] if num_points > 0 else 5.0
-            }
-        else:
-            return {'front': 5.0, 'left': 5.0, 'right': 5.0, 'back': 5.0}
+        """获取传感器数据（无回波截断为5米，与期望读数的最大检测距离一致）"""
+        front, left, right, back = self.sensors.cardinal()
+        return {'front': front, 'left': left, 'right': right, 'back': back}
     
     def handle_keyboard(self):
         """处理键盘输入"""
@@ -396,7 +677,7 @@ class SimpleParticleFilter:
         return True, left_speed, right_speed
     
     def save_results(self):
-        """保存定位结果"""
+        """保存定位结果，成功时返回 True"""
         try:
             with open("localization_results.txt", 'w') as f:
                 f.write("=== 粒子滤波定位结果 ===\n")
@@ -422,8 +703,13 @@ class SimpleParticleFilter:
             
             print("定位结果已保存到: localization_results.txt")
             
+            write_snapshots(SNAPSHOT_FILE, self.particle_snapshots)
+            print(f"粒子快照已保存到: {SNAPSHOT_FILE} ({len(self.particle_snapshots)} 个)")
+            return True
+            
         except Exception as e:
             print(f"保存结果时出错: {e}")
+            return False
     
     def run(self):
         """主循环"""
@@ -431,34 +717,71 @@ class SimpleParticleFilter:
         
         try:
             while self.robot.step(self.timestep) != -1:
+                self.watchdog.begin()
+                if self.first_step_time is None:
+                    self.first_step_time = time.perf_counter() - self.startup_begin
+                    if self.map_loader is None:
+                        self.report_startup()
+                
+                # 本周期传感器快照
+                self.sensors.update()
+                
                 # 处理键盘输入
                 continue_run, left_speed, right_speed = self.handle_keyboard()
                 if not continue_run:
                     break
                 
-                # 获取传感器数据
-                sensor_data = self.get_sensor_data()
+                # 地图仍在后台加载: 只响应键盘控制，不做滤波
+                if not self.finish_map_loading():
+                    self.step_count += 1
+                    if self.watchdog.end():
+                        self.apply_quality()
+                    continue
                 
                 # 执行粒子滤波算法
                 dt = self.timestep / 1000.0  # 转换为秒
+                moving = left_speed != 0.0 or right_speed != 0.0
                 
-                # 1. 预测步骤
-                self.predict_particles(left_speed, right_speed, dt)
-                
-                # 2. 更新权重
-                self.update_weights(sensor_data)
+                # 1. 预测步骤（静止时跳过）
+                stage_start = time.perf_counter()
+                if moving:
+                    self.predict_particles(left_speed, right_speed, dt)
+                    linear_vel, angular_vel = self.body_velocity(left_speed, right_speed)
+                    self.distance_since_update += abs(linear_vel) * dt
+                    self.rotation_since_update += abs(angular_vel) * dt
+                predict_done = time.perf_counter()
                 
-                # 3. 重采样
-                if self.step_count % 10 == 0:  # 每10步重采样一次
+                # 2. 更新权重 + 3. 重采样: 只在累计运动超过阈值后进行
+                update_done = predict_done
+                updated = (self.distance_since_update >= self.update_distance
+                           or self.rotation_since_update >= self.update_rotation)
+                if updated:
+                    self.update_weights(self.get_sensor_data())
+                    update_done = time.perf_counter()
                     self.resample_particles()
+                    self.distance_since_update = 0.0
+                    self.rotation_since_update = 0.0
+                    self.filter_updates += 1
+                resample_done = time.perf_counter()
+                
+                # 4. 估计位置（粒子没有变化时沿用上一次的估计）
+                if moving or updated:
+                    self.estimate_position()
                 
-                # 4. 估计位置
-                self.estimate_position()
+                # 发布估计位姿、粒子云摘要和各阶段耗时（降级时跳过粒子云）
+                if self.telemetry.enabled:
+                    now = self.robot.getTime()
+                    self.telemetry.pose(now, self.estimated_x, self.estimated_y,
+                                        self.estimated_theta, 'particle_filter')
+                    if not self.watchdog.degraded:
+                        self.telemetry.particles(now, self.particles)
+                    self.telemetry.timings(now, {'predict': predict_done - stage_start,
+                                                 'update': update_done - predict_done,
+                                                 'resample': resample_done - update_done})
                 
                 # 记录结果（如果有GPS用于验证）
                 if self.has_gps:
-                    true_pos = self.gps.getValues()
-                    true_x, true_y = true_pos[0], true_pos[1]
+                    true_x, true_y = self.sensors.position
                     error = math.sqrt((self.estimated_x - true_x)**2 + (self.estimated_y - true_y)**2)
                 else:
                     true_x, true_y, error = 0, 0, 0
@@ -474,25 +797,51 @@ class SimpleParticleFilter:
                     'error': error
                 }
                 self.localization_results.append(result)
+                if self.step_count % self.snapshot_interval == 0 and not self.watchdog.degraded:
+                    self.particle_snapshots.append((self.step_count, self.robot.getTime(),
+                                                    snapshot(self.particles)))
                 
                 # 显示信息
                 if self.step_count % 50 == 0:
-                    print(f"步数: {self.step_count}")
+                    print(f"步数: {self.step_count}（观测更新 {self.filter_updates} 次）")
                     print(f"估计位置: ({self.estimated_x:.2f}, {self.estimated_y:.2f})")
                     if self.has_gps:
                         print(f"真实位置: ({true_x:.2f}, {true_y:.2f})")
                         print(f"定位误差: {error:.2f}米")
+                    stats = self.reading_cache.stats()
+                    print(f"期望读数缓存: 命中率 {stats['hit_rate']:.0%}（{stats['size']} 格）")
                     print("---")
                 
+                for line in self.memory.check(self.step_count):
+                    print(line)
+                
                 self.step_count += 1
                 
+                if self.watchdog.end():
+                    self.apply_quality()
+                
         except KeyboardInterrupt:
             print("用户中断程序")
         except Exception as e:
             print(f"程序运行时出错: {e}")
         finally:
+            self.telemetry.close()
+            summary = self.watchdog.summary()
+            print(f"步长预算: {summary['steps']} 步中 {summary['overruns']} 步超时, "
+                  f"平均 {summary['mean_ms']:.1f}ms, 最长 {summary['worst_ms']:.1f}ms, "
+                  f"质量调整 {summary['level_changes']} 次")
+            if self.map_loader is not None:
+                self.map_loader.join()
+            if self.range_table is not None:
+                self.range_table.close()
+            peaks = ", ".join(f"{name} {entry['peak_mb']:.1f}MB" for name, entry in self.memory.summary().items())
+            print(f"内存峰值: {peaks}")
+            self.memory.close()
             print("保存定位结果...")
-            self.save_results()
+            if self.save_results():
+                # 结果已完整写出，删除转存文件（保存失败时保留）
+                self.localization_results.close()
+                self.particle_snapshots.close()
             print("定位测试完成!")
 
 # 主程序
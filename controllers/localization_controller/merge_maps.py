@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+多次建图结果合并工具 - 无外部依赖版本
+用进程池并行解析多个建图日志（含自动建图备份），按栅格累积命中/穿过证据，
+生成一份供粒子滤波定位使用的合并地图 compiled_map.txt；同时记录每个单元被机器人经过的次数
+和近距离命中次数，定位只用机器人到过的单元作为自由空间、近距离命中的单元作为障碍物
+"""
+
+import argparse
+import glob
+import hashlib
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 共享模块目录（建图日志解析）
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from map_io import beam_directions, is_mapping_log, iter_log_chunks, voxel_downsample  # noqa: E402
+
+COMPILED_HEADER = "X,Y,状态,命中次数,穿过次数,近距离命中,经过次数"
+LEGACY_HEADER = "X,Y,状态,命中次数,穿过次数"  # 旧格式（没有近距离命中和经过次数）
+
+FREE = 1       # 与定位地图编码一致: 1=自由空间
+OCCUPIED = 2   # 2=障碍物
+
+
+def default_log_paths(base_dir):
+    """默认输入: 手动建图结果 + 自动建图目录下所有日志和备份"""
+    controllers_dir = os.path.dirname(base_dir)
+    paths = [os.path.join(controllers_dir, "mapping_controller", "simple_map_data.txt")]
+    paths += sorted(glob.glob(os.path.join(controllers_dir, "mapping_controller_auto", "*.txt")))
+    return [path for path in paths if os.path.exists(path) and is_mapping_log(path)]
+
+
+def accumulate_log(path, resolution=0.05, max_range=3.5, near_range=1.0):
+    """解析单个建图日志，返回 (命中计数, 穿过计数, 记录数, 近距离命中计数, 经过计数)
+
+    计数以栅格坐标 (gx, gy) 为键；近距离命中为 near_range 以内的命中（与 map_io.infer_obstacles
+    的1米截断一致），经过计数为机器人位姿所在单元的记录数。
+    """
+    hits = {}
+    misses = {}
+    near_hits = {}
+    visits = {}
+    rows = 0
+
+    for chunk in iter_log_chunks(path):
+        rows += len(chunk)
+        for x, y, angle, distances in zip(chunk.x, chunk.y, chunk.angle, chunk.distances()):
+            x0 = int(math.floor(x / resolution))
+            y0 = int(math.floor(y / resolution))
+            visits[(x0, y0)] = visits.get((x0, y0), 0) + 1
+            for (ux, uy), distance in zip(beam_directions(angle), distances):
+                if not distance > 0:
+                    continue
+                hit = distance < max_range
+                length = distance if hit else max_range
+                x1 = int(math.floor((x + length * ux) / resolution))
+                y1 = int(math.floor((y + length * uy) / resolution))
+
+                # Bresenham: 沿途单元累计穿过，终点累计命中
+                dx = abs(x1 - x0)
+                dy = -abs(y1 - y0)
+                sx = 1 if x0 < x1 else -1
+                sy = 1 if y0 < y1 else -1
+                err = dx + dy
+                cx, cy = x0, y0
+                while cx != x1 or cy != y1:
+                    key = (cx, cy)
+                    misses[key] = misses.get(key, 0) + 1
+                    e2 = 2 * err
+                    if e2 >= dy:
+                        err += dy
+                        cx += sx
+                    if e2 <= dx:
+                        err += dx
+                        cy += sy
+                key = (x1, y1)
+                if hit:
+                    hits[key] = hits.get(key, 0) + 1
+                    if distance < near_range:
+                        near_hits[key] = near_hits.get(key, 0) + 1
+                else:
+                    misses[key] = misses.get(key, 0) + 1
+
+    return hits, misses, rows, near_hits, visits
+
+
+def _accumulate_job(args):
+    return accumulate_log(*args)
+
+
+def unique_logs(paths):
+    """按文件内容去重（自动建图的主文件和备份常常完全相同），避免重复累积证据"""
+    seen = set()
+    unique = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest = hashlib.md5(f.read()).hexdigest()
+        if digest in seen:
+            print(f"   跳过重复文件: {path}")
+            continue
+        seen.add(digest)
+        unique.append(path)
+    return unique
+
+
+def merge_logs(paths, resolution=0.05, max_range=3.5, jobs=None, near_range=1.0):
+    """并行累积多个日志的证据，返回 (命中计数, 穿过计数, 总记录数, 近距离命中计数, 经过计数)"""
+    tasks = [(path, resolution, max_range, near_range) for path in paths]
+    if jobs == 1 or len(tasks) <= 1:
+        results = [_accumulate_job(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_accumulate_job, tasks))
+
+    hits, misses, near_hits, visits = {}, {}, {}, {}
+    total_rows = 0
+    for run_hits, run_misses, rows, run_near_hits, run_visits in results:
+        for merged, run in ((hits, run_hits), (misses, run_misses),
+                            (near_hits, run_near_hits), (visits, run_visits)):
+            for key, count in run.items():
+                merged[key] = merged.get(key, 0) + count
+        total_rows += rows
+    return hits, misses, total_rows, near_hits, visits
+
+
+def classify_cells(hits, misses, occupied_ratio=0.3, near_hits=None, visits=None):
+    """按命中比例判定单元状态，返回 {(gx, gy): (状态, 命中, 穿过, 近距离命中, 经过)}"""
+    near_hits = near_hits or {}
+    visits = visits or {}
+    cells = {}
+    for key in set(hits) | set(misses):
+        hit_count = hits.get(key, 0)
+        miss_count = misses.get(key, 0)
+        ratio = hit_count / (hit_count + miss_count)
+        state = OCCUPIED if hit_count > 0 and ratio >= occupied_ratio else FREE
+        cells[key] = (state, hit_count, miss_count, near_hits.get(key, 0), visits.get(key, 0))
+    return cells
+
+
+def write_compiled_map(filename, cells, resolution, sources, total_rows):
+    """写入合并地图（只保存已观测单元）"""
+    occupied = sum(1 for state, *_ in cells.values() if state == OCCUPIED)
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("=== 合并地图 ===\n")
+        f.write(f"分辨率: {resolution}\n")
+        f.write(f"来源文件数: {len(sources)}\n")
+        f.write(f"总记录数: {total_rows}\n")
+        f.write(f"障碍单元: {occupied}\n")
+        f.write(f"自由单元: {len(cells) - occupied}\n")
+        f.write("\n=== 栅格数据 ===\n")
+        f.write(COMPILED_HEADER + "\n")
+        for (gx, gy), (state, hit_count, miss_count, near_count, visit_count) in sorted(cells.items()):
+            x = (gx + 0.5) * resolution
+            y = (gy + 0.5) * resolution
+            f.write(f"{x:.3f},{y:.3f},{state},{hit_count},{miss_count},{near_count},{visit_count}\n")
+
+
+def load_compiled_map(filename):
+    """读取合并地图，返回 {'resolution', 'obstacles', 'free_space', 'near_obstacles', 'visited'}
+
+    obstacles/free_space 为全部已观测单元（评分、渲染用）；near_obstacles 为有近距离命中的障碍单元，
+    visited 为机器人经过的单元（定位用）。旧格式文件没有这两列，对应项为 None。
+    """
+    compiled = {'resolution': 0.05, 'obstacles': [], 'free_space': [],
+                'near_obstacles': [], 'visited': []}
+    with open(filename, 'r', encoding='utf-8') as f:
+        data_start = False
+        for line in f:
+            if line.startswith("分辨率:"):
+                compiled['resolution'] = float(line.split(':')[1])
+                continue
+            if not data_start:
+                data_start = line.startswith(LEGACY_HEADER)
+                if data_start and not line.startswith(COMPILED_HEADER):
+                    compiled['near_obstacles'] = compiled['visited'] = None
+                continue
+            parts = line.strip().split(',')
+            if len(parts) < 3:
+                continue
+            point = (float(parts[0]), float(parts[1]))
+            occupied = int(parts[2]) == OCCUPIED
+            if occupied:
+                compiled['obstacles'].append(point)
+            else:
+                compiled['free_space'].append(point)
+            if len(parts) >= 7:
+                if occupied and int(parts[5]) > 0:
+                    compiled['near_obstacles'].append(point)
+                if int(parts[6]) > 0:
+                    compiled['visited'].append(point)
+    return compiled
+
+
+def localization_points(compiled, voxel_size=None, free_space_spacing=None):
+    """合并地图中供定位使用的 (障碍物点, 自由空间点)
+
+    只用近距离命中的障碍单元和机器人经过的单元，与从建图日志加载（1米截断、机器人位姿）一致；
+    旧格式文件没有这两列时退回全部单元。voxel_size / free_space_spacing 与日志加载的
+    体素合并、轨迹抽稀对应: 两类单元分别按该尺寸合并为质心。
+    """
+    if compiled['visited'] is None:
+        obstacles, free_space = compiled['obstacles'], compiled['free_space']
+    else:
+        obstacles, free_space = compiled['near_obstacles'], compiled['visited']
+    if voxel_size:
+        obstacles = voxel_downsample(obstacles, voxel_size)[0]
+    if free_space_spacing:
+        free_space = voxel_downsample(free_space, free_space_spacing)[0]
+    return obstacles, free_space
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="合并多次建图日志为一份定位地图")
+    parser.add_argument("logs", nargs="*", help="建图日志路径（默认: 手动+自动建图目录下所有日志）")
+    parser.add_argument("-o", "--output", default=os.path.join(base_dir, "compiled_map.txt"))
+    parser.add_argument("--resolution", type=float, default=0.05, help="栅格分辨率（米）")
+    parser.add_argument("--max-range", type=float, default=3.5, help="视为命中的最大距离（米）")
+    parser.add_argument("--near-range", type=float, default=1.0, help="定位用障碍物的最大命中距离（米）")
+    parser.add_argument("--jobs", type=int, default=None, help="并行进程数（默认CPU核数）")
+    args = parser.parse_args()
+
+    paths = args.logs or default_log_paths(base_dir)
+    print(f"找到 {len(paths)} 个建图日志")
+    paths = unique_logs(paths)
+
+    start = time.perf_counter()
+    hits, misses, total_rows, near_hits, visits = merge_logs(paths, args.resolution, args.max_range,
+                                                             args.jobs, args.near_range)
+    cells = classify_cells(hits, misses, near_hits=near_hits, visits=visits)
+    write_compiled_map(args.output, cells, args.resolution, paths, total_rows)
+    elapsed = time.perf_counter() - start
+
+    occupied = sum(1 for state, *_ in cells.values() if state == OCCUPIED)
+    near = sum(1 for state, _, _, near_count, _ in cells.values() if state == OCCUPIED and near_count)
+    print(f" 合并完成: {len(paths)} 个日志, {total_rows} 条记录, 用时 {elapsed:.2f} 秒")
+    print(f"   - 障碍单元: {occupied} 个")
+    print(f"   - 自由单元: {len(cells) - occupied} 个")
+    print(f"   - 定位用: 近距离障碍 {near} 个, 机器人经过 {len(visits)} 个")
+    print(f"   - 输出文件: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+期望读数查找表 - 无外部依赖版本
+离线为地图范围内每个位置格 × 量化朝向 × 四个测距方向预先计算期望读数（与定位控制器的
+45度扇区最近障碍物模型一致），以小端 uint16 厘米存成紧凑二进制表 range_table.bin，
+和合并地图放在一起。运行时定位控制器只需 mmap 整个文件，粒子的期望读数变成一次下标读取；
+多个控制器进程共享同一份只读页面。
+"""
+
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# 共享模块目录
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from map_io import load_map_points  # noqa: E402
+from merge_maps import load_compiled_map, localization_points  # noqa: E402
+
+TABLE_FILE = "range_table.bin"
+MAX_RANGE = 5.0
+
+# 与定位控制器一致的测距方向顺序及其相对朝向（单位: 90度）
+DIRECTIONS = ('front', 'left', 'right', 'back')
+QUARTER_TURNS = {'front': 0, 'left': 1, 'right': -1, 'back': 2}
+
+# 魔数, 版本, 方向数, 起始格(ix0, iy0), 宽, 高, 朝向数, 分辨率, 地图签名
+_HEADER = struct.Struct('<4sHHiiIIIdI')
+_MAGIC = b'RLUT'
+_VERSION = 1
+
+
+def map_signature(obstacles):
+    """障碍物点集的 CRC32，用于确认查找表与当前加载的地图一致"""
+    flat = array('d')
+    for x, y in obstacles:
+        flat.extend((x, y))
+    return zlib.crc32(flat.tobytes())
+
+
+def load_obstacles(path):
+    """与定位控制器相同的方式加载地图，返回 (障碍物点, 自由空间点)"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        compiled = f.readline().startswith("=== 合并地图")
+    if compiled:
+        return localization_points(load_compiled_map(path), voxel_size=0.1, free_space_spacing=0.1)
+    map_points = load_map_points(path, max_distance=1.0, voxel_size=0.1, path_spacing=0.1)
+    return map_points['obstacles'], map_points['free_space']
+
+
+def cell_ranges(cx, cy, obstacles, headings):
+    """格中心 (cx, cy) 处各量化朝向 × 四个方向的期望读数（厘米）
+
+    方位角按半个朝向格宽分到 2*headings 个细格里，每个扇区正好是连续 headings/2 个细格，
+    扇区最近距离即滑动窗口最小值。控制器的角度差未对超过 π 的绝对角度取模，方位角小于
+    (绝对角度 - 2π) 的障碍物也会落入扇区，这部分用细格前缀最小值补上，保持与控制器一致。
+    """
+    fine = 2 * headings
+    width = math.pi / headings
+    nearest = [MAX_RANGE] * fine
+    for obs_x, obs_y in obstacles:
+        dx = obs_x - cx
+        dy = obs_y - cy
+        index = min(int(math.floor(math.atan2(dy, dx) / width)) + headings, fine - 1)
+        dist = math.sqrt(dx**2 + dy**2)
+        if dist < nearest[index]:
+            nearest[index] = dist
+    prefix = list(nearest)
+    for index in range(1, fine):
+        prefix[index] = min(prefix[index], prefix[index - 1])
+    circular = nearest + nearest
+
+    cone = headings // 2        # 扇区宽度（细格）
+    quarter = headings // 4     # 45度（细格）
+    ranges = []
+    for heading in range(headings):
+        for direction in DIRECTIONS:
+            center = 2 * heading + 1 + QUARTER_TURNS[direction] * headings // 2  # 绝对角度（细格）
+            start = (center - quarter + headings) % fine
+            value = min(circular[start:start + cone])
+            extra = center - headings - 1
+            if extra >= 0:
+                value = min(value, prefix[extra])
+            ranges.append(int(round(value * 100)))
+    return ranges
+
+
+def _row_job(args):
+    iy, ix0, width, resolution, obstacles, headings = args
+    row = array('H')
+    cy = (iy + 0.5) * resolution
+    for ix in range(ix0, ix0 + width):
+        row.extend(cell_ranges((ix + 0.5) * resolution, cy, obstacles, headings))
+    return row
+
+
+def build_table(obstacles, free_space, resolution=0.05, headings=120, margin=0.5, jobs=None):
+    """计算覆盖自由空间外扩 margin 的矩形范围的查找表，返回 (表头字段, 数据)"""
+    if headings % 4:
+        raise ValueError("朝向数必须是4的倍数")
+    points = free_space or obstacles
+    ix0 = math.floor((min(x for x, _ in points) - margin) / resolution)
+    iy0 = math.floor((min(y for _, y in points) - margin) / resolution)
+    width = math.floor((max(x for x, _ in points) + margin) / resolution) - ix0 + 1
+    height = math.floor((max(y for _, y in points) + margin) / resolution) - iy0 + 1
+
+    tasks = [(iy, ix0, width, resolution, obstacles, headings) for iy in range(iy0, iy0 + height)]
+    if jobs == 1:
+        rows = [_row_job(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rows = list(pool.map(_row_job, tasks, chunksize=4))
+    data = array('H')
+    for row in rows:
+        data.extend(row)
+    header = {'ix0': ix0, 'iy0': iy0, 'width': width, 'height': height,
+              'headings': headings, 'resolution': resolution, 'signature': map_signature(obstacles)}
+    return header, data
+
+
+def write_table(filename, header, data):
+    if sys.byteorder != 'little':
+        data = array('H', data)
+        data.byteswap()
+    with open(filename, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(DIRECTIONS), header['ix0'], header['iy0'],
+                             header['width'], header['height'], header['headings'],
+                             header['resolution'], header['signature']))
+        data.tofile(f)
+
+
+class RangeTable:
+    """只读 mmap 的期望读数查找表"""
+
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, beams, self.ix0, self.iy0, self.width, self.height, self.headings,
+             self.resolution, self.signature) = _HEADER.unpack_from(self._mmap)
+            if magic != _MAGIC or version != _VERSION or beams != len(DIRECTIONS):
+                raise ValueError(f"不是有效的查找表文件: {filename}")
+            count = self.width * self.height * self.headings * beams
+            if len(self._mmap) != _HEADER.size + 2 * count:
+                raise ValueError(f"查找表文件长度不符: {filename}")
+        except Exception:
+            self.close()
+            raise
+        if sys.byteorder == 'little':
+            self._view = memoryview(self._mmap)[_HEADER.size:]
+            self.ranges = self._view.cast('H')
+        else:
+            self._view = None
+            self.ranges = array('H', self._mmap[_HEADER.size:])
+            self.ranges.byteswap()
+
+    def matches(self, obstacles, resolution, headings):
+        """表的量化参数和地图签名是否与控制器一致"""
+        return (self.resolution == resolution and self.headings == headings
+                and self.signature == map_signature(obstacles))
+
+    def lookup(self, key):
+        """量化位姿 (ix, iy, 朝向格) -> 四个方向的期望读数（米）；超出表范围返回 None"""
+        gx = key[0] - self.ix0
+        gy = key[1] - self.iy0
+        if not (0 <= gx < self.width and 0 <= gy < self.height):
+            return None
+        offset = ((gy * self.width + gx) * self.headings + key[2] % self.headings) * len(DIRECTIONS)
+        ranges = self.ranges
+        return {'front': ranges[offset] / 100, 'left': ranges[offset + 1] / 100,
+                'right': ranges[offset + 2] / 100, 'back': ranges[offset + 3] / 100}
+
+    def close(self):
+        if getattr(self, 'ranges', None) is not None and self._view is not None:
+            self.ranges.release()
+            self._view.release()
+        self.ranges = None
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+def main():
+    from render_frames import default_map_path
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="预计算定位用的期望读数查找表")
+    parser.add_argument("map", nargs="?", default=None, help="合并地图或建图日志（默认与定位控制器相同的查找顺序）")
+    parser.add_argument("-o", "--output", default=os.path.join(base_dir, TABLE_FILE))
+    parser.add_argument("--resolution", type=float, default=0.05, help="位置量化（米，须与控制器 cache_resolution 一致）")
+    parser.add_argument("--headings", type=int, default=120, help="朝向量化格数（须与控制器一致）")
+    parser.add_argument("--margin", type=float, default=0.5, help="自由空间外扩范围（米）")
+    parser.add_argument("--jobs", type=int, default=None, help="并行进程数（默认CPU核数）")
+    args = parser.parse_args()
+
+    map_file = args.map or default_map_path(base_dir)
+    if map_file is None:
+        print("找不到地图文件")
+        return
+    obstacles, free_space = load_obstacles(map_file)
+    start = time.perf_counter()
+    header, data = build_table(obstacles, free_space, args.resolution, args.headings, args.margin, args.jobs)
+    write_table(args.output, header, data)
+    elapsed = time.perf_counter() - start
+    print(f" 查找表生成完成: {header['width']}×{header['height']} 格 × {header['headings']} 朝向, "
+          f"用时 {elapsed:.2f} 秒")
+    print(f"   - 地图: {map_file} ({len(obstacles)} 个障碍物)")
+    print(f"   - 输出文件: {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+定位结果光栅渲染工具 - 无外部依赖版本
+占用地图只绘制一次作为缓存底图；轨迹随帧增量画到轨迹层上，
+每帧只在轨迹层副本上叠加粒子云、当前位姿和误差，导出编号的二进制PPM帧序列。
+长轨迹先用 LTTB 抽稀，渲染时间与日志长度基本无关。
+"""
+
+import argparse
+import os
+import sys
+import time
+from array import array
+
+# 共享模块目录
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from map_io import load_map_points
+from merge_maps import load_compiled_map
+from particle_log import SNAPSHOT_FILE, iter_snapshots
+from raster import Raster, WorldView, lttb
+from visualize_results import iter_results
+
+BACKGROUND = (190, 190, 190)   # 未知区域
+FREE = (245, 245, 245)
+OBSTACLE = (30, 30, 30)
+TRUE_PATH = (0, 150, 0)
+ESTIMATED_PATH = (30, 90, 230)
+PARTICLE = (220, 0, 200)
+ERROR = (240, 160, 0)
+
+ERROR_BAR_HEIGHT = 4    # 顶部误差条高度（像素）
+
+
+class Trajectory:
+    """列式定位轨迹: 步数、估计位置、真实位置、误差"""
+
+    def __init__(self, rows=()):
+        self.step = array('l')
+        self.estimated_x = array('d')
+        self.estimated_y = array('d')
+        self.true_x = array('d')
+        self.true_y = array('d')
+        self.error = array('d')
+        for step, estimated_x, estimated_y, true_x, true_y, error in rows:
+            self.step.append(step)
+            self.estimated_x.append(estimated_x)
+            self.estimated_y.append(estimated_y)
+            self.true_x.append(true_x)
+            self.true_y.append(true_y)
+            self.error.append(error)
+        # 没有GPS时真实位置全为0，不绘制真实轨迹
+        self.has_truth = any(error > 0 for error in self.error)
+
+    def __len__(self):
+        return len(self.step)
+
+    def estimated(self):
+        return list(zip(self.estimated_x, self.estimated_y))
+
+    def truth(self):
+        return list(zip(self.true_x, self.true_y))
+
+
+def default_map_path(base_dir):
+    """与定位控制器相同的地图优先级: 合并地图 > 手动建图 > 自动建图"""
+    controllers_dir = os.path.dirname(base_dir)
+    for path in (os.path.join(base_dir, "compiled_map.txt"),
+                 os.path.join(controllers_dir, "mapping_controller", "simple_map_data.txt"),
+                 os.path.join(controllers_dir, "mapping_controller_auto", "simple_map_data.txt")):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_map(path):
+    """读取合并地图或建图日志，返回 (障碍物点, 自由空间点, 分辨率)"""
+    if path is None:
+        return [], [], 0.05
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        compiled = f.readline().startswith("=== 合并地图")
+    if compiled:
+        compiled_map = load_compiled_map(path)
+        return compiled_map['obstacles'], compiled_map['free_space'], compiled_map['resolution']
+    map_points = load_map_points(path)
+    return map_points['obstacles'], map_points['free_space'], 0.05
+
+
+class FrameRenderer:
+    """缓存底图 + 增量轨迹层 + 每帧叠加层"""
+
+    def __init__(self, trajectory, obstacles=(), free_space=(), resolution=0.05,
+                 scale=100.0, max_path_points=2000):
+        self.trajectory = trajectory
+        self.view = self._fit_view(trajectory, obstacles, free_space, scale)
+        self.base = self._draw_base(obstacles, free_space, resolution)
+        self.trail = self.base.copy()
+
+        # 抽稀后的轨迹点下标，轨迹层只画到已渲染的帧为止
+        self.estimated_path = self._decimate(trajectory.estimated(), max_path_points)
+        self.true_path = (self._decimate(trajectory.truth(), max_path_points)
+                          if trajectory.has_truth else [])
+        self._estimated_drawn = 0
+        self._true_drawn = 0
+        self.max_error = max(trajectory.error) if len(trajectory) else 0.0
+
+    @staticmethod
+    def _fit_view(trajectory, obstacles, free_space, scale):
+        xs = list(trajectory.estimated_x) + [x for x, _ in obstacles] + [x for x, _ in free_space]
+        ys = list(trajectory.estimated_y) + [y for _, y in obstacles] + [y for _, y in free_space]
+        if trajectory.has_truth:
+            xs += trajectory.true_x
+            ys += trajectory.true_y
+        if not xs:
+            xs, ys = [0.0], [0.0]
+        return WorldView(min(xs), min(ys), max(xs), max(ys), scale)
+
+    def _draw_base(self, obstacles, free_space, resolution):
+        """占用地图底图（只绘制一次）"""
+        view = self.view
+        base = Raster(view.width, view.height, BACKGROUND)
+        half = max(1, int(resolution * view.scale / 2))
+        for points, color in ((free_space, FREE), (obstacles, OBSTACLE)):
+            for x, y in points:
+                px, py = view.to_pixel(x, y)
+                base.fill_rect(px - half, py - half, px + half, py + half, color)
+        return base
+
+    def _decimate(self, points, max_points):
+        return [(index, self.view.to_pixel(*points[index])) for index in lttb(points, max_points)]
+
+    def _advance(self, path, drawn, index, color):
+        """把抽稀路径中下标不超过 index 的新线段画到轨迹层，返回已画到的位置"""
+        while drawn + 1 < len(path) and path[drawn + 1][0] <= index:
+            (x0, y0), (x1, y1) = path[drawn][1], path[drawn + 1][1]
+            self.trail.line(x0, y0, x1, y1, color)
+            drawn += 1
+        return drawn
+
+    def render(self, index, particles=None):
+        """渲染第 index 条记录时刻的帧；index 须单调不减（轨迹层只增不减）"""
+        trajectory = self.trajectory
+        view = self.view
+        if self.true_path:
+            self._true_drawn = self._advance(self.true_path, self._true_drawn, index, TRUE_PATH)
+        self._estimated_drawn = self._advance(self.estimated_path, self._estimated_drawn, index,
+                                              ESTIMATED_PATH)
+
+        frame = self.trail.copy()
+        estimated = view.to_pixel(trajectory.estimated_x[index], trajectory.estimated_y[index])
+        # 最后一个抽稀点到当前位置的线段只画在本帧上
+        if self.estimated_path:
+            frame.line(*self.estimated_path[self._estimated_drawn][1], *estimated, ESTIMATED_PATH)
+
+        if particles:
+            for i in range(0, len(particles) - 2, 3):
+                px, py = view.to_pixel(particles[i], particles[i + 1])
+                frame.dot(px, py, 1, PARTICLE)
+
+        if self.true_path:
+            true = view.to_pixel(trajectory.true_x[index], trajectory.true_y[index])
+            frame.line(*self.true_path[self._true_drawn][1], *true, TRUE_PATH)
+            frame.line(*true, *estimated, ERROR)
+            frame.dot(*true, 2, TRUE_PATH)
+            # 顶部误差条: 长度按全程最大误差归一化
+            if self.max_error > 0:
+                length = int(trajectory.error[index] / self.max_error * frame.width)
+                frame.fill_rect(0, 0, length, ERROR_BAR_HEIGHT, ERROR)
+        frame.dot(*estimated, 2, ESTIMATED_PATH)
+        return frame
+
+
+def frame_indices(count, frames):
+    """在 count 条记录中均匀选取 frames 个帧位置（含首尾）"""
+    frames = min(frames, count)
+    if frames <= 1:
+        return [count - 1] if count else []
+    return [round(k * (count - 1) / (frames - 1)) for k in range(frames)]
+
+
+def render_frames(results_file, output_dir, map_file=None, snapshots_file=None,
+                  frames=100, scale=100.0, max_path_points=2000):
+    """渲染帧序列，返回写出的帧数"""
+    trajectory = Trajectory(iter_results(results_file))
+    if not len(trajectory):
+        return 0
+    obstacles, free_space, resolution = load_map(map_file)
+    renderer = FrameRenderer(trajectory, obstacles, free_space, resolution, scale, max_path_points)
+
+    # 粒子快照按步数对齐: 每帧使用步数不超过该帧的最近一个快照
+    snapshots = iter_snapshots(snapshots_file) if snapshots_file and os.path.exists(snapshots_file) else iter(())
+    pending = next(snapshots, None)
+    particles = None
+
+    os.makedirs(output_dir, exist_ok=True)
+    indices = frame_indices(len(trajectory), frames)
+    for number, index in enumerate(indices):
+        while pending is not None and pending[0] <= trajectory.step[index]:
+            particles = pending[2]
+            pending = next(snapshots, None)
+        frame = renderer.render(index, particles)
+        frame.write_ppm(os.path.join(output_dir, f"frame_{number:05d}.ppm"))
+    return len(indices)
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="渲染定位轨迹和粒子云动画帧（PPM序列）")
+    parser.add_argument("results", nargs="?", default=os.path.join(base_dir, "localization_results.txt"))
+    parser.add_argument("--map", default=None, help="合并地图或建图日志（默认与定位控制器相同的查找顺序）")
+    parser.add_argument("--particles", default=os.path.join(base_dir, SNAPSHOT_FILE), help="粒子快照文件")
+    parser.add_argument("-o", "--output", default="frames", help="帧输出目录")
+    parser.add_argument("--frames", type=int, default=100, help="帧数")
+    parser.add_argument("--scale", type=float, default=100.0, help="像素/米")
+    parser.add_argument("--max-path-points", type=int, default=2000, help="轨迹抽稀后的最大点数")
+    args = parser.parse_args()
+
+    map_file = args.map or default_map_path(base_dir)
+    start = time.perf_counter()
+    count = render_frames(args.results, args.output, map_file, args.particles,
+                          args.frames, args.scale, args.max_path_points)
+    elapsed = time.perf_counter() - start
+    if not count:
+        print(f"没有找到有效的定位数据: {args.results}")
+        return
+    print(f" 渲染完成: {count} 帧, 用时 {elapsed:.2f} 秒")
+    print(f"   - 地图: {map_file or '无'}")
+    print(f"   - 输出目录: {args.output}")
+    print("提示: 可用 ffmpeg -i frames/frame_%05d.ppm out.mp4 合成动画")
+
+
+if __name__ == "__main__":
+    main()
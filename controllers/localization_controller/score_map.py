@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+地图质量评分工具 - 用世界文件编译出的真值栅格评价建图结果
+例: python score_map.py compiled_map.txt ../mapping_controller_auto/auto_map_data.txt
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from map_quality import format_score, ground_truth, score_map  # noqa: E402
+from merge_maps import (LEGACY_HEADER, OCCUPIED, accumulate_log,  # noqa: E402
+                        classify_cells, load_compiled_map)
+from world_geometry import DEFAULT_WORLD  # noqa: E402
+
+
+def load_points(path, resolution=0.05):
+    """读取合并地图或建图日志，返回 (障碍物点, 自由空间点)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        compiled = LEGACY_HEADER in f.read()  # 新旧格式的表头都以它开头
+    if compiled:
+        compiled_map = load_compiled_map(path)
+        return compiled_map['obstacles'], compiled_map['free_space']
+
+    hits, misses, *_ = accumulate_log(path, resolution)
+    obstacles, free_space = [], []
+    for (gx, gy), (state, *_) in classify_cells(hits, misses).items():
+        point = ((gx + 0.5) * resolution, (gy + 0.5) * resolution)
+        (obstacles if state == OCCUPIED else free_space).append(point)
+    return obstacles, free_space
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="用世界文件真值评价建图结果")
+    parser.add_argument("maps", nargs="*", help="合并地图或建图日志（默认: compiled_map.txt）")
+    parser.add_argument("--world", default=DEFAULT_WORLD, help="Webots世界文件")
+    parser.add_argument("--resolution", type=float, default=0.05, help="真值栅格分辨率（米）")
+    parser.add_argument("--tolerance", type=int, default=1, help="精确率/召回率允许的偏差（单元）")
+    args = parser.parse_args()
+
+    truth = ground_truth(args.world, args.resolution)
+    print(f"真值栅格: {truth.width}x{truth.height}, 墙面单元 {len(truth.occupied)} 个")
+    for path in args.maps or [os.path.join(base_dir, "compiled_map.txt")]:
+        if not os.path.exists(path):
+            print(f"跳过不存在的文件: {path}")
+            continue
+        obstacles, free_space = load_points(path, args.resolution)
+        start = time.perf_counter()
+        score = score_map(truth, obstacles, free_space, args.tolerance)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{os.path.basename(path)}: {format_score(score)} ({elapsed:.1f}毫秒)")
+
+
+if __name__ == "__main__":
+    main()
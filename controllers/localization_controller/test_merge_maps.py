@@ -0,0 +1,78 @@
+"""
+测试多次建图合并工具（独立于Webots）
+"""
+
+import os
+import tempfile
+
+from merge_maps import (FREE, OCCUPIED, classify_cells, load_compiled_map, localization_points,
+                        merge_logs, unique_logs, write_compiled_map)
+
+
+def write_log(path, rows):
+    """写一个与建图控制器格式相同的最小日志"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("=== 自动建图数据 ===\n")
+        f.write(f"总步数: {len(rows)}\n")
+        f.write("\n=== 扫描数据 ===\n")
+        f.write("步数,时间,X,Y,角度,前方,左侧,右侧,后方,最小距离\n")
+        for step, (x, front) in enumerate(rows):
+            f.write(f"{step},{step * 0.064:.2f},{x:.3f},0.000,0.000,{front:.2f},5.00,5.00,inf,{front:.2f}\n")
+        f.write("\n=== 统计信息 ===\n平均距离: 1.00m\n")
+
+
+def test_merge_accumulates_evidence_across_runs():
+    """两次运行都看到 x=1.0 处的墙，合并后该单元为障碍物，来路为自由空间"""
+    directory = tempfile.mkdtemp()
+    first = os.path.join(directory, "run_a.txt")
+    second = os.path.join(directory, "run_b.txt")
+    duplicate = os.path.join(directory, "run_a_backup.txt")
+    write_log(first, [(0.0, 1.02), (0.1, 0.92)])
+    write_log(second, [(0.2, 0.82), (0.3, 0.72)])
+    write_log(duplicate, [(0.0, 1.02), (0.1, 0.92)])
+
+    paths = unique_logs([first, second, duplicate])
+    assert paths == [first, second]
+
+    merged = merge_logs(paths, resolution=0.05, jobs=2)
+    assert merged == merge_logs(paths, resolution=0.05, jobs=1)
+    hits, misses, rows, near_hits, visits = merged
+    assert rows == 4
+
+    cells = classify_cells(hits, misses, near_hits=near_hits, visits=visits)
+    assert cells[(20, 0)][0] == OCCUPIED
+    assert cells[(20, 0)][1] == 4
+    assert cells[(10, 0)][0] == FREE
+
+    output = os.path.join(directory, "compiled_map.txt")
+    write_compiled_map(output, cells, 0.05, paths, rows)
+    compiled = load_compiled_map(output)
+    assert compiled['resolution'] == 0.05
+    assert (1.025, 0.025) in compiled['obstacles']
+    assert len(compiled['obstacles']) + len(compiled['free_space']) == len(cells)
+
+    # 定位只用1米内命中过的障碍单元和机器人经过的单元，光束穿过的其余单元不作为自由空间
+    obstacles, free_space = localization_points(compiled)
+    assert obstacles == [(1.025, 0.025)]
+    assert len(free_space) == 4 and all(y == 0.025 and x < 0.35 for x, y in free_space)
+    assert len(free_space) < len(compiled['free_space'])
+    # 与建图日志加载相同的0.1米体素合并: 每个0.1米格只留一个质心
+    obstacles, free_space = localization_points(compiled, voxel_size=0.1, free_space_spacing=0.1)
+    assert obstacles == [(1.025, 0.025)] and len(free_space) <= 4
+    assert len({(int(x // 0.1), int(y // 0.1)) for x, y in free_space}) == len(free_space)
+
+    # 只在1米外命中过的墙计入合并地图，但不作为定位障碍物
+    far = os.path.join(directory, "run_far.txt")
+    write_log(far, [(0.0, 2.52), (0.05, 2.47)])
+    hits, misses, rows, near_hits, visits = merge_logs([far], jobs=1)
+    write_compiled_map(output, classify_cells(hits, misses, near_hits=near_hits, visits=visits), 0.05, [far], rows)
+    compiled = load_compiled_map(output)
+    assert (2.525, 0.025) in compiled['obstacles']
+    assert localization_points(compiled)[0] == []
+    print(f"合并: {rows} 条记录, 障碍 {len(compiled['obstacles'])} 个, 自由 {len(compiled['free_space'])} 个")
+
+
+if __name__ == "__main__":
+    print("=== 多次建图合并测试 ===")
+    test_merge_accumulates_evidence_across_runs()
+    print("\n 合并测试通过！")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+测试期望读数查找表（独立于Webots）
+"""
+
+import math
+import os
+import random
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from range_table import DIRECTIONS, RangeTable, build_table, write_table  # noqa: E402
+
+OFFSETS = {'front': 0.0, 'left': math.pi / 2, 'right': -math.pi / 2, 'back': math.pi}
+
+
+def reference_readings(x, y, theta, obstacles):
+    """与定位控制器 simulate_sensor_reading 相同的扇区模型"""
+    readings = {}
+    for direction in DIRECTIONS:
+        angle = theta + OFFSETS[direction]
+        nearest = 5.0
+        for obs_x, obs_y in obstacles:
+            angle_diff = abs(math.atan2(obs_y - y, obs_x - x) - angle)
+            if min(angle_diff, 2 * math.pi - angle_diff) < math.pi / 4:
+                nearest = min(nearest, math.hypot(obs_x - x, obs_y - y))
+        readings[direction] = nearest
+    return readings
+
+
+def test_table_matches_sector_model():
+    """任意量化位姿查表结果与扇区模型在格中心的读数相差不超过1厘米取整误差；表外返回None"""
+    random.seed(5)
+    obstacles = [(random.uniform(-1.5, 1.5), random.uniform(-1.5, 1.5)) for _ in range(40)]
+    free_space = [(-0.5, -0.5), (0.5, 0.5)]
+    header, data = build_table(obstacles, free_space, resolution=0.1, headings=24, margin=0.3, jobs=1)
+    path = os.path.join(tempfile.mkdtemp(), "range_table.bin")
+    write_table(path, header, data)
+
+    table = RangeTable(path)
+    try:
+        assert table.matches(obstacles, 0.1, 24)
+        assert not table.matches(obstacles[1:], 0.1, 24)
+        step = 2 * math.pi / 24
+        for _ in range(300):
+            key = (random.randint(table.ix0, table.ix0 + table.width - 1),
+                   random.randint(table.iy0, table.iy0 + table.height - 1), random.randrange(24))
+            expected = reference_readings((key[0] + 0.5) * 0.1, (key[1] + 0.5) * 0.1, (key[2] + 0.5) * step, obstacles)
+            got = table.lookup(key)
+            assert all(abs(got[d] - expected[d]) <= 0.005 + 1e-9 for d in DIRECTIONS), (key, got, expected)
+        assert table.lookup((table.ix0 - 1, table.iy0, 0)) is None
+    finally:
+        table.close()
+
+
+if __name__ == "__main__":
+    print("=== 期望读数查找表测试 ===\n")
+    test_table_matches_sector_model()
+    print("\n 期望读数查找表测试完成！")
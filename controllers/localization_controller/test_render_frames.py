@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+测试定位结果光栅渲染（独立于Webots）
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from particle_log import iter_snapshots, snapshot, write_snapshots  # noqa: E402
+from render_frames import FrameRenderer, Trajectory, frame_indices, render_frames  # noqa: E402
+
+
+class FakeParticle:
+    def __init__(self, x, y, theta):
+        self.x = x
+        self.y = y
+        self.theta = theta
+
+
+def write_results(directory, count):
+    path = os.path.join(directory, "localization_results.txt")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("=== 粒子滤波定位结果 ===\n\n步数,时间,估计X,估计Y,估计角度,真实X,真实Y,误差距离\n")
+        for step in range(count):
+            x = step * 0.001
+            f.write(f"{step},{step * 0.064:.2f},{x + 0.05:.4f},0.0500,0.0,{x:.4f},0.0000,0.071\n")
+    return path
+
+
+def test_render_frame_sequence():
+    """长轨迹抽稀后渲染编号帧；粒子快照按步数对齐并画进帧里"""
+    directory = tempfile.mkdtemp()
+    results = write_results(directory, 3000)
+    snapshots = os.path.join(directory, "particle_snapshots.bin")
+    write_snapshots(snapshots, [(step, step * 0.064, snapshot([FakeParticle(1.0, 0.02, 0.0)] * 5))
+                                for step in range(0, 3000, 10)])
+    loaded = list(iter_snapshots(snapshots))
+    assert len(loaded) == 300 and loaded[1][0] == 10 and abs(loaded[1][2][1] - 0.02) < 1e-6
+
+    output = os.path.join(directory, "frames")
+    count = render_frames(results, output, snapshots_file=snapshots, frames=12, max_path_points=50)
+    assert count == 12
+    names = sorted(os.listdir(output))
+    assert names[0] == "frame_00000.ppm" and names[-1] == "frame_00011.ppm"
+    with open(os.path.join(output, names[-1]), 'rb') as f:
+        data = f.read()
+    assert data.startswith(b"P6\n")
+    assert bytes((220, 0, 200)) in data  # 粒子颜色
+
+
+def test_trail_layer_is_incremental():
+    """轨迹层只增不减，底图保持不变；帧位置含首尾"""
+    rows = [(step, step * 0.01, 0.0, step * 0.01, 0.0, 0.0) for step in range(200)]
+    renderer = FrameRenderer(Trajectory(rows), obstacles=[(1.0, 0.3)], max_path_points=20)
+    base = bytes(renderer.base.pixels)
+    first = renderer.render(50)
+    second = renderer.render(199)
+    assert bytes(renderer.base.pixels) == base
+    assert first.pixels != second.pixels
+    assert not renderer.true_path  # 误差全为0: 没有GPS真值
+    assert frame_indices(200, 5) == [0, 50, 100, 149, 199]
+
+
+if __name__ == "__main__":
+    print("=== 定位结果光栅渲染测试 ===\n")
+    test_render_frame_sequence()
+    test_trail_layer_is_incremental()
+    print("\n 定位结果光栅渲染测试完成！")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+测试定位结果流式分析（独立于Webots）
+"""
+
+import math
+import os
+import tempfile
+
+from visualize_results import analyze_results
+
+
+def write_results(rows):
+    path = os.path.join(tempfile.mkdtemp(), "localization_results.txt")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("=== 粒子滤波定位结果 ===\n")
+        f.write(f"总步数: {len(rows)}\n粒子数量: 100\n\n")
+        f.write("步数,时间,估计X,估计Y,估计角度,真实X,真实Y,误差距离\n")
+        for row in rows:
+            f.write(row + "\n")
+        f.write("\n=== 统计信息 ===\n平均定位误差: 0.000米\n")
+    return path
+
+
+def test_single_pass_matches_exact():
+    """单遍累积的移动距离、误差统计与逐条列表计算一致，坏行被跳过"""
+    rows = []
+    estimates = []
+    errors = []
+    for step in range(600):
+        x, y = math.cos(step / 50.0), math.sin(step / 50.0)
+        error = 0.0 if step < 100 else 0.05 + (step % 7) * 0.01
+        estimates.append((x + error, y))
+        errors.append(error)
+        rows.append(f"{step},{step * 0.064:.2f},{x + error:.6f},{y:.6f},0.0,{x:.6f},{y:.6f},{error:.6f}")
+    rows.insert(10, "坏行,1,2,3,4,5,6,7")
+    rows.insert(20, "1,2,3")
+    analysis = analyze_results(write_results(rows))
+
+    assert analysis.count == 600
+    moves = [math.dist(a, b) for a, b in zip(estimates, estimates[1:])]
+    assert abs(analysis.movements.total - sum(moves)) < 1e-4  # 文件中保留6位小数
+    assert analysis.large_movements.count == sum(1 for move in moves if move > 0.1)
+    positive = [error for error in errors if error > 0]
+    assert analysis.errors.count == len(positive) == 500
+    assert abs(analysis.errors.mean - sum(positive) / len(positive)) < 1e-9
+    assert abs(analysis.error_quantiles[0.5].value - sorted(positive)[250]) < 0.011
+    assert [step for step, _ in analysis.error_series] == list(range(0, 600, 50))
+    assert len(analysis.trajectory) == 120
+
+
+if __name__ == "__main__":
+    print("=== 定位结果流式分析测试 ===\n")
+    test_single_pass_matches_exact()
+    print("\n 定位结果流式分析测试完成！")
@@ -1,74 +1,138 @@
 """
 简单的定位结果可视化工具
 读取localization_results.txt并生成简单的文本可视化
+单遍流式分析: 逐行累积在线统计，不把整个结果文件载入内存，数百万行的日志也只占常数内存
 """
 
-def visualize_localization_results():
+import argparse
+import os
+import sys
+
+# 共享模块目录
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from online_stats import DecimatedSeries, Extent, P2Quantile, RunningStats, StreamingHistogram
+
+RESULTS_HEADER = "步数,时间,估计X"
+LARGE_MOVEMENT = 0.1       # 大幅移动阈值（米）
+HISTOGRAM_BINS = 10
+SERIES_CAPACITY = 4096     # 轨迹和误差序列最多保留的点数（超出后自动加倍抽稀步长）
+
+
+def iter_results(results_file, encoding='utf-8'):
+    """逐行产出 (步数, 估计X, 估计Y, 真实X, 真实Y, 误差)，跳过头部和格式错误的行"""
+    with open(results_file, 'r', encoding=encoding) as f:
+        data_start = False
+        for line_num, line in enumerate(f, 1):
+            if not data_start:
+                if RESULTS_HEADER in line:
+                    data_start = True
+                    print(f"找到数据头部在第 {line_num} 行")
+                continue
+            if "===" in line:
+                break  # 统计信息段
+            if not line.strip():
+                continue
+            parts = line.strip().split(',')
+            if len(parts) < 8:
+                print(f"第 {line_num} 行数据格式不正确，字段数: {len(parts)}")
+                continue
+            try:
+                yield (int(parts[0]), float(parts[2]), float(parts[3]),
+                       float(parts[5]), float(parts[6]), float(parts[7]))
+            except ValueError as e:
+                print(f"第 {line_num} 行数据解析错误: {e}")
+
+
+class LocalizationAnalysis:
+    """定位结果的单遍累积器: 轨迹范围、逐步移动、误差分布和抽稀后的时间序列"""
+
+    def __init__(self):
+        self.count = 0
+        # 坐标范围
+        self.estimated = Extent()
+        self.true = Extent()
+        # 相邻估计之间的移动
+        self.movements = RunningStats()
+        self.large_movements = RunningStats()
+        self._previous = None
+        # GPS误差（只统计大于0的误差）
+        self.errors = RunningStats()
+        self.error_histogram = StreamingHistogram()
+        self.error_quantiles = {p: P2Quantile(p) for p in (0.5, 0.9, 0.95)}
+        # 轨迹每5个点取一个，误差序列每50步取一个
+        self.trajectory = DecimatedSeries(SERIES_CAPACITY, stride=5)
+        self.error_series = DecimatedSeries(SERIES_CAPACITY, stride=50)
+
+    def add(self, step, estimated_x, estimated_y, true_x, true_y, error):
+        self.count += 1
+        self.estimated.add(estimated_x, estimated_y)
+        self.true.add(true_x, true_y)
+
+        if self._previous is not None:
+            dx = estimated_x - self._previous[0]
+            dy = estimated_y - self._previous[1]
+            movement = (dx * dx + dy * dy) ** 0.5
+            self.movements.add(movement)
+            if movement > LARGE_MOVEMENT:
+                self.large_movements.add(movement)
+        self._previous = (estimated_x, estimated_y)
+
+        if error > 0:
+            self.errors.add(error)
+            self.error_histogram.add(error)
+            for quantile in self.error_quantiles.values():
+                quantile.add(error)
+
+        self.trajectory.add((estimated_x, estimated_y, true_x, true_y))
+        self.error_series.add((step, error))
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(*row)
+        return self
+
+
+def analyze_results(results_file, encoding='utf-8'):
+    """单遍读取结果文件，返回 LocalizationAnalysis"""
+    return LocalizationAnalysis().extend(iter_results(results_file, encoding))
+
+
+def visualize_localization_results(results_file=None, encoding='utf-8'):
     """可视化定位结果"""
-    import os
-    
     # 获取当前脚本所在目录
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    results_file = os.path.join(current_dir, "localization_results.txt")
-    
+    if results_file is None:
+        results_file = os.path.join(current_dir, "localization_results.txt")
+
     print(f"当前工作目录: {os.getcwd()}")
     print(f"脚本所在目录: {current_dir}")
     print(f"尝试读取文件: {results_file}")
     print(f"文件是否存在: {os.path.exists(results_file)}")
-    
+
     try:
-        # 读取结果文件
-        results = []
-        with open(results_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-            # 跳过头部信息，找到数据开始行
-            data_start = False
-            for line_num, line in enumerate(lines, 1):
-                if "步数,时间,估计X" in line:
-                    data_start = True
-                    print(f"找到数据头部在第 {line_num} 行")
-                    continue
-                
-                if data_start and "===" not in line and line.strip():
-                    parts = line.strip().split(',')
-                    if len(parts) >= 7:
-                        try:
-                            result = {
-                                'step': int(parts[0]),
-                                'estimated_x': float(parts[2]),
-                                'estimated_y': float(parts[3]),
-                                'true_x': float(parts[5]),
-                                'true_y': float(parts[6]),
-                                'error': float(parts[7])
-                            }
-                            results.append(result)
-                        except ValueError as e:
-                            print(f"第 {line_num} 行数据解析错误: {e}")
-                            continue
-                    else:
-                        print(f"第 {line_num} 行数据格式不正确，字段数: {len(parts)}")
-        
-        if not results:
+        analysis = analyze_results(results_file, encoding)
+
+        if not analysis.count:
             print("没有找到有效的定位数据")
             print("请检查localization_results.txt文件格式")
             return
-        
-        print(f"成功读取了 {len(results)} 条定位记录")
-        
+
+        print(f"成功读取了 {analysis.count} 条定位记录")
+
         # 创建简单的轨迹可视化
-        create_trajectory_visualization(results)
-        
+        create_trajectory_visualization(analysis)
+
         # 创建误差分析
-        create_error_analysis(results)
-        
+        create_error_analysis(analysis)
+
     except FileNotFoundError:
         print(f"错误: 找不到文件 {results_file}")
         print("请确认以下情况:")
         print("1. 已运行粒子滤波定位控制器")
         print("2. 文件localization_results.txt已生成")
         print("3. 文件在正确的目录中")
-        
+
         # 列出当前目录的文件
         print(f"\n当前目录 ({current_dir}) 中的文件:")
         try:
@@ -76,157 +140,132 @@ def visualize_localization_results():
                 print(f"  - {file}")
         except Exception as e:
             print(f"  无法列出目录内容: {e}")
-            
+
     except PermissionError:
         print(f"错误: 没有权限读取文件 {results_file}")
     except UnicodeDecodeError:
-        print("错误: 文件编码问题，尝试使用不同编码读取")
-        try:
-            # 尝试其他编码
-            with open(results_file, 'r', encoding='gbk') as f:
-                print("使用GBK编码重新读取...")
-                # 递归调用，但设置标志避免无限循环
-                return visualize_localization_results()
-        except Exception as e2:
-            print(f"其他编码也失败: {e2}")
+        if encoding == 'gbk':
+            print("其他编码也失败，无法读取结果文件")
+            return
+        print("错误: 文件编码问题，使用GBK编码重新读取...")
+        return visualize_localization_results(results_file, encoding='gbk')
     except Exception as e:
         print(f"处理文件时出错: {e}")
         print(f"错误类型: {type(e).__name__}")
         import traceback
         traceback.print_exc()
 
-def create_trajectory_visualization(results):
+def create_trajectory_visualization(analysis):
     """创建轨迹可视化"""
     print("\n=== 生成轨迹可视化 ===")
-    
-    # 计算坐标范围
-    all_x = [r['estimated_x'] for r in results] + [r['true_x'] for r in results]
-    all_y = [r['estimated_y'] for r in results] + [r['true_y'] for r in results]
-    
-    min_x, max_x = min(all_x), max(all_x)
-    min_y, max_y = min(all_y), max(all_y)
-    
+
+    # 坐标范围（估计和真实位置一起）
+    extent = analysis.estimated.union(analysis.true)
+    min_x, max_x, min_y, max_y = extent.min_x, extent.max_x, extent.min_y, extent.max_y
+
     # 创建网格
     grid_size = 30
     grid = [['.' for _ in range(grid_size)] for _ in range(grid_size)]
-    
+
     # 映射坐标到网格
     def coord_to_grid(x, y):
         if max_x == min_x:
             grid_x = grid_size // 2
         else:
             grid_x = int((x - min_x) / (max_x - min_x) * (grid_size - 1))
-        
+
         if max_y == min_y:
             grid_y = grid_size // 2
         else:
             grid_y = int((y - min_y) / (max_y - min_y) * (grid_size - 1))
-        
+
         grid_x = max(0, min(grid_x, grid_size - 1))
         grid_y = max(0, min(grid_y, grid_size - 1))
         return grid_x, grid_y
-    
-    # 标记轨迹
-    for i, result in enumerate(results[::5]):  # 每5个点取一个
+
+    # 标记轨迹（抽稀后的点）
+    for estimated_x, estimated_y, true_x, true_y in analysis.trajectory:
         # 真实轨迹
-        gx, gy = coord_to_grid(result['true_x'], result['true_y'])
+        gx, gy = coord_to_grid(true_x, true_y)
         grid[gy][gx] = 'T'  # True position
-        
+
         # 估计轨迹
-        gx, gy = coord_to_grid(result['estimated_x'], result['estimated_y'])
+        gx, gy = coord_to_grid(estimated_x, estimated_y)
         if grid[gy][gx] == 'T':
             grid[gy][gx] = '*'  # 重叠位置
         else:
             grid[gy][gx] = 'E'  # Estimated position
-    
+
     # 保存可视化
     with open("trajectory_visualization.txt", 'w') as f:
         f.write("=== 机器人轨迹可视化 ===\n")
         f.write("说明: T=真实位置, E=估计位置, *=重叠位置, .=空白\n")
         f.write(f"坐标范围: X[{min_x:.2f}, {max_x:.2f}], Y[{min_y:.2f}, {max_y:.2f}]\n\n")
-        
+
         for row in grid:
             f.write(''.join(row) + '\n')
-    
+
     print("轨迹可视化已保存到: trajectory_visualization.txt")
 
-def create_error_analysis(results):
+def create_error_analysis(analysis):
     """创建误差分析"""
     print("\n=== 生成误差分析 ===")
-    
-    errors = [r['error'] for r in results if r['error'] > 0]
-    
-    if not errors:
+
+    errors = analysis.errors
+
+    if not errors.count:
         print("注意: 没有有效的GPS误差数据（GPS可能未启用或数据为0）")
         print("创建基于粒子分布的分析...")
-        
+
         # 创建基于粒子滤波估计的分析
         with open("error_analysis.txt", 'w') as f:
             f.write("=== 粒子滤波定位分析 ===\n\n")
             f.write("注意: GPS数据不可用，以下分析基于粒子滤波的估计结果\n\n")
-            f.write(f"总定位步数: {len(results)}\n")
-            
+            f.write(f"总定位步数: {analysis.count}\n")
+
             # 分析位置变化
-            if len(results) > 1:
-                distances = []
-                for i in range(1, len(results)):
-                    dx = results[i]['estimated_x'] - results[i-1]['estimated_x']
-                    dy = results[i]['estimated_y'] - results[i-1]['estimated_y']
-                    dist = (dx**2 + dy**2)**0.5
-                    distances.append(dist)
-                
-                avg_movement = sum(distances) / len(distances)
-                total_distance = sum(distances)
-                
-                f.write(f"总移动距离: {total_distance:.3f} 米\n")
-                f.write(f"平均每步移动: {avg_movement:.3f} 米\n")
-                
+            movements = analysis.movements
+            if movements.count:
+                f.write(f"总移动距离: {movements.total:.3f} 米\n")
+                f.write(f"平均每步移动: {movements.mean:.3f} 米\n")
+
                 # 位置范围
-                x_positions = [r['estimated_x'] for r in results]
-                y_positions = [r['estimated_y'] for r in results]
-                
-                f.write(f"X坐标范围: [{min(x_positions):.3f}, {max(x_positions):.3f}] 米\n")
-                f.write(f"Y坐标范围: [{min(y_positions):.3f}, {max(y_positions):.3f}] 米\n")
-                
+                estimated = analysis.estimated
+                f.write(f"X坐标范围: [{estimated.min_x:.3f}, {estimated.max_x:.3f}] 米\n")
+                f.write(f"Y坐标范围: [{estimated.min_y:.3f}, {estimated.max_y:.3f}] 米\n")
+
                 # 移动模式分析
                 f.write("\n=== 移动模式分析 ===\n")
-                large_movements = [d for d in distances if d > 0.1]
-                f.write(f"大幅移动次数 (>0.1m): {len(large_movements)}\n")
-                
-                if large_movements:
-                    f.write(f"最大单步移动: {max(large_movements):.3f} 米\n")
-                
+                f.write(f"大幅移动次数 (>{LARGE_MOVEMENT}m): {analysis.large_movements.count}\n")
+
+                if analysis.large_movements.count:
+                    f.write(f"最大单步移动: {analysis.large_movements.maximum:.3f} 米\n")
+
                 # 粒子滤波收敛性分析
                 f.write("\n=== 粒子滤波表现 ===\n")
                 f.write("粒子滤波算法正常运行，生成了连续的位置估计\n")
                 f.write("建议: 如需验证精度，请在Webots中启用GPS设备\n")
-        
+
         print("基于估计位置的分析已保存到: error_analysis.txt")
         return
-    
-    # 原有的GPS误差分析代码
-    avg_error = sum(errors) / len(errors)
-    max_error = max(errors)
-    min_error = min(errors)
-    
-    # 创建误差直方图（文本版）
-    bins = 10
-    max_bin_error = max_error
-    bin_size = max_bin_error / bins
-    histogram = [0] * bins
-    
-    for error in errors:
-        bin_index = min(int(error / bin_size), bins - 1)
-        histogram[bin_index] += 1
-    
+
+    # GPS误差分析
+    # 误差直方图（文本版）: 在线直方图按最大误差重新分桶
+    bin_size = errors.maximum / HISTOGRAM_BINS
+    histogram = analysis.error_histogram.bins(HISTOGRAM_BINS, errors.maximum)
+
     # 保存分析结果
     with open("error_analysis.txt", 'w') as f:
         f.write("=== 定位误差分析 ===\n\n")
-        f.write(f"总测量次数: {len(errors)}\n")
-        f.write(f"平均误差: {avg_error:.3f} 米\n")
-        f.write(f"最大误差: {max_error:.3f} 米\n") 
-        f.write(f"最小误差: {min_error:.3f} 米\n\n")
-        
+        f.write(f"总测量次数: {errors.count}\n")
+        f.write(f"平均误差: {errors.mean:.3f} 米\n")
+        f.write(f"最大误差: {errors.maximum:.3f} 米\n")
+        f.write(f"最小误差: {errors.minimum:.3f} 米\n")
+        f.write(f"误差标准差: {errors.std:.3f} 米\n")
+        quantiles = analysis.error_quantiles
+        f.write(f"误差分位数: P50 {quantiles[0.5].value:.3f} 米, "
+                f"P90 {quantiles[0.9].value:.3f} 米, P95 {quantiles[0.95].value:.3f} 米\n\n")
+
         f.write("误差分布直方图:\n")
         max_count = max(histogram)
         for i, count in enumerate(histogram):
@@ -235,24 +274,29 @@ def create_error_analysis(results):
             bar_length = int((count / max_count) * 30) if max_count > 0 else 0
             bar = '█' * bar_length
             f.write(f"{bin_start:.2f}-{bin_end:.2f}m: {bar} ({count})\n")
-        
+
         # 误差随时间变化
-        f.write("\n误差随时间变化 (每50步):\n")
+        f.write(f"\n误差随时间变化 (每{analysis.error_series.stride}步):\n")
         f.write("步数, 误差(米)\n")
-        for i in range(0, len(results), 50):
-            if i < len(results) and results[i]['error'] > 0:
-                f.write(f"{results[i]['step']}, {results[i]['error']:.3f}\n")
-    
+        for step, error in analysis.error_series:
+            if error > 0:
+                f.write(f"{step}, {error:.3f}\n")
+
     print("误差分析已保存到: error_analysis.txt")
-    print(f"平均定位误差: {avg_error:.3f} 米")
+    print(f"平均定位误差: {errors.mean:.3f} 米")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="定位结果可视化工具")
+    parser.add_argument("results_file", nargs="?", default=None,
+                        help="定位结果文件（默认脚本目录下的 localization_results.txt）")
+    args = parser.parse_args()
+
     print("定位结果可视化工具")
     print("请确保已运行粒子滤波定位控制器并生成了结果文件")
     print("=" * 50)
-    
-    visualize_localization_results()
-    
+
+    visualize_localization_results(args.results_file)
+
     print("\n可视化完成! 生成的文件:")
     print("- trajectory_visualization.txt (轨迹图)")
     print("- error_analysis.txt (误差分析)")
@@ -4,11 +4,25 @@
 """
 
 from controller import Robot, Keyboard
-import math
 import os
+import sys
+import time
+
+# 共享模块目录（位姿图等）
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from memory_budget import MemoryMonitor, SpillList
+from odometry import WheelOdometry
+from pose_graph import PoseGraphTracker
+from scan_matcher import LidarOdometry, ScanMatcher
+from sensor_frame import SensorFrame
+from step_watchdog import StepWatchdog
+from telemetry import TelemetryPublisher
 
 class MinimalMappingController:
     def __init__(self):
+        self.startup_begin = time.perf_counter()
+        
         # 初始化机器人
         self.robot = Robot()
         self.timestep = int(self.robot.getBasicTimeStep())
@@ -44,11 +58,47 @@ class MinimalMappingController:
             self.has_compass = False
             print("Warning: Compass not found")
         
+        # 轮子编码器 - 没有GPS时为位姿图提供里程计约束
+        try:
+            self.left_wheel_sensor = self.robot.getDevice('left wheel sensor')
+            self.right_wheel_sensor = self.robot.getDevice('right wheel sensor')
+            self.left_wheel_sensor.enable(self.timestep)
+            self.right_wheel_sensor.enable(self.timestep)
+            self.has_wheel_sensors = True
+        except:
+            self.has_wheel_sensors = False
+            print("Warning: Wheel sensors not found")
+        
+        # 每周期只读取一次激光/GPS/指南针，各算法共享同一帧
+        self.sensors = SensorFrame(self.lidar,
+                                   self.gps if self.has_gps else None,
+                                   self.compass if self.has_compass else None)
+        
+        # 位姿图 - 没有GPS/指南针时替代基于步数的假位置
+        self.use_pose_graph = not (self.has_gps and self.has_compass)
+        self.odometry = WheelOdometry()
+        self.scan_matcher = ScanMatcher()
+        self.lidar_odometry = LidarOdometry(self.scan_matcher)  # 激光里程计前端（修正轮式里程计）
+        self.pose_tracker = PoseGraphTracker(matcher=self.scan_matcher.match_scans)
+        self.wheel_speeds = (0.0, 0.0)  # 上一次的指令轮速（没有编码器时积分）
+        
+        # 实时遥测（设置 WEBOTS_TELEMETRY 时启用）
+        self.telemetry = TelemetryPublisher.from_environment()
+        
+        # 控制周期看门狗: 记录超出 basicTimeStep 预算的步数，降级时停发遥测
+        self.watchdog = StepWatchdog(self.timestep)
+        
         # 简单的数据存储
-        self.scan_data = []
+        self.scan_data = SpillList("scan_data.spill")
         self.position_data = []
         self.step_count = 0
         
+        # 内存统计: 长时间探索时按子系统报告占用，扫描记录超出软预算时转存到磁盘
+        # （WEBOTS_MEMORY_TRACE 启用 tracemalloc 热点报告，WEBOTS_MEMORY_BUDGETS 覆盖预算）
+        self.memory = MemoryMonitor.from_environment()
+        self.memory.track('scan_data', lambda: self.scan_data, budget_mb=64, spill=True)
+        self.memory.track('pose_tracker', lambda: self.pose_tracker, budget_mb=64)
+        
         print("极简建图控制器启动成功!")
         print("=== 控制说明 ===")
         print("W: 前进")
@@ -62,30 +112,46 @@ class MinimalMappingController:
     def get_robot_position(self):
         """获取机器人位置（如果有GPS）"""
         if self.has_gps:
-            gps_values = self.gps.getValues()
-            return gps_values[0], gps_values[1]
+            return self.sensors.position
         else:
-            # 简单的位置估计（基于步数）
-            return self.step_count * 0.01, 0
+            # 位姿图估计（里程计约束 + 回环优化）
+            x, y, _ = self.pose_tracker.pose
+            return x, y
     
     def get_robot_orientation(self):
         """获取机器人方向（如果有指南针）"""
         if self.has_compass:
-            compass_values = self.compass.getValues()
-            return math.atan2(compass_values[0], compass_values[1])
+            return self.sensors.heading
+        else:
+            return self.pose_tracker.pose[2]
+    
+    def update_pose_graph(self):
+        """用轮式里程计+激光里程计推进位姿图（没有GPS/指南针时）"""
+        if not self.use_pose_graph:
+            return
+        
+        if self.has_wheel_sensors:
+            dx, dy, dtheta = self.odometry.update(self.left_wheel_sensor.getValue(),
+                                                  self.right_wheel_sensor.getValue())
+        else:
+            left_speed, right_speed = self.wheel_speeds
+            dx, dy, dtheta = self.odometry.from_velocities(left_speed, right_speed,
+                                                           self.timestep / 1000.0)
+        
+        # 扫描到关键帧匹配细化轮式里程计初值；同一帧扫描也用于回环检测
+        scan = self.sensors.ranges
+        if scan:
+            dx, dy, dtheta = self.lidar_odometry.update(scan, (dx, dy, dtheta))
+            information = self.lidar_odometry.information if self.lidar_odometry.last_matched else None
+            self.pose_tracker.add_motion(dx, dy, dtheta, scan=scan, information=information)
         else:
-            return 0.0
+            self.pose_tracker.add_motion(dx, dy, dtheta)
     
     def collect_scan_data(self):
         """收集激光雷达数据"""
-        lidar_data = self.lidar.getRangeImage()
-        if lidar_data:
-            # 记录关键方向的距离
-            num_points = len(lidar_data)
-            front = lidar_data[num_points//2] if num_points > 0 else 999
-            left = lidar_data[num_points//4] if num_points > 1 else 999
-            right = lidar_data[3*num_points//4] if num_points > 2 else 999
-            back = lidar_data[0] if num_points > 0 else 999
+        if self.sensors.ranges:
+            # 记录关键方向的距离（无回波截断为5米）
+            front, left, right, back = self.sensors.cardinal()
             
             # 获取位置信息
             x, y = self.get_robot_position()
@@ -146,14 +212,15 @@ class MinimalMappingController:
         # 设置电机速度
         self.left_motor.setVelocity(left_speed)
         self.right_motor.setVelocity(right_speed)
+        self.wheel_speeds = (left_speed, right_speed)
         
         return True
     
     def save_simple_map(self):
-        """保存简单的地图数据"""
+        """保存简单的地图数据，成功时返回 True"""
         if not self.scan_data:
             print("没有收集到数据!")
-            return
+            return False
         
         # 创建简单的文本地图
         filename = "simple_map_data.txt"
@@ -200,9 +267,11 @@ class MinimalMappingController:
             print("   - simple_map_visualization.txt (ASCII可视化)")  
             print("   - map_image.ppm (图片文件，可用于报告)")
             print("   这些文件满足了任务要求：地图数据和图片都已生成！")
+            return True
             
         except Exception as e:
             print(f"保存文件时出错: {e}")
+            return False
     
     def create_simple_visualization(self):
         """创建简单的ASCII艺术地图和PPM图片"""
@@ -297,6 +366,20 @@ class MinimalMappingController:
         
         try:
             while self.robot.step(self.timestep) != -1:
+                self.watchdog.begin()
+                if self.step_count == 0:
+                    print(f"启动耗时: 首个控制周期 {(time.perf_counter() - self.startup_begin) * 1000:.0f}ms")
+                
+                # 本周期传感器快照
+                self.sensors.update()
+                
+                # 推进位姿图（没有GPS时）
+                self.update_pose_graph()
+                if self.telemetry.enabled and not self.watchdog.degraded:
+                    x, y = self.get_robot_position()
+                    self.telemetry.pose(self.robot.getTime(), x, y, self.get_robot_orientation(),
+                                        'pose_graph' if self.use_pose_graph else 'gps')
+                
                 # 处理键盘输入
                 if not self.handle_keyboard():
                     break
@@ -304,17 +387,32 @@ class MinimalMappingController:
                 # 收集传感器数据
                 self.collect_scan_data()
                 
+                for line in self.memory.check(self.step_count):
+                    print(line)
+                
                 # 增加步数计数
                 self.step_count += 1
+                
+                if self.watchdog.end():
+                    print(f"步长预算: 平滑耗时 {self.watchdog.load * 1000:.1f}ms / {self.timestep}ms, "
+                          f"质量等级 {self.watchdog.level}")
         
         except KeyboardInterrupt:
             print("用户中断程序")
         except Exception as e:
             print(f"程序运行时出错: {e}")
         finally:
-            # 保存数据
+            self.telemetry.close()
+            budget = self.watchdog.summary()
+            print(f"步长预算: {budget['steps']} 步中 {budget['overruns']} 步超时, "
+                  f"最长 {budget['worst_ms']:.1f}ms")
+            peaks = ", ".join(f"{name} {entry['peak_mb']:.1f}MB" for name, entry in self.memory.summary().items())
+            print(f"内存峰值: {peaks}")
+            self.memory.close()
+            # 保存数据（成功后删除转存文件）
             print("保存地图数据...")
-            self.save_simple_map()
+            if self.save_simple_map():
+                self.scan_data.close()
             print("建图完成!")
 
 # 主程序
@@ -0,0 +1,106 @@
+"""
+探索效率指标记录器 - 无外部依赖版本
+实时统计已探索面积、覆盖速率、被困/脱困时间和行驶距离，低开销写入CSV
+"""
+
+import math
+
+
+class ExplorationMetrics:
+    HEADER = "步数,时间,已探索面积,区间新观测单元,每步新观测单元,覆盖速率,被困时间,脱困时间,行驶距离\n"
+
+    def __init__(self, filename="exploration_metrics.csv", cell_area=0.0025,
+                 timestep=0.064, interval=10):
+        self.filename = filename
+        self.cell_area = cell_area  # 单个栅格面积（平方米）
+        self.timestep = timestep    # 控制周期（秒）
+        self.interval = interval    # 每隔多少步写一行
+
+        # 累计计数器
+        self.start_time = None
+        self.last_time = 0.0
+        self.known_cells = 0
+        self.last_row_cells = 0
+        self.last_row_step = 0
+        self.stuck_time = 0.0
+        self.escape_time = 0.0
+        self.distance = 0.0
+        self.last_position = None
+        self.last_step = 0
+        self.steps = 0
+
+        self.file = None
+        if filename:
+            # 大缓冲区，避免每行触发磁盘写入
+            self.file = open(filename, 'w', buffering=65536)
+            self.file.write(self.HEADER)
+
+    def record(self, step, sim_time, position, known_cells, motion_state):
+        """记录一个控制周期；motion_state为'stuck'或'escape'时累计对应时间"""
+        if self.start_time is None:
+            self.start_time = sim_time
+        self.last_time = sim_time
+        self.known_cells = known_cells
+        self.last_step = step
+        self.steps += 1
+
+        if motion_state == "stuck":
+            self.stuck_time += self.timestep
+        elif motion_state == "escape":
+            self.escape_time += self.timestep
+
+        if self.last_position is not None:
+            self.distance += math.hypot(position[0] - self.last_position[0],
+                                        position[1] - self.last_position[1])
+        self.last_position = position
+
+        if self.file and step - self.last_row_step >= self.interval:
+            self._write_row(step)
+
+    def explored_area(self):
+        """已探索面积（平方米）"""
+        return self.known_cells * self.cell_area
+
+    def coverage_rate(self):
+        """每仿真秒新增的探索面积（平方米/秒）"""
+        elapsed = self.last_time - (self.start_time or 0.0)
+        return self.explored_area() / elapsed if elapsed > 0 else 0.0
+
+    def _write_row(self, step):
+        new_cells = self.known_cells - self.last_row_cells
+        steps = max(step - self.last_row_step, 1)
+        self.file.write(f"{step},{self.last_time:.2f},{self.explored_area():.3f},"
+                        f"{new_cells},{new_cells / steps:.2f},{self.coverage_rate():.4f},"
+                        f"{self.stuck_time:.2f},{self.escape_time:.2f},{self.distance:.3f}\n")
+        self.last_row_cells = self.known_cells
+        self.last_row_step = step
+
+    def summary(self):
+        """返回当前累计指标"""
+        return {
+            'steps': self.steps,
+            'time': self.last_time - (self.start_time or 0.0),
+            'explored_area': self.explored_area(),
+            'coverage_rate': self.coverage_rate(),
+            'stuck_time': self.stuck_time,
+            'escape_time': self.escape_time,
+            'distance': self.distance,
+        }
+
+    def close(self):
+        """写入统计信息并关闭文件"""
+        if not self.file:
+            return
+        if self.last_step > self.last_row_step:
+            self._write_row(self.last_step)
+        summary = self.summary()
+        self.file.write("\n=== 统计信息 ===\n")
+        self.file.write(f"总步数: {summary['steps']}\n")
+        self.file.write(f"探索时间: {summary['time']:.2f}秒\n")
+        self.file.write(f"已探索面积: {summary['explored_area']:.2f}平方米\n")
+        self.file.write(f"覆盖速率: {summary['coverage_rate']:.4f}平方米/秒\n")
+        self.file.write(f"被困时间: {summary['stuck_time']:.2f}秒\n")
+        self.file.write(f"脱困时间: {summary['escape_time']:.2f}秒\n")
+        self.file.write(f"行驶距离: {summary['distance']:.2f}米\n")
+        self.file.close()
+        self.file = None
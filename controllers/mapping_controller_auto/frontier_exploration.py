@@ -0,0 +1,155 @@
+"""
+前沿探索引擎 - 无外部依赖版本
+增量维护已知/未知边界（前沿）单元，聚类后选择最优目标
+"""
+
+import math
+from collections import deque
+
+
+class FrontierCluster:
+    """前沿聚类 - 一组相连的前沿单元"""
+    def __init__(self, cells, centroid, target):
+        self.cells = cells        # 单元索引列表
+        self.centroid = centroid  # 聚类质心 (x, y)
+        self.target = target      # 离质心最近的前沿单元中心 (x, y)
+
+    @property
+    def size(self):
+        return len(self.cells)
+
+
+class FrontierExplorer:
+    def __init__(self, grid, min_cluster_size=4, goal_tolerance=0.25,
+                 goal_timeout_steps=250, replan_interval=10, blacklist_radius=0.3):
+        self.grid = grid
+        self.frontiers = set()  # 当前所有前沿单元索引
+
+        # 目标选择参数
+        self.min_cluster_size = min_cluster_size
+        self.goal_tolerance = goal_tolerance
+        self.goal_timeout_steps = goal_timeout_steps
+        self.replan_interval = replan_interval
+        self.blacklist_radius = blacklist_radius
+
+        self.goal = None
+        self.goal_steps = 0
+        self.last_plan_step = None
+        self.blacklist = []  # 无法到达的目标点
+
+    def is_frontier(self, index):
+        """空闲单元且至少有一个未知四邻域即为前沿（忽略射线间孤立的未知空洞）"""
+        grid = self.grid
+        state = grid.state
+        if state[index] != grid.FREE:
+            return False
+        for neighbor in grid.neighbors4(index):
+            if state[neighbor] != grid.UNKNOWN:
+                continue
+            for second in grid.neighbors4(neighbor):
+                if state[second] == grid.UNKNOWN:
+                    return True
+        return False
+
+    def update(self, changed_cells):
+        """根据地图变化增量更新前沿集合（只检查变化单元两格以内的邻域）"""
+        neighbors4 = self.grid.neighbors4
+        to_check = set()
+        for index in changed_cells:
+            to_check.add(index)
+            for neighbor in neighbors4(index):
+                to_check.add(neighbor)
+                to_check.update(neighbors4(neighbor))
+
+        for index in to_check:
+            if self.is_frontier(index):
+                self.frontiers.add(index)
+            else:
+                self.frontiers.discard(index)
+
+    def clusters(self):
+        """将前沿单元按八邻域连通性聚类"""
+        width = self.grid.width
+        remaining = set(self.frontiers)
+        result = []
+
+        while remaining:
+            seed = remaining.pop()
+            cells = [seed]
+            queue = deque([seed])
+            while queue:
+                index = queue.popleft()
+                gx = index % width
+                for dy in (-width, 0, width):
+                    for dx in (-1, 0, 1):
+                        if dx == 0 and dy == 0:
+                            continue
+                        if (gx == 0 and dx < 0) or (gx == width - 1 and dx > 0):
+                            continue
+                        neighbor = index + dy + dx
+                        if neighbor in remaining:
+                            remaining.discard(neighbor)
+                            cells.append(neighbor)
+                            queue.append(neighbor)
+
+            if len(cells) < self.min_cluster_size:
+                continue
+
+            points = [self.grid.index_to_world(index) for index in cells]
+            cx = sum(p[0] for p in points) / len(points)
+            cy = sum(p[1] for p in points) / len(points)
+            # 目标取离质心最近且不在黑名单中的前沿单元
+            candidates = [p for p in points if not self.is_blacklisted(p)]
+            if not candidates:
+                continue
+            target = min(candidates, key=lambda p: (p[0] - cx)**2 + (p[1] - cy)**2)
+            result.append(FrontierCluster(cells, (cx, cy), target))
+
+        return result
+
+    def is_blacklisted(self, point):
+        """检查目标是否在黑名单附近"""
+        for bx, by in self.blacklist:
+            if math.hypot(point[0] - bx, point[1] - by) < self.blacklist_radius:
+                return True
+        return False
+
+    def select_goal(self, x, y):
+        """选择得分最高的前沿聚类: 信息增益(单元数) / 距离代价"""
+        best_target = None
+        best_score = 0.0
+        for cluster in self.clusters():
+            distance = math.hypot(cluster.target[0] - x, cluster.target[1] - y)
+            score = cluster.size / (1.0 + distance)
+            if score > best_score:
+                best_score = score
+                best_target = cluster.target
+        return best_target
+
+    def abandon_goal(self):
+        """当前目标不可达（如路径规划失败），加入黑名单并立即重新选择"""
+        if self.goal is not None:
+            self.blacklist.append(self.goal)
+        self.goal = None
+        self.last_plan_step = None
+
+    def next_goal(self, x, y, step_count):
+        """返回当前探索目标，处理到达、超时和定期重新规划；没有前沿时返回None"""
+        if self.goal is not None:
+            self.goal_steps += 1
+            if math.hypot(self.goal[0] - x, self.goal[1] - y) < self.goal_tolerance:
+                self.goal = None
+            elif self.goal_steps > self.goal_timeout_steps:
+                # 长时间无法到达，加入黑名单
+                self.abandon_goal()
+
+        if (self.goal is None or self.last_plan_step is None or
+                step_count - self.last_plan_step >= self.replan_interval):
+            new_goal = self.select_goal(x, y)
+            self.last_plan_step = step_count
+            if new_goal is None or self.goal is None or \
+                    math.hypot(new_goal[0] - self.goal[0], new_goal[1] - self.goal[1]) > self.goal_tolerance:
+                self.goal_steps = 0
+            self.goal = new_goal
+
+        return self.goal
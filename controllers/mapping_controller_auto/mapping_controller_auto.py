@@ -5,10 +5,32 @@
 
 from controller import Robot, Keyboard
 import math
+import os
 import random
+import sys
+import time
+
+# 共享模块目录（占用栅格等）
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from occupancy_grid import OccupancyGrid
+from memory_budget import MemoryMonitor, SpillList
+from odometry import WheelOdometry
+from pose_graph import PoseGraphTracker
+from scan_matcher import LidarOdometry, ScanMatcher
+from frontier_exploration import FrontierExplorer
+from path_planner import DStarLite, lookahead_point
+from costmap import Costmap
+from exploration_metrics import ExplorationMetrics
+from sensor_frame import SensorFrame
+from control_log import ControlLogger
+from step_watchdog import StepWatchdog
+from telemetry import TelemetryPublisher
 
 class AutoMappingController:
     def __init__(self):
+        self.startup_begin = time.perf_counter()
+        
         # 初始化机器人
         self.robot = Robot()
         self.timestep = int(self.robot.getBasicTimeStep())
@@ -44,8 +66,32 @@ class AutoMappingController:
             self.has_compass = False
             print("Warning: Compass not found")
         
+        # 轮子编码器 - 没有GPS时为位姿图提供里程计约束
+        try:
+            self.left_wheel_sensor = self.robot.getDevice('left wheel sensor')
+            self.right_wheel_sensor = self.robot.getDevice('right wheel sensor')
+            self.left_wheel_sensor.enable(self.timestep)
+            self.right_wheel_sensor.enable(self.timestep)
+            self.has_wheel_sensors = True
+        except Exception:
+            self.has_wheel_sensors = False
+            print("Warning: Wheel sensors not found")
+        
+        # 每周期只读取一次激光/GPS/指南针，各算法共享同一帧
+        self.sensors = SensorFrame(self.lidar,
+                                   self.gps if self.has_gps else None,
+                                   self.compass if self.has_compass else None)
+        
+        # 位姿图 - 没有GPS/指南针时替代基于步数的假位置
+        self.use_pose_graph = not (self.has_gps and self.has_compass)
+        self.odometry = WheelOdometry()
+        self.scan_matcher = ScanMatcher()
+        self.lidar_odometry = LidarOdometry(self.scan_matcher)  # 激光里程计前端（修正轮式里程计）
+        self.pose_tracker = PoseGraphTracker(matcher=self.scan_matcher.match_scans)
+        self.wheel_speeds = (0.0, 0.0)  # 上一次的指令轮速（没有编码器时积分）
+        
         # 简单的数据存储
-        self.scan_data = []
+        self.scan_data = SpillList("scan_data.spill")
         self.position_data = []
         self.step_count = 0
         
@@ -61,6 +107,62 @@ class AutoMappingController:
         self.stuck_counter = 0  # 被困计数器
         self.exploration_direction = 1  # 探索偏好方向: 1=右转, -1=左转
         self.continuous_turn_time = 0  # 连续转向时间
+        self.forward_speed = 3.0  # 前方安全时的前进速度
+        self.cautious_speed = 1.0  # 前方空间很小时的小心前进速度
+        self.escape_turn_speed = 3.0  # 有转向空间时的脱困转速
+        self.direction_flip_interval = 50  # 每隔几步翻转探索偏好方向
+        self.random_turn_interval = 30  # 每隔几步尝试一次随机转向
+        self.random_turn_probability = 0.5  # 随机转向的触发概率
+        self.random_turn_speed = 3.5  # 随机转向速度
+        self.max_continuous_turn = 30  # 连续转向超过该步数时强制前进
+        
+        # 前沿探索参数 - 需要可靠位姿（GPS+指南针，或编码器驱动的位姿图）
+        self.occupancy_grid = OccupancyGrid(resolution=0.05)
+        self.frontier_explorer = FrontierExplorer(self.occupancy_grid)
+        self.costmap = Costmap(self.occupancy_grid)  # 障碍物距离场 + 膨胀代价
+        self.path_planner = DStarLite(self.occupancy_grid, cell_cost=self.costmap)  # 到前沿目标的增量路径规划
+        self.planned_goal = None  # 当前规划对应的目标单元
+        self.planned_path = None  # 上次规划的路径（两次重规划之间沿用）
+        self.last_path_step = 0
+        self.path_replan_interval = 5  # 每隔几步做一次增量重规划
+        self.path_lookahead = 0.3  # 路径跟踪前视距离（米）
+        self.frontier_min_speed_ratio = 0.4  # 贴近障碍物时的最低速度比例
+        reliable_pose = (self.has_gps and self.has_compass) or self.has_wheel_sensors
+        self.exploration_strategy = "frontier" if reliable_pose else "reactive"
+        self.lidar_max_range = 3.5  # LDS-01最大量程（米）
+        self.map_beam_stride = 2  # 建图时每隔几束取一束
+        self.frontier_warmup_steps = 100  # 预热步数内不判定探索完成
+        self.frontier_forward_speed = 3.0  # 驶向前沿时的基础速度
+        self.frontier_turn_speed = 2.0  # 原地转向速度
+        self.frontier_heading_gain = 1.5  # 航向误差比例增益
+        self.frontier_turn_in_place = 0.6  # 航向误差超过该值时原地转向（弧度）
+        
+        # 控制循环日志: 后台线程写出，脱困/随机转向等高频消息按仿真时间限流
+        self.log = ControlLogger(clock=self.robot.getTime,
+                                 rate_limits={'escape': 1.0, 'random_turn': 1.0,
+                                              'force_forward': 1.0, 'manual': 0.5})
+        
+        # 实时遥测（设置 WEBOTS_TELEMETRY=udp://127.0.0.1:5600 时启用，发不出去直接丢弃）
+        self.telemetry = TelemetryPublisher.from_environment()
+        
+        # 控制周期看门狗: 循环持续超出 basicTimeStep 预算时建图隔更多束取一束、放慢重规划并停发遥测，
+        # 余量恢复后逐级回升
+        self.watchdog = StepWatchdog(self.timestep)
+        self.quality_baseline = None  # 首次降级时记录的全质量参数 (map_beam_stride, path_replan_interval)
+        
+        # 内存统计: 长时间探索时按子系统报告占用，扫描记录超出软预算时转存到磁盘
+        # （WEBOTS_MEMORY_TRACE 启用 tracemalloc 热点报告，WEBOTS_MEMORY_BUDGETS 覆盖预算）
+        self.memory = MemoryMonitor.from_environment()
+        self.memory.track('scan_data', lambda: self.scan_data, budget_mb=64, spill=True)
+        self.memory.track('occupancy_grid', lambda: self.occupancy_grid, budget_mb=64)
+        self.memory.track('pose_tracker', lambda: self.pose_tracker, budget_mb=64)
+        
+        # 探索效率指标 - 每10步写一行到CSV
+        self.motion_state = "forward"  # forward/cautious/escape/stuck/frontier/manual
+        self.metrics = ExplorationMetrics("exploration_metrics.csv",
+                                          cell_area=self.occupancy_grid.resolution ** 2,
+                                          timestep=self.timestep / 1000.0,
+                                          interval=10)
         
         print("自动建图控制器启动成功!")
         print("=== 极激进探索模式 ===")
@@ -69,7 +171,9 @@ class AutoMappingController:
         print(f"障碍物阈值: {self.obstacle_threshold}米（极敏感）")
         print(f"转向阈值: {self.turn_threshold}米（极低，最大探索空间）")
         print(f"最小安全距离: {self.min_safe_distance}米（几乎贴墙）")
+        print(f"探索策略: {'前沿探索' if self.exploration_strategy == 'frontier' else '反应式探索'}")
         print("按M键: 切换手动/自动模式")
+        print("按F键: 切换前沿/反应式探索策略")
         print("手动模式: WASD控制")
         print("Q: 退出并保存数据")
         print("====================")
@@ -77,38 +181,44 @@ class AutoMappingController:
     def get_robot_position(self):
         """获取机器人位置（如果有GPS）"""
         if self.has_gps:
-            gps_values = self.gps.getValues()
-            return gps_values[0], gps_values[1]
+            return self.sensors.position
         else:
-            # 简单的位置估计（基于步数）
-            return self.step_count * 0.01, 0
+            # 位姿图估计（里程计约束 + 回环优化）
+            x, y, _ = self.pose_tracker.pose
+            return x, y
     
     def get_robot_orientation(self):
         """获取机器人方向（如果有指南针）"""
         if self.has_compass:
-            compass_values = self.compass.getValues()
-            return math.atan2(compass_values[0], compass_values[1])
+            return self.sensors.heading
         else:
-            return 0.0
+            return self.pose_tracker.pose[2]
+    
+    def update_pose_graph(self):
+        """用轮式里程计+激光里程计推进位姿图（没有GPS/指南针时）"""
+        if not self.use_pose_graph:
+            return
+        
+        if self.has_wheel_sensors:
+            dx, dy, dtheta = self.odometry.update(self.left_wheel_sensor.getValue(),
+                                                  self.right_wheel_sensor.getValue())
+        else:
+            left_speed, right_speed = self.wheel_speeds
+            dx, dy, dtheta = self.odometry.from_velocities(left_speed, right_speed,
+                                                           self.timestep / 1000.0)
+        
+        # 扫描到关键帧匹配细化轮式里程计初值；同一帧扫描也用于回环检测
+        scan = self.sensors.ranges
+        if scan:
+            dx, dy, dtheta = self.lidar_odometry.update(scan, (dx, dy, dtheta))
+            information = self.lidar_odometry.information if self.lidar_odometry.last_matched else None
+            self.pose_tracker.add_motion(dx, dy, dtheta, scan=scan, information=information)
+        else:
+            self.pose_tracker.add_motion(dx, dy, dtheta)
     
     def get_sensor_distances(self):
-        """获取传感器距离数据"""
-        lidar_data = self.lidar.getRangeImage()
-        if lidar_data:
-            num_points = len(lidar_data)
-            front = lidar_data[num_points//2] if num_points > 0 else 999
-            left = lidar_data[num_points//4] if num_points > 1 else 999
-            right = lidar_data[3*num_points//4] if num_points > 2 else 999
-            back = lidar_data[0] if num_points > 0 else 999
-            
-            # 处理无穷大值，设为最大检测距离
-            front = min(front, 5.0) if front != float('inf') else 5.0
-            left = min(left, 5.0) if left != float('inf') else 5.0
-            right = min(right, 5.0) if right != float('inf') else 5.0
-            back = min(back, 5.0) if back != float('inf') else 5.0
-            
-            return front, left, right, back
-        return 5.0, 5.0, 5.0, 5.0
+        """获取传感器距离数据（前、左、右、后，无回波截断为5米）"""
+        return self.sensors.cardinal()
     
     def collect_scan_data(self):
         """收集激光雷达数据"""
@@ -139,12 +249,105 @@ class AutoMappingController:
         # 显示信息
         if self.step_count % 50 == 0:
             mode_str = "自动" if self.mode == "auto" else "手动"
-            print(f"[{mode_str}] 步数: {self.step_count}, 位置: ({x:.2f}, {y:.2f})")
-            print(f"  传感器: 前{front:.2f}m, 左{left:.2f}m, 右{right:.2f}m, 后{back:.2f}m")
+            status = ("[{}] 步数: {}, 位置: ({:.2f}, {:.2f})\n"
+                      "  传感器: 前{:.2f}m, 左{:.2f}m, 右{:.2f}m, 后{:.2f}m")
+            args = [mode_str, self.step_count, x, y, front, left, right, back]
             if self.mode == "auto":
-                print(f"  状态: 被困计数{self.stuck_counter}, 探索方向{'右' if self.exploration_direction > 0 else '左'}")
-                print(f"  阈值: 障碍{self.obstacle_threshold}m, 转向{self.turn_threshold}m, 安全{self.min_safe_distance}m")
-                print(f"  连续转向: {self.continuous_turn_time}步")
+                status += ("\n  状态: 被困计数{}, 探索方向{}"
+                           "\n  阈值: 障碍{}m, 转向{}m, 安全{}m"
+                           "\n  连续转向: {}步"
+                           "\n  已探索面积: {:.2f}平方米, 前沿单元: {}")
+                args += [self.stuck_counter, "右" if self.exploration_direction > 0 else "左",
+                         self.obstacle_threshold, self.turn_threshold, self.min_safe_distance,
+                         self.continuous_turn_time,
+                         self.occupancy_grid.known_area(), len(self.frontier_explorer.frontiers)]
+            self.log.info("status", status, *args)
+    
+    def update_occupancy_map(self):
+        """用完整激光扫描增量更新占用栅格和前沿集合"""
+        lidar_data = self.sensors.ranges
+        if not lidar_data:
+            return
+        
+        x, y = self.get_robot_position()
+        angle = self.get_robot_orientation()
+        changed = self.occupancy_grid.update_scan(x, y, angle, lidar_data,
+                                                  max_range=self.lidar_max_range,
+                                                  beam_stride=self.map_beam_stride)
+        if changed:
+            self.telemetry.map_delta(self.robot.getTime(), self.occupancy_grid.width,
+                                     changed, self.occupancy_grid.state)
+            self.frontier_explorer.update(changed)
+            # 距离场增量传播，代价变化的单元交给D* Lite修复
+            self.path_planner.update_cells(self.costmap.update(changed))
+    
+    def frontier_exploration_algorithm(self):
+        """前沿探索算法 - 驶向得分最高的前沿聚类，遇障时交给反应式脱困；探索完成返回None"""
+        x, y = self.get_robot_position()
+        angle = self.get_robot_orientation()
+        goal = self.frontier_explorer.next_goal(x, y, self.step_count)
+        
+        if goal is None:
+            if self.step_count >= self.frontier_warmup_steps:
+                return None
+            # 地图尚未建立，先用反应式算法探索
+            return self.simple_exploration_algorithm()
+        
+        front, left, right, back = self.get_sensor_distances()
+        if front <= self.obstacle_threshold:
+            # 前方受阻，复用反应式脱困逻辑
+            return self.simple_exploration_algorithm()
+        
+        # 沿D* Lite路径跟踪前视点；目标不变时只做增量重规划
+        waypoint = self.plan_path_to(x, y, goal)
+        if waypoint is None:
+            # 规划不可达，放弃该目标
+            self.frontier_explorer.abandon_goal()
+            self.planned_goal = None
+            return self.simple_exploration_algorithm()
+        
+        # 计算航向误差并归一化到 [-π, π]
+        target_angle = math.atan2(waypoint[1] - y, waypoint[0] - x)
+        heading_error = math.atan2(math.sin(target_angle - angle), math.cos(target_angle - angle))
+        
+        if abs(heading_error) > self.frontier_turn_in_place:
+            # 误差较大，原地转向
+            turn = self.frontier_turn_speed if heading_error > 0 else -self.frontier_turn_speed
+            self.motion_state = "frontier"
+            return -turn, turn
+        
+        # 比例航向修正前进，膨胀区内按障碍物间隙减速
+        self.motion_state = "frontier"
+        clearance = self.costmap.clearance(x, y)
+        ratio = min(1.0, max(self.frontier_min_speed_ratio, clearance / self.costmap.inflation_radius))
+        speed = self.frontier_forward_speed * ratio
+        correction = self.frontier_heading_gain * heading_error
+        return speed - correction, speed + correction
+    
+    def plan_path_to(self, x, y, goal):
+        """返回到goal路径上的前视跟踪点；不可达返回None"""
+        start = self.occupancy_grid.world_to_cell(x, y)
+        target = self.occupancy_grid.world_to_cell(goal[0], goal[1])
+        if start is None or target is None:
+            return None
+        width = self.occupancy_grid.width
+        start = start[1] * width + start[0]
+        target = target[1] * width + target[0]
+        if self.occupancy_grid.state[start] == OccupancyGrid.OCCUPIED:
+            # 定位噪声使机器人落在障碍单元上，直接驶向目标
+            return goal
+        
+        if target != self.planned_goal:
+            self.planned_goal = target
+            self.planned_path = self.path_planner.plan(start, target)
+            self.last_path_step = self.step_count
+        elif self.step_count - self.last_path_step >= self.path_replan_interval:
+            self.path_planner.move_start(start)
+            self.planned_path = self.path_planner.path()
+            self.last_path_step = self.step_count
+        if self.planned_path is None:
+            return None
+        return lookahead_point(self.occupancy_grid, self.planned_path, x, y, self.path_lookahead)
     
     def simple_exploration_algorithm(self):
         """极激进自由探索算法 - 最大化探索空间，强制脱困"""
@@ -156,59 +359,63 @@ class AutoMappingController:
         # 极激进探索策略 - 永远不停止探索
         if front > self.obstacle_threshold:
             # 前方相对安全，快速前进
-            left_speed = right_speed = 3.0  # 提高前进速度
+            left_speed = right_speed = self.forward_speed
+            self.motion_state = "forward"
             self.move_direction = 1
             self.turn_time = 0
             self.stuck_counter = 0
             self.continuous_turn_time = 0
         elif front > self.min_safe_distance:
             # 前方空间很小但还能走，小心前进
-            left_speed = right_speed = 1.0
+            left_speed = right_speed = self.cautious_speed
+            self.motion_state = "cautious"
             self.stuck_counter = 0
         else:
             # 前方被阻挡 - 立即开始强制探索
             self.stuck_counter += 1
             self.continuous_turn_time += 1
+            self.motion_state = "escape"
             
             # 超级宽松的转向条件 - 只要有一丝空间就转
             if right > self.turn_threshold:
                 # 右转 - 使用更高速度确保能转出去
-                left_speed = 3.0
-                right_speed = -3.0
+                left_speed = self.escape_turn_speed
+                right_speed = -self.escape_turn_speed
                 self.exploration_direction = 1
-                print(f"右转脱困: 右侧空间{right:.2f}m")
+                self.log.info("escape", "右转脱困: 右侧空间{:.2f}m", right)
             elif left > self.turn_threshold:
                 # 左转 - 使用更高速度确保能转出去
-                left_speed = -3.0
-                right_speed = 3.0
+                left_speed = -self.escape_turn_speed
+                right_speed = self.escape_turn_speed
                 self.exploration_direction = -1
-                print(f"左转脱困: 左侧空间{left:.2f}m")
+                self.log.info("escape", "左转脱困: 左侧空间{:.2f}m", left)
             elif right > 0.05:  # 极低阈值 - 只要传感器能检测到空间
                 # 即使空间极小也强制右转
                 left_speed = 2.5
                 right_speed = -2.5
-                print(f"强制右转: 右侧微小空间{right:.2f}m")
+                self.log.info("escape", "强制右转: 右侧微小空间{:.2f}m", right)
             elif left > 0.05:  # 极低阈值 - 只要传感器能检测到空间  
                 # 即使空间极小也强制左转
                 left_speed = -2.5
                 right_speed = 2.5
-                print(f"强制左转: 左侧微小空间{left:.2f}m")
+                self.log.info("escape", "强制左转: 左侧微小空间{:.2f}m", left)
             else:
                 # 完全被困 - 启动最强脱困模式
+                self.motion_state = "stuck"
                 if self.stuck_counter < 5:
                     # 快速后退
                     left_speed = right_speed = -3.0
-                    print(f"快速后退脱困: 被困{self.stuck_counter}步")
+                    self.log.info("escape", "快速后退脱困: 被困{}步", self.stuck_counter)
                 elif self.stuck_counter < 15:
                     # 强制大角度转向，不管空间
                     if self.exploration_direction > 0:
                         left_speed = 4.0  # 使用最大转向速度
                         right_speed = -4.0
-                        print("强制右转脱困: 最大转速")
+                        self.log.info("escape", "强制右转脱困: 最大转速")
                     else:
                         left_speed = -4.0
                         right_speed = 4.0
-                        print("强制左转脱困: 最大转速")
+                        self.log.info("escape", "强制左转脱困: 最大转速")
                 elif self.stuck_counter < 25:
                     # 后退 + 转向组合
                     if self.stuck_counter % 2 == 0:
@@ -216,37 +423,38 @@ class AutoMappingController:
                     else:
                         left_speed = 3.5 * self.exploration_direction
                         right_speed = -3.5 * self.exploration_direction
-                    print("后退转向组合脱困")
+                    self.log.info("escape", "后退转向组合脱困")
                 else:
                     # 改变探索方向并执行暴力脱困
                     self.exploration_direction *= -1
                     left_speed = 5.0 * self.exploration_direction  # 使用超高速度
                     right_speed = -5.0 * self.exploration_direction
                     self.stuck_counter = 0
-                    print("暴力脱困: 改变方向，超高转速")
+                    self.log.info("escape", "暴力脱困: 改变方向，超高转速")
         
         # 更激进的探索方向变化
-        if self.step_count % 50 == 0:  # 更频繁改变方向
+        if self.step_count % self.direction_flip_interval == 0:
             self.exploration_direction *= -1
-            print(f"定期改变探索方向: {'右' if self.exploration_direction > 0 else '左'}")
+            self.log.info("direction", "定期改变探索方向: {}", "右" if self.exploration_direction > 0 else "左")
         
         # 增加更多随机探索
-        if self.step_count % 30 == 0 and random.random() > 0.5:  # 更频繁的随机转向
+        if (self.step_count % self.random_turn_interval == 0 and
+                random.random() < self.random_turn_probability):
             # 随机强力转向
             if random.random() > 0.5:
-                left_speed = 3.5
-                right_speed = -3.5
-                print("随机右转探索")
+                left_speed = self.random_turn_speed
+                right_speed = -self.random_turn_speed
+                self.log.info("random_turn", "随机右转探索")
             else:
-                left_speed = -3.5
-                right_speed = 3.5
-                print("随机左转探索")
+                left_speed = -self.random_turn_speed
+                right_speed = self.random_turn_speed
+                self.log.info("random_turn", "随机左转探索")
         
         # 防止连续转向太久 - 强制前进
-        if self.continuous_turn_time > 30:
+        if self.continuous_turn_time > self.max_continuous_turn:
             left_speed = right_speed = 2.0  # 强制前进
             self.continuous_turn_time = 0
-            print("强制前进打破转向循环")
+            self.log.info("force_forward", "强制前进打破转向循环")
         
         return left_speed, right_speed
     
@@ -258,11 +466,17 @@ class AutoMappingController:
         if key == ord('M') or key == ord('m'):
             self.mode = "manual" if self.mode == "auto" else "auto"
             mode_str = "手动" if self.mode == "manual" else "自动"
-            print(f"切换到{mode_str}模式")
+            self.log.info(None, "切换到{}模式", mode_str)
+        
+        # 检查探索策略切换
+        if key == ord('F') or key == ord('f'):
+            self.exploration_strategy = "reactive" if self.exploration_strategy == "frontier" else "frontier"
+            strategy_str = "前沿探索" if self.exploration_strategy == "frontier" else "反应式探索"
+            self.log.info(None, "切换到{}策略", strategy_str)
         
         # 检查退出
         if key == ord('Q') or key == ord('q'):
-            print("准备退出...")
+            self.log.info(None, "准备退出...")
             return False
         
         left_speed = 0.0
@@ -271,41 +485,50 @@ class AutoMappingController:
         if self.mode == "auto":
             # 自动探索模式
             if self.step_count < self.exploration_time:
-                left_speed, right_speed = self.simple_exploration_algorithm()
+                if self.exploration_strategy == "frontier":
+                    speeds = self.frontier_exploration_algorithm()
+                    if speeds is None:
+                        self.log.info(None, "前沿探索完成: 没有剩余可达前沿!")
+                        return False
+                    left_speed, right_speed = speeds
+                else:
+                    left_speed, right_speed = self.simple_exploration_algorithm()
             else:
-                print("自动探索完成!")
+                self.log.info(None, "自动探索完成!")
                 return False
         else:
             # 手动控制模式
+            self.motion_state = "manual"
             if key == ord('W') or key == ord('w'):
                 left_speed = right_speed = 2.0
-                print("前进")
+                self.log.info("manual", "前进")
             elif key == ord('S') or key == ord('s'):
                 left_speed = right_speed = -2.0
-                print("后退")
+                self.log.info("manual", "后退")
             elif key == ord('A') or key == ord('a'):
                 left_speed = -2.0
                 right_speed = 2.0
-                print("左转")
+                self.log.info("manual", "左转")
             elif key == ord('D') or key == ord('d'):
                 left_speed = 2.0
                 right_speed = -2.0
-                print("右转")
+                self.log.info("manual", "右转")
             elif key == ord(' '):  # 空格
                 left_speed = right_speed = 0.0
-                print("停止")
+                self.log.info("manual", "停止")
         
         # 设置电机速度
         self.left_motor.setVelocity(left_speed)
         self.right_motor.setVelocity(right_speed)
+        self.wheel_speeds = (left_speed, right_speed)
         
         return True
     
     def save_simple_map(self):
-        """保存简单的地图数据 - 兼容Task 2粒子滤波定位"""
+        """保存简单的地图数据 - 兼容Task 2粒子滤波定位，成功时返回 True"""
         if not self.scan_data:
             print("没有收集到数据!")
-            return
+            return False
         
         # 创建与手动建图兼容的文件 - Task 2需要这个文件名
         filename = "simple_map_data.txt"
@@ -363,9 +586,11 @@ class AutoMappingController:
             print("   - auto_map_visualization.txt (ASCII可视化)")  
             print("   - auto_map_image.ppm (图片文件，可用于报告)")
             print("   Task 2粒子滤波现在可以直接使用这些建图结果！")
+            return True
             
         except Exception as e:
             print(f"保存文件时出错: {e}")
+            return False
     
     def create_simple_visualization(self):
         """创建改进的ASCII艺术地图和PPM图片 - 修复地图生成逻辑"""
@@ -531,30 +756,107 @@ class AutoMappingController:
             import traceback
             traceback.print_exc()
     
+    def apply_quality(self):
+        """按看门狗的质量等级调整建图光束步长和重规划间隔"""
+        if self.quality_baseline is None:
+            self.quality_baseline = (self.map_beam_stride, self.path_replan_interval)
+        beam_stride, replan_interval = self.quality_baseline
+        self.map_beam_stride = round(self.watchdog.interpolate(beam_stride, beam_stride * 4))
+        self.path_replan_interval = round(self.watchdog.interpolate(replan_interval, replan_interval * 4))
+        self.log.warning(None, "步长预算: 平滑耗时{:.1f}ms/{}ms, 质量等级{}, 光束步长{}, 重规划间隔{}",
+                         self.watchdog.load * 1000, self.timestep, self.watchdog.level,
+                         self.map_beam_stride, self.path_replan_interval)
+    
+    def publish_telemetry(self, stages):
+        """发送当前位姿估计和本周期各阶段耗时"""
+        now = self.robot.getTime()
+        x, y = self.get_robot_position()
+        source = 'pose_graph' if self.use_pose_graph else 'gps'
+        self.telemetry.pose(now, x, y, self.get_robot_orientation(), source)
+        self.telemetry.timings(now, stages)
+    
     def run(self):
         """主循环"""
         print("开始自动建图! 默认自动探索，按M切换手动模式...")
         
         try:
             while self.robot.step(self.timestep) != -1:
+                self.watchdog.begin()
+                if self.step_count == 0:
+                    self.log.info(None, "启动耗时: 首个控制周期 {:.0f}ms",
+                                  (time.perf_counter() - self.startup_begin) * 1000)
+                step_start = time.perf_counter()
+                
+                # 本周期传感器快照
+                self.sensors.update()
+                
+                # 推进位姿图（没有GPS时）
+                self.update_pose_graph()
+                pose_done = time.perf_counter()
+                
+                # 更新占用栅格和前沿
+                self.update_occupancy_map()
+                map_done = time.perf_counter()
+                
                 # 处理输入（自动或手动）
                 if not self.handle_input():
                     break
+                control_done = time.perf_counter()
+                
+                # 发布位姿和各阶段耗时（降级时跳过）
+                if self.telemetry.enabled and not self.watchdog.degraded:
+                    self.publish_telemetry({'pose': pose_done - step_start,
+                                            'map': map_done - pose_done,
+                                            'control': control_done - map_done})
                 
                 # 收集传感器数据
                 self.collect_scan_data()
                 
+                # 记录探索效率指标
+                self.metrics.record(self.step_count, self.robot.getTime(),
+                                    self.get_robot_position(),
+                                    self.occupancy_grid.known_cells,
+                                    self.motion_state)
+                
+                for line in self.memory.check(self.step_count):
+                    self.log.info(None, line)
+                
                 # 增加步数计数
                 self.step_count += 1
+                
+                if self.watchdog.end():
+                    self.apply_quality()
         
         except KeyboardInterrupt:
             print("用户中断程序")
         except Exception as e:
             print(f"程序运行时出错: {e}")
         finally:
-            # 保存数据
+            # 写出剩余日志（之后的保存信息直接打印）
+            self.log.close()
+            self.telemetry.close()
+            
+            # 保存指标
+            self.metrics.close()
+            summary = self.metrics.summary()
+            print(f"探索指标: 面积{summary['explored_area']:.2f}平方米, "
+                  f"覆盖速率{summary['coverage_rate']:.4f}平方米/秒, "
+                  f"行驶{summary['distance']:.2f}米, "
+                  f"被困{summary['stuck_time']:.1f}秒, 脱困{summary['escape_time']:.1f}秒")
+            print("探索指标已保存到: exploration_metrics.csv")
+            budget = self.watchdog.summary()
+            print(f"步长预算: {budget['steps']} 步中 {budget['overruns']} 步超时, "
+                  f"平均 {budget['mean_ms']:.1f}ms, 最长 {budget['worst_ms']:.1f}ms, "
+                  f"质量调整 {budget['level_changes']} 次")
+            
+            peaks = ", ".join(f"{name} {entry['peak_mb']:.1f}MB" for name, entry in self.memory.summary().items())
+            print(f"内存峰值: {peaks}")
+            self.memory.close()
+            
+            # 保存数据（成功后删除转存文件）
             print("保存自动建图数据...")
-            self.save_simple_map()
+            if self.save_simple_map():
+                self.scan_data.close()
             print("自动建图完成!")
 
 # 主程序
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+探索效率指标测试
+测试面积、覆盖速率、被困/脱困时间和行驶距离的累计（独立于Webots）
+"""
+
+import os
+import tempfile
+
+from exploration_metrics import ExplorationMetrics
+
+
+def test_metrics_accumulate_and_stream():
+    """模拟20步探索，检查累计值和CSV输出"""
+    path = os.path.join(tempfile.mkdtemp(), "exploration_metrics.csv")
+    metrics = ExplorationMetrics(path, cell_area=0.0025, timestep=0.064, interval=10)
+
+    for step in range(20):
+        state = "stuck" if step < 5 else ("escape" if step < 8 else "forward")
+        metrics.record(step, step * 0.064, (step * 0.01, 0.0), step * 100, state)
+    metrics.close()
+
+    summary = metrics.summary()
+    assert abs(summary['explored_area'] - 1900 * 0.0025) < 1e-9
+    assert abs(summary['stuck_time'] - 5 * 0.064) < 1e-9
+    assert abs(summary['escape_time'] - 3 * 0.064) < 1e-9
+    assert abs(summary['distance'] - 0.19) < 1e-9
+    assert summary['coverage_rate'] > 0
+
+    with open(path) as f:
+        lines = f.read().split("\n=== 统计信息 ===\n")[0].strip().split('\n')
+    assert lines[0] == ExplorationMetrics.HEADER.strip()
+    assert [int(line.split(',')[0]) for line in lines[1:]] == [10, 19]
+    print(f"覆盖速率: {summary['coverage_rate']:.4f}平方米/秒, 数据行: {len(lines) - 1}")
+
+
+if __name__ == "__main__":
+    print("=== 探索效率指标测试 ===\n")
+    test_metrics_accumulate_and_stream()
+    print("\n 指标测试完成！")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+前沿探索引擎测试
+测试占用栅格更新、增量前沿维护和目标选择（独立于Webots）
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from occupancy_grid import OccupancyGrid
+from frontier_exploration import FrontierExplorer
+
+
+def box_scan(x, y, half_size=1.0, count=360):
+    """模拟机器人在正方形房间中心附近的一帧扫描（朝向0）"""
+    import math
+    from occupancy_grid import lidar_beam_angle
+    ranges = []
+    for i in range(count):
+        angle = lidar_beam_angle(i, count)
+        c, s = math.cos(angle), math.sin(angle)
+        tx = (half_size - x) / c if c > 1e-9 else ((-half_size - x) / c if c < -1e-9 else float('inf'))
+        ty = (half_size - y) / s if s > 1e-9 else ((-half_size - y) / s if s < -1e-9 else float('inf'))
+        ranges.append(min(tx, ty))
+    return ranges
+
+
+def test_scan_update_marks_free_and_occupied():
+    """扫描后机器人位置为空闲，墙壁为障碍物"""
+    grid = OccupancyGrid(resolution=0.05)
+    changed = grid.update_scan(0.0, 0.0, 0.0, box_scan(0.0, 0.0))
+
+    assert changed
+    assert grid.state[_index(grid, 0.0, 0.0)] == grid.FREE
+    assert grid.state[_index(grid, 1.01, 0.0)] == grid.OCCUPIED
+    assert grid.state[_index(grid, 2.0, 2.0)] == grid.UNKNOWN
+    print(f"已探索面积: {grid.known_area():.2f}平方米, 障碍单元: {grid.occupied_cells}")
+
+
+def test_open_scan_creates_frontier_goal():
+    """无回波的方向会留下前沿，探索器应选出目标"""
+    grid = OccupancyGrid(resolution=0.05)
+    explorer = FrontierExplorer(grid)
+    ranges = [float('inf')] * 360
+    explorer.update(grid.update_scan(0.0, 0.0, 0.0, ranges, max_range=1.0))
+
+    assert explorer.frontiers
+    goal = explorer.next_goal(0.0, 0.0, 0)
+    assert goal is not None
+    assert 0.8 < (goal[0]**2 + goal[1]**2) ** 0.5 < 1.2
+    print(f"前沿单元: {len(explorer.frontiers)}, 目标: ({goal[0]:.2f}, {goal[1]:.2f})")
+
+
+def test_closed_room_has_no_frontier():
+    """封闭房间完全观测后不应再有前沿"""
+    grid = OccupancyGrid(resolution=0.05)
+    explorer = FrontierExplorer(grid)
+    for x, y in [(0.0, 0.0), (0.5, 0.5), (-0.5, -0.5), (0.5, -0.5), (-0.5, 0.5)]:
+        explorer.update(grid.update_scan(x, y, 0.0, box_scan(x, y, half_size=0.8)))
+
+    assert explorer.next_goal(0.0, 0.0, 0) is None
+    print("封闭房间探索完成，无剩余前沿")
+
+
+def test_unreachable_goal_is_blacklisted():
+    """目标超时未到达时加入黑名单"""
+    grid = OccupancyGrid(resolution=0.05)
+    explorer = FrontierExplorer(grid, goal_timeout_steps=5)
+    explorer.update(grid.update_scan(0.0, 0.0, 0.0, [float('inf')] * 360, max_range=1.0))
+
+    first_goal = explorer.next_goal(0.0, 0.0, 0)
+    for step in range(1, 8):
+        explorer.next_goal(0.0, 0.0, step)
+
+    assert explorer.blacklist
+    assert explorer.is_blacklisted(first_goal)
+    print(f"黑名单目标: {len(explorer.blacklist)}个")
+
+
+def _index(grid, x, y):
+    gx, gy = grid.world_to_cell(x, y)
+    return gy * grid.width + gx
+
+
+if __name__ == "__main__":
+    print("=== 前沿探索引擎测试 ===\n")
+    test_scan_update_marks_free_and_occupied()
+    test_open_scan_creates_frontier_goal()
+    test_closed_room_has_no_frontier()
+    test_unreachable_goal_is_blacklisted()
+    print("\n 前沿探索测试完成！")